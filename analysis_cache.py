@@ -0,0 +1,307 @@
+# -----------------------------
+# analysis_cache.py
+# 목적: 같은(거의 같은) 다이어그램을 다시 분석하지 않도록 graph_analysis 결과를 캐싱
+# 1) 키: 정규화한 Mermaid 텍스트 + 해석한 힌트의 sha256
+#    - 주석(%%) 줄 제거, 공백 정리, 빈 줄 제거
+#    - 힌트(entry/exit/redundant, weight/capacity/latency/availability)는 주석 줄 모양이 아니라
+#      분석기와 같은 파서(parse_annotations / parse_model_annotations)로 읽은 값을 정렬해서 키에 포함
+#      (예: "%% HA pair, redundant: GW"도 분석 결과를 바꾸므로 키가 달라야 함)
+#    - 시나리오 traffic_json / 역할 어휘처럼 텍스트 밖 분석 입력은 context로 받아 키에 포함
+#      (context는 analysis_context로만 만듦 → batch_grader와 review_SPOF_bottleneck의 키가 같음)
+# 2) 저장소: 프로세스 내 LRU + system_graph_cache 테이블(db_04_graph_cache.sql + db_10_graph_cache_results.sql)
+#    - 항목: graph_analysis / penalty_info / 텍스트 대안 + 대안 다이어그램 + 파싱 엣지(compact_graph 형태)
+#      → 적중 시 Mermaid 재파싱·역할 분류·재작성 없이 결과 반영 + findings 저장까지 끝남
+#    - LRU에는 사본을 넣고 사본을 돌려줌 (호출자가 결과 dict를 고쳐도 캐시는 그대로)
+# 3) engine_version 태그가 다르면 조회되지 않고, 오래된 버전 행은 정리 시 삭제
+# 4) 행 수 상한을 넘으면 last_used_at 기준으로 오래된 것부터 삭제(LRU)
+#    - 저장할 때마다가 아니라 CACHE_EVICT_EVERY행 저장마다 (evict_if_due)
+#    - 결과 반영 트랜잭션 밖에서 자기 트랜잭션으로 바로 커밋 (DELETE ... ORDER BY LIMIT의 gap lock을 오래 쥐지 않게)
+#    - 잠금 오류(deadlock / lock wait timeout)는 롤백 후 다음 차례로 미룸 (채점 실패로 번지지 않음)
+# -----------------------------
+
+import copy
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from graph_analysis import parse_annotations, parse_model_annotations
+from graph_findings import compact_graph, expand_graph
+
+
+# 캐시 크기 상한
+CACHE_MAX_ROWS = 50000       # system_graph_cache 최대 행 수
+CACHE_LRU_SIZE = 2048        # 프로세스 내 LRU 항목 수
+CACHE_EVICT_EVERY = 1000     # 이만큼 저장할 때마다 행 수 정리 (그 사이에는 상한을 이만큼 넘을 수 있음)
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# 테이블이 아직 없을 때(MySQL ER_NO_SUCH_TABLE) / 컬럼이 없을 때(ER_BAD_FIELD_ERROR)
+_ER_NO_SUCH_TABLE = 1146
+_ER_BAD_FIELD = 1054
+# 정리 중 잠금 충돌 (ER_LOCK_WAIT_TIMEOUT / ER_LOCK_DEADLOCK) → 건너뛰고 다음에 다시
+_LOCK_ERRORS = (1205, 1213)
+
+
+def normalize_mermaid(mermaid_text: str) -> str:
+    """캐시 키용 정규화: 주석 줄 제거, 공백 정리 (힌트는 hint_context로 따로 키에 넣음)."""
+    out = []
+    for raw in mermaid_text.splitlines():
+        line = WHITESPACE_RE.sub(" ", raw).strip()
+        if line and not line.startswith("%%"):
+            out.append(line)
+    return "\n".join(out)
+
+
+def hint_context(mermaid_text: str) -> Dict:
+    """분석기가 읽는 힌트 그대로 (정렬된 JSON 직렬화용 형태)."""
+    redundant, entry, exit_ = parse_annotations(mermaid_text)
+    model = parse_model_annotations(mermaid_text)
+    return {
+        "entry": entry,
+        "exit": exit_,
+        "redundant": sorted(redundant),
+        "model": {
+            key: sorted([list(target) if isinstance(target, tuple) else target, value]
+                        for target, value in values.items())
+            for key, values in model.items() if values
+        },
+    }
+
+
+def analysis_context(traffic: Optional[Dict], vocab: Optional[Dict]) -> Optional[Dict]:
+    """cache_key에 넣을 텍스트 밖 입력 (없는 항목은 빼서 traffic만 있던 때의 키와 같게)."""
+    context = {}
+    if traffic:
+        context["traffic"] = traffic
+    if vocab:
+        context["roles"] = vocab
+    return context or None
+
+
+def cache_key(mermaid_text: str, context: Optional[Dict] = None) -> str:
+    """context: 분석 결과를 바꾸는 텍스트 밖 입력 (analysis_context), 없으면 텍스트 + 힌트만."""
+    text = normalize_mermaid(mermaid_text)
+    text += "\n" + json.dumps(hint_context(mermaid_text), ensure_ascii=False, sort_keys=True)
+    if context:
+        text += "\n" + json.dumps(context, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_entry(result: Dict) -> Dict:
+    """
+    analyze_mermaid() 결과 → 저장 형태 (내용 기반 필드만, 제출별 정보인 perf/revision은 뺌).
+    엣지는 compact_graph({"nodes", "edges": [[i, j]]})로 줄여서 저장.
+    """
+    return {
+        "graph_analysis": {f: v for f, v in result["graph_analysis"].items() if f != "revision"},
+        "penalty_info": result["penalty_info"],
+        "alternative_arch": result.get("alternative_arch"),
+        "alternative_mermaid": result.get("alternative_mermaid"),
+        "graph": compact_graph(result["edges"]),
+    }
+
+
+def _restore(entry: Dict) -> Dict:
+    """저장 형태 → 결과 (호출자 몫의 사본, 엣지는 [(a, b)]로 펼침)."""
+    result = copy.deepcopy(entry)
+    result["edges"] = expand_graph(result.pop("graph"))
+    return result
+
+
+class GraphAnalysisCache:
+    """
+    analyze_mermaid() 결과 캐시.
+    get_many는 {graph_analysis, penalty_info, alternative_arch, alternative_mermaid, edges}를 돌려줌.
+    get_many/put_many의 DB 쓰기는 호출자의 트랜잭션에 얹힘 (여기서는 commit하지 않음).
+    evict_if_due는 자기 트랜잭션으로 커밋하므로 호출자가 먼저 커밋한 뒤 부름.
+    """
+
+    def __init__(
+        self,
+        engine_version: str,
+        max_rows: int = CACHE_MAX_ROWS,
+        lru_size: int = CACHE_LRU_SIZE,
+        evict_every: int = CACHE_EVICT_EVERY
+    ):
+        self.engine_version = engine_version
+        self.max_rows = max_rows
+        self.lru_size = lru_size
+        self.evict_every = evict_every
+        self._puts_since_evict = 0
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._db_enabled = True
+        self._stale_purged = False
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- 조회 ----------
+    def get_many(self, conn, keys: Iterable[str]) -> Dict[str, Dict]:
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, Dict] = {}
+        remaining = []
+        for k in unique:
+            if k in self._lru:
+                self._lru.move_to_end(k)
+                found[k] = _restore(self._lru[k])
+            else:
+                remaining.append(k)
+
+        if remaining and conn is not None and self._db_enabled:
+            rows = self._db_call(
+                conn,
+                "SELECT cache_key, graph_analysis_json, penalty_json, alternative_text, "
+                "alternative_mermaid_text, graph_json "
+                f"FROM system_graph_cache WHERE engine_version=%s AND cache_key IN ({_in_clause(remaining)}) "
+                "AND graph_json IS NOT NULL",
+                (self.engine_version, *remaining),
+                fetch=True,
+            ) or []
+            for row in rows:
+                entry = {
+                    "graph_analysis": _json(row["graph_analysis_json"]),
+                    "penalty_info": _json(row["penalty_json"]),
+                    "alternative_arch": row["alternative_text"],
+                    "alternative_mermaid": row["alternative_mermaid_text"],
+                    "graph": _json(row["graph_json"]),
+                }
+                self._remember(row["cache_key"], entry)
+                found[row["cache_key"]] = _restore(entry)
+
+        if found and conn is not None and self._db_enabled:
+            hit_keys = list(found)
+            self._db_call(
+                conn,
+                "UPDATE system_graph_cache SET hit_count=hit_count+1, last_used_at=CURRENT_TIMESTAMP "
+                f"WHERE cache_key IN ({_in_clause(hit_keys)})",
+                tuple(hit_keys),
+            )
+
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    # ---------- 저장 ----------
+    def put_many(self, conn, results: Dict[str, Dict]):
+        """results: {cache_key: analyze_mermaid() 결과} (저장 형태로는 여기서 바꿈)."""
+        if not results:
+            return
+        entries = {k: cache_entry(result) for k, result in results.items()}
+        for k, entry in entries.items():
+            self._remember(k, entry)
+
+        if conn is None or not self._db_enabled:
+            return
+
+        rows = []
+        for k, entry in entries.items():
+            analysis = json.dumps(entry["graph_analysis"], ensure_ascii=False)
+            penalty = json.dumps(entry["penalty_info"], ensure_ascii=False)
+            graph = json.dumps(entry["graph"], ensure_ascii=False, separators=(",", ":"))
+            alt = entry["alternative_arch"]
+            alt_mermaid = entry["alternative_mermaid"]
+            size = len(analysis) + len(penalty) + len(graph) + len(alt or "") + len(alt_mermaid or "")
+            rows.append((k, self.engine_version, analysis, penalty, alt, alt_mermaid, graph, size))
+
+        self._db_call(
+            conn,
+            "INSERT INTO system_graph_cache "
+            "(cache_key, engine_version, graph_analysis_json, penalty_json, alternative_text, "
+            "alternative_mermaid_text, graph_json, size_bytes) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE engine_version=VALUES(engine_version), "
+            "graph_analysis_json=VALUES(graph_analysis_json), penalty_json=VALUES(penalty_json), "
+            "alternative_text=VALUES(alternative_text), "
+            "alternative_mermaid_text=VALUES(alternative_mermaid_text), graph_json=VALUES(graph_json), "
+            "size_bytes=VALUES(size_bytes), last_used_at=CURRENT_TIMESTAMP",
+            rows,
+            many=True,
+        )
+        self._puts_since_evict += len(rows)
+
+    # ---------- 정리 ----------
+    def evict_if_due(self, conn):
+        """
+        첫 호출이거나 마지막 정리 뒤 evict_every행 이상 저장했으면 evict를 자기 트랜잭션으로 실행하고 커밋.
+        잠금 오류는 롤백 후 경고만 (다음 호출에서 다시 시도).
+        """
+        if conn is None or not self._db_enabled:
+            return
+        stale_purged = self._stale_purged
+        if stale_purged and self._puts_since_evict < self.evict_every:
+            return
+        try:
+            self.evict(conn)
+            conn.commit()
+        except Exception as e:
+            if getattr(e, "errno", None) not in _LOCK_ERRORS:
+                raise
+            conn.rollback()
+            self._stale_purged = stale_purged     # 롤백된 구버전 행 삭제도 다음에 다시
+            print(f"⚠️  분석 캐시 정리 중 잠금 충돌, 다음에 다시 시도합니다: {e}")
+            return
+        self._puts_since_evict = 0
+
+    def evict(self, conn):
+        """다른 engine_version 행 삭제(프로세스당 1회) + 행 수 상한 초과분 LRU 삭제 (커밋은 호출자)."""
+        if conn is None or not self._db_enabled:
+            return
+
+        if not self._stale_purged:
+            self._db_call(
+                conn,
+                "DELETE FROM system_graph_cache WHERE engine_version <> %s",
+                (self.engine_version,),
+            )
+            self._stale_purged = True
+
+        rows = self._db_call(conn, "SELECT COUNT(*) AS cnt FROM system_graph_cache", (), fetch=True)
+        if not rows:
+            return
+        excess = int(rows[0]["cnt"]) - self.max_rows
+        if excess > 0:
+            self._db_call(
+                conn,
+                "DELETE FROM system_graph_cache ORDER BY last_used_at LIMIT %s",
+                (excess,),
+            )
+
+    # ---------- 내부 ----------
+    def _remember(self, key: str, entry: Dict):
+        self._lru[key] = copy.deepcopy(entry)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _db_call(self, conn, sql: str, params, fetch: bool = False, many: bool = False):
+        cur = conn.cursor(dictionary=True)
+        try:
+            if many:
+                cur.executemany(sql, params)
+            else:
+                cur.execute(sql, params)
+            return cur.fetchall() if fetch else None
+        except Exception as e:
+            # db_04_graph_cache.sql을 아직 안 돌렸으면 프로세스 내 LRU만 사용
+            if getattr(e, "errno", None) == _ER_NO_SUCH_TABLE:
+                print("⚠️  system_graph_cache 테이블이 없습니다. db_04_graph_cache.sql 실행 전까지 메모리 캐시만 사용합니다.")
+                self._db_enabled = False
+                return None
+            if getattr(e, "errno", None) == _ER_BAD_FIELD:
+                raise RuntimeError(
+                    "system_graph_cache에 엣지/대안 다이어그램 컬럼이 없습니다. db_10_graph_cache_results.sql을 먼저 실행하세요."
+                ) from e
+            raise
+        finally:
+            cur.close()
+
+
+def _in_clause(items) -> str:
+    return ",".join(["%s"] * len(items))
+
+
+def _json(value) -> Optional[Dict]:
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
@@ -0,0 +1,193 @@
+# -----------------------------
+# availability_model.py
+# 목적: 컴포넌트 무작위 장애 하에서 entry → exit 가용성 추정 (몇 nines인지 + 가용성을 깎는 노드)
+# 1) 노드 가용성: %% availability: DB=0.9995, LLM=99.5  (비율 또는 %) 또는 역할별 기본값 (node_roles)
+#    redundant 표시 노드는 레플리카 REDUNDANT_REPLICAS개 중 하나만 살아 있으면 됨 → 1 - (1-a)^k
+# 2) 샘플링: 샘플 S개를 비트 하나씩으로 보고, 노드마다 "살아 있는 샘플" 비트셋(파이썬 int)을 만듦
+#    (장애 확률이 작으므로 장애 샘플 위치만 기하분포 간격으로 뽑아서 켬 → 노드당 O(S·q))
+#    기본 100k 샘플, 노드가 많으면 AVAILABILITY_WORK_BUDGET 안에서 샘플 수를 줄임
+# 3) 도달성: 모든 샘플을 한 번에 — reach[v] = up[v] & OR(reach[선행 노드])
+#    SCC 위상 순서로 한 번 훑고, 사이클(SCC) 안에서는 변화가 없을 때까지 반복
+#    성공 = 모든 exit에 도달 (SPOF 정의와 같게 exit 하나라도 끊기면 실패)
+# 4) 기여도: 장애 샘플과 많이 겹치는 노드 몇 개를 골라 "그 노드가 절대 안 죽으면" 다시 계산
+#    → 줄어드는 실패 비율 = 비가용성 기여도
+# 참고:
+# - 표준 라이브러리만 사용 (NumPy 없음) → traffic 없이도 모든 제출에서 실행
+# - seed 고정 → 같은 입력이면 같은 결과
+# -----------------------------
+
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+from graph_csr import CSRGraph
+from node_roles import BALANCER, CACHE, DB, LLM, QUEUE, VECTOR, NodeRoles, first_role_value
+
+
+# 역할별 기본 가용성 (위에서부터 먼저 맞는 것)
+DEFAULT_AVAILABILITY: List[Tuple[int, float]] = [
+    (LLM, 0.995),
+    (BALANCER, 0.9999),
+    (QUEUE, 0.9995),
+    (DB, 0.9995),
+    (VECTOR, 0.999),
+    (CACHE, 0.999),
+]
+DEFAULT_SERVICE_AVAILABILITY = 0.999
+REDUNDANT_REPLICAS = 2
+
+AVAILABILITY_SAMPLES = 100_000
+AVAILABILITY_MIN_SAMPLES = 2_000
+AVAILABILITY_WORK_BUDGET = 20_000_000   # 샘플 수 × core 노드 수 상한 (큰 그래프는 샘플 수를 줄임)
+AVAILABILITY_SEED = 42
+AVAILABILITY_CANDIDATES = 8       # 기여도를 다시 계산해 볼 노드 수
+AVAILABILITY_TOP_CONTRIBUTORS = 3
+
+
+def node_availability(roles: int, redundant: bool, override: Optional[float] = None) -> float:
+    """노드 1개의 가용성 (roles: 역할 비트마스크, redundant면 레플리카 반영). override > 1이면 %로 봄."""
+    if override is not None:
+        a = override / 100.0 if override > 1 else override
+    else:
+        a = first_role_value(roles, DEFAULT_AVAILABILITY, DEFAULT_SERVICE_AVAILABILITY)
+    a = min(1.0, max(0.0, a))
+    return 1.0 - (1.0 - a) ** REDUNDANT_REPLICAS if redundant else a
+
+
+def sample_count(core_nodes: int) -> int:
+    return max(AVAILABILITY_MIN_SAMPLES, min(AVAILABILITY_SAMPLES, AVAILABILITY_WORK_BUDGET // max(1, core_nodes)))
+
+
+def down_bits(rng: random.Random, samples: int, q: float) -> int:
+    """각 비트가 확률 q로 1인 samples비트 비트셋 (1 = 그 샘플에서 장애)."""
+    if q <= 0.0:
+        return 0
+    if q >= 1.0:
+        return (1 << samples) - 1
+    buf = bytearray((samples + 7) // 8)
+    log1q = math.log1p(-q)
+    i = -1
+    while True:
+        # 다음 장애 샘플까지 간격 ~ Geometric(q)
+        i += 1 + int(math.log(1.0 - rng.random()) / log1q)
+        if i >= samples:
+            break
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def reachable_all(
+    g: CSRGraph,
+    order: List[List[int]],
+    core_mask: bytearray,
+    up: List[int],
+    root: int,
+    targets: List[int],
+    full: int
+) -> int:
+    """모든 샘플에 대해 root → 모든 target 도달 여부 비트셋 (order: SCC 위상 순서)."""
+    off, adj = g.rev_off, g.rev_adj
+    reach = [0] * len(g)
+    reach[root] = full
+    for comp in order:
+        changed = True
+        while changed:
+            changed = False
+            for v in comp:
+                if v == root:
+                    continue
+                acc = 0
+                for k in range(off[v], off[v + 1]):
+                    u = adj[k]
+                    if core_mask[u]:
+                        acc |= reach[u]
+                new = acc & up[v]
+                if new != reach[v]:
+                    reach[v] = new
+                    changed = len(comp) > 1
+    ok = full
+    for t in targets:
+        ok &= reach[t]
+    return ok
+
+
+def simulate_availability(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    roles: NodeRoles,
+    redundant,
+    annotations: Optional[Dict] = None,
+    samples: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    entry → 모든 exit 가용성 추정. entry/exit이 없거나 entry에서 exit에 닿지 않으면 None.
+    반환: {"samples", "seed", "availability", "nines", "failures", "lower_bound",
+           "top_contributors": [{"node", "availability", "unavailability_share"}]}
+    """
+    if not entry or entry not in g or not exits:
+        return None
+    root = g.index[entry]
+    targets = [g.index[x] for x in exits if x in g and x != entry]
+    if not targets or not core_mask[root]:
+        return None
+    fwd = g.reach([root], mask=core_mask)
+    if not all(fwd[t] for t in targets):
+        return None     # core가 전체 그래프(폴백)라 도달성이 정의되지 않음
+
+    overrides = (annotations or {}).get("availability") or {}
+    samples = samples or sample_count(sum(core_mask))
+    rng = random.Random(AVAILABILITY_SEED)
+    full = (1 << samples) - 1
+
+    up = [full] * len(g)
+    down = [0] * len(g)
+    avail: Dict[int, float] = {}
+    for v in range(len(g)):
+        if not core_mask[v] or v == root:
+            continue
+        name = g.ids[v]
+        a = node_availability(roles.masks[v], name in redundant, overrides.get(name))
+        avail[v] = a
+        down[v] = down_bits(rng, samples, 1.0 - a)
+        up[v] = full & ~down[v]
+
+    order = g.strongly_connected_components(core_mask)[::-1]
+    ok = reachable_all(g, order, core_mask, up, root, targets, full)
+    failures = samples - ok.bit_count()
+
+    contributors = []
+    if failures:
+        fail = full & ~ok
+        overlap = sorted(avail, key=lambda v: (fail & down[v]).bit_count(), reverse=True)
+        for v in overlap[:AVAILABILITY_CANDIDATES]:
+            if not (fail & down[v]):
+                break
+            saved_up = up[v]
+            up[v] = full
+            fixed = reachable_all(g, order, core_mask, up, root, targets, full).bit_count() - ok.bit_count()
+            up[v] = saved_up
+            if fixed > 0:
+                contributors.append((fixed, v))
+        contributors.sort(reverse=True)
+
+    availability = 1.0 - failures / samples
+    # 장애 샘플이 하나도 없으면 "적어도 1 - 1/S" 만큼만 말할 수 있음
+    nines = -math.log10(failures / samples) if failures else math.log10(samples)
+    return {
+        "samples": samples,
+        "seed": AVAILABILITY_SEED,
+        "availability": round(availability, 6),
+        "nines": round(nines, 2),
+        "failures": failures,
+        "lower_bound": failures == 0,
+        "top_contributors": [
+            {
+                "node": g.ids[v],
+                "availability": round(avail[v], 6),
+                "unavailability_share": round(fixed / failures, 3),
+            }
+            for fixed, v in contributors[:AVAILABILITY_TOP_CONTRIBUTORS]
+        ],
+    }
@@ -0,0 +1,227 @@
+# -----------------------------
+# batch_grader.py
+# 목적:
+# 1) status='submitted'인 submission 전체(또는 id 범위)를 한 번의 실행으로 채점
+# 2) 파싱 → 역할 분류 → core 추출 → SPOF → 부하(traffic_json) → 병목 → 감점 계산을 프로세스 풀에서 병렬 실행
+#    (역할 어휘는 기본 + 시나리오 checklist_template_json.node_roles)
+# 3) 같은 사용자·시나리오의 수정 제출은 직전 분석을 기준으로 증분 재분석 (서명이 같으면 재사용, 작은 변경은 바뀐 block만)
+# 4) chunk 단위 트랜잭션으로 system_results 반영 + status 전이
+#    (submitted → grading → graded / failed, SKIP LOCKED + lease라 여러 프로세스/머신에서 동시에 돌려도 됨)
+# 전제:
+# - 각 submission의 Stage 1 결과(03_demo_submission_result.sql)가 system_results에 있어야 함
+#   (--stage1을 주면 Stage 1도 Python에서 같이 채점해서 한 번에 기록하므로 필요 없음)
+# 사용 예:
+#   python batch_grader.py                       # 대기 중(submitted) 전체
+#   python batch_grader.py --id-from 100 --id-to 250 --workers 8
+#   python batch_grader.py --stage1              # Stage 1 + 그래프 채점을 한 번에
+# -----------------------------
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from graph_analysis import engine_version, generate_followup_questions
+from review_SPOF_bottleneck import get_db_connection
+from analysis_cache import GraphAnalysisCache, analysis_context, cache_key
+from grading_db import iter_submission_chunks, apply_chunk_results, fetch_previous_analyses
+from grading_db import default_worker_id, extend_lease
+from incremental_review import analyze_revision
+from scenario_cache import SCENARIOS
+from stage1_scorer import ScenarioRules, score_many
+from metrics import METRICS, track_peak_rss
+
+
+def analyze_job(job: Tuple[str, Optional[Dict], Optional[Dict], Optional[Dict]]) -> Dict:
+    """
+    워커 프로세스에서 실행되는 단건 분석
+    (job = (mermaid_text, 직전 제출 정보 or None, traffic_json or None, 역할 어휘 or None)).
+    예외는 밖으로 던지지 않고 error로 담아 돌려줌 (chunk 전체가 실패하지 않게).
+    """
+    mermaid_text, previous, traffic, vocab = job
+    try:
+        return analyze_revision(mermaid_text, previous, traffic, vocab)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def prepare_chunk(conn, cache: GraphAnalysisCache, chunk: List[Dict]):
+    """
+    분석 전 단계 (DB 조회만).
+    - 캐시 키(정규화 텍스트 + 시나리오 traffic/역할 어휘 해시)로 묶어서 같은 다이어그램은 1번만 분석
+    - 캐시 적중분은 빼고, 나머지는 직전 제출 정보와 함께 분석 job으로 만듦
+    반환: (keys, cached, todo)
+      todo = {cache_key: (mermaid_text, previous, traffic, vocab)}
+    """
+    traffic, vocab = load_scenario_inputs(conn, chunk)
+    keys = {
+        s["id"]: cache_key(
+            s["mermaid_text"], analysis_context(traffic.get(s["scenario_id"]), vocab.get(s["scenario_id"]))
+        )
+        for s in chunk
+    }
+    cached = cache.get_many(conn, keys.values())
+
+    misses = [s for s in chunk if keys[s["id"]] not in cached]
+    previous = fetch_previous_analyses(conn, misses) if misses else {}
+
+    todo: Dict[str, Tuple[str, Optional[Dict], Optional[Dict], Optional[Dict]]] = {}
+    for s in misses:
+        k = keys[s["id"]]
+        if k not in todo:
+            sid = s["scenario_id"]
+            todo[k] = (s["mermaid_text"], previous.get(s["id"]), traffic.get(sid), vocab.get(sid))
+    return keys, cached, todo
+
+
+def load_scenario_inputs(conn, chunk: List[Dict]) -> Tuple[Dict[str, Optional[Dict]], Dict[str, Optional[Dict]]]:
+    """
+    chunk에 등장하는 시나리오의 분석 입력 (scenario_cache: version이 바뀐 시나리오만 다시 읽음).
+    반환: ({scenario_id: traffic_json or None}, {scenario_id: checklist_template_json.node_roles or None})
+    """
+    scenarios = SCENARIOS.get_many(conn, {s["scenario_id"] for s in chunk})
+    traffic = {sid: sc.traffic for sid, sc in scenarios.items()}
+    vocab = {sid: sc.vocab for sid, sc in scenarios.items()}
+    return traffic, vocab
+
+
+def load_stage1_rules(conn, chunk: List[Dict]) -> Dict[str, ScenarioRules]:
+    """chunk에 등장하는 시나리오의 Stage 1 룰 (scenario_cache: (id, version)당 1번 컴파일)."""
+    scenarios = SCENARIOS.get_many(conn, {s["scenario_id"] for s in chunk})
+    return {sid: sc.rules for sid, sc in scenarios.items()}
+
+
+def cache_entries(analyzed: Dict[str, Dict]) -> Dict[str, Dict]:
+    """캐시에 넣을 분석 결과 (실패분 제외, 제출별 정보는 analysis_cache.cache_entry가 뺌)."""
+    return {k: r for k, r in analyzed.items() if not r.get("error")}
+
+
+def collect_results(
+    chunk: List[Dict],
+    keys: Dict[int, str],
+    cached: Dict[str, Dict],
+    analyzed: Dict[str, Dict],
+    stage1_rules: Optional[Dict[str, ScenarioRules]] = None
+) -> List[Dict]:
+    """
+    캐시/분석 결과를 submission별로 펼치고 코치 질문을 붙임 (apply_chunk_results 입력 형태).
+    stage1_rules가 있으면 Stage 1 점수도 여기서 계산해서 "stage1"로 붙임.
+    캐시 적중분도 엣지 목록/대안 다이어그램이 캐시 항목에 들어 있으므로 Mermaid를 다시 읽지 않음.
+    """
+    stage1 = score_many(chunk, stage1_rules) if stage1_rules is not None else {}
+
+    results: List[Dict] = []
+    for s in chunk:
+        k = keys[s["id"]]
+        result = cached.get(k) or analyzed[k]
+        if result.get("error"):
+            results.append({"submission_id": s["id"], "error": result["error"]})
+            continue
+        questions = generate_followup_questions(s, result["graph_analysis"], result["penalty_info"])
+        results.append({
+            "submission_id": s["id"],
+            "questions": questions,
+            "cache_hit": k in cached,
+            "stage1": stage1.get(s["id"]),
+            **result,
+            "perf": {"cache_hit": True} if k in cached else result.get("perf"),
+        })
+    return results
+
+
+def grade_chunk(
+    conn,
+    pool,
+    workers: int,
+    cache: GraphAnalysisCache,
+    chunk: List[Dict],
+    worker_id: str,
+    stage1: bool = False
+) -> List[Dict]:
+    """
+    chunk 1개 채점 (결과 반영은 호출자가 apply_chunk_results로).
+    - 캐시 적중분은 건너뛰고, 나머지만 프로세스 풀로 보냄 (직전 제출이 있으면 증분 재분석)
+    - 분석이 끝나면 lease를 연장한 뒤(여기서 커밋) 새 결과를 캐시에 저장하고 바로 커밋
+      (캐시는 결과 반영과 별도 트랜잭션)
+    - stage1=True면 Stage 1 점수도 같이 계산
+    """
+    keys, cached, todo = prepare_chunk(conn, cache, chunk)
+    rules = load_stage1_rules(conn, chunk) if stage1 else None
+
+    per_worker = max(1, len(todo) // (workers * 4))
+    analyzed = dict(zip(todo, pool.map(analyze_job, todo.values(), chunksize=per_worker)))
+
+    # 분석이 오래 걸린 chunk도 반영 전에 회수되지 않게 lease 연장 (조회 때 쌓인 hit_count 갱신도 같이 커밋)
+    extend_lease(conn, [s["id"] for s in chunk], worker_id)
+    cache.put_many(conn, cache_entries(analyzed))
+    conn.commit()
+    return collect_results(chunk, keys, cached, analyzed, rules)
+
+
+def run_batch(
+    id_from=None,
+    id_to=None,
+    workers: int = 0,
+    chunk_size: int = 200,
+    stage1: bool = False
+) -> Dict[str, int]:
+    """대기 중인 submission을 모두 소진할 때까지 chunk 단위로 채점."""
+    workers = workers or os.cpu_count() or 1
+    totals = {"graded": 0, "failed": 0}
+    started = time.perf_counter()
+
+    cache = GraphAnalysisCache(engine_version())
+    METRICS.serve()
+
+    worker_id = default_worker_id()
+    conn = get_db_connection(pooled=True)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=track_peak_rss) as pool:
+            for chunk in iter_submission_chunks(conn, id_from, id_to, chunk_size, worker_id):
+                results = grade_chunk(conn, pool, workers, cache, chunk, worker_id, stage1)
+                cache.evict_if_due(conn)    # 결과 반영 전에 자기 트랜잭션으로 (잠금 충돌이면 건너뜀)
+
+                try:
+                    counts = apply_chunk_results(conn, results, worker_id)
+                except Exception:
+                    METRICS.inc("grading_errors_total", stage="write")
+                    METRICS.write_textfile()
+                    raise
+                METRICS.record_chunk(results, counts)
+                METRICS.observe_cache(cache.hits, cache.misses)
+                METRICS.write_textfile()
+
+                totals["graded"] += counts["graded"]
+                totals["failed"] += counts["failed"]
+                print(
+                    f"📦 chunk {chunk[0]['id']}~{chunk[-1]['id']}: "
+                    f"graded={counts['graded']} failed={counts['failed']} lost={counts['lost']}"
+                )
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    done = totals["graded"] + totals["failed"]
+    rate = done / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"\n✅ 배치 채점 완료: graded={totals['graded']} failed={totals['failed']} "
+          f"({elapsed:.1f}s, {rate:.0f}건/분, 캐시 적중 {cache.hits}/{cache.hits + cache.misses})")
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="대기 중인 submission 일괄 그래프 채점")
+    parser.add_argument("--id-from", type=int, default=None, help="재채점할 submission id 시작(포함)")
+    parser.add_argument("--id-to", type=int, default=None, help="재채점할 submission id 끝(포함)")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="트랜잭션 1회당 submission 수")
+    parser.add_argument("--stage1", action="store_true", help="Stage 1 키워드 채점도 Python에서 같이 수행")
+    args = parser.parse_args()
+
+    totals = run_batch(args.id_from, args.id_to, args.workers, args.chunk_size, args.stage1)
+    return 0 if totals["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
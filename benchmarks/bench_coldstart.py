@@ -0,0 +1,90 @@
+# -----------------------------
+# benchmarks/bench_coldstart.py
+# 목적: 분석 라이브러리 콜드 스타트 측정 (웹 핸들러/CLI에서 요청마다 부를 수 있는지 확인)
+# - 매 회차 새 파이썬 프로세스에서 `from graph_analysis import analyze` + 첫 analyze() 호출
+# - import 시간 / 첫 호출 시간 / 프로세스 전체 시간(인터프리터 기동 포함)을 따로 기록
+# - 분석 경로에 끌려 들어오면 안 되는 모듈(mysql, dotenv, networkx, numpy)이 로드되면 실패 처리
+# 사용 예:
+#   python benchmarks/bench_coldstart.py
+#   python benchmarks/bench_coldstart.py --runs 20 --nodes 200 --budget-ms 150
+#   python benchmarks/bench_coldstart.py --module review_SPOF_bottleneck   # 비교용 (DB 모듈 포함)
+# -----------------------------
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 순수 분석 경로에서 import되면 안 되는 무거운 의존성
+FORBIDDEN_MODULES = ("mysql", "dotenv", "networkx", "numpy")
+
+# 자식 프로세스에서 실행할 코드 (측정 결과를 JSON 한 줄로 출력)
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from {module} import analyze
+t1 = time.perf_counter()
+sys.path.insert(0, {bench_dir!r})
+from synth import layered
+text = layered({nodes}, 7)
+t2 = time.perf_counter()
+ga = analyze(text)
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "first_call_ms": (t3 - t2) * 1000,
+    "spof": len(ga["spof_candidates"]),
+    "modules": sorted({{m.split(".")[0] for m in sys.modules}}),
+}}))
+"""
+
+
+def run_once(module: str, nodes: int) -> dict:
+    code = _CHILD.format(module=module, bench_dir=os.path.join(ROOT, "benchmarks"), nodes=nodes)
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    r = json.loads(out.strip().splitlines()[-1])
+    r["process_ms"] = (time.perf_counter() - started) * 1000
+    return r
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="분석 라이브러리 콜드 스타트 벤치마크")
+    parser.add_argument("--module", default="graph_analysis", help="analyze를 가져올 모듈")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--nodes", type=int, default=50, help="첫 호출에 쓰는 합성 다이어그램 서비스 수")
+    parser.add_argument("--budget-ms", type=float, default=0, help="import+첫 호출 중앙값이 이 값을 넘으면 실패")
+    args = parser.parse_args()
+
+    runs = [run_once(args.module, args.nodes) for _ in range(args.runs)]
+
+    def med(key: str) -> float:
+        return statistics.median(r[key] for r in runs)
+
+    ready_ms = statistics.median(r["import_ms"] + r["first_call_ms"] for r in runs)
+    print(f"module={args.module} runs={args.runs} nodes={args.nodes}")
+    print(f"import         : {med('import_ms'):7.1f} ms (median)")
+    print(f"first analyze  : {med('first_call_ms'):7.1f} ms (median)")
+    print(f"import + call  : {ready_ms:7.1f} ms (median)")
+    print(f"process total  : {med('process_ms'):7.1f} ms (median, 인터프리터 기동 포함)")
+
+    failed = False
+    loaded = [m for m in FORBIDDEN_MODULES if m in runs[0]["modules"]]
+    if loaded:
+        print(f"⚠️  분석 경로에서 무거운 모듈 로드됨: {', '.join(loaded)}")
+        failed = args.module == "graph_analysis"
+    if args.budget_ms and ready_ms > args.budget_ms:
+        print(f"🐢 예산 초과: {ready_ms:.1f}ms > {args.budget_ms:.1f}ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# -----------------------------
+# benchmarks/bench_parse.py
+# 목적: Mermaid 파서 처리량(MB/s) 측정
+# - 체인 / & fan-out / 엣지 라벨 / subgraph / 화살표 변형이 섞인 합성 다이어그램 생성
+# - iter_mermaid(토크나이저 단독)와 parse_mermaid_edges_and_labels(중복 제거 포함)를 각각 측정
+# - 측정 전에 화살표 문법별 기대 엣지 확인 (PARSER_CHECKS, 틀리면 측정하지 않고 실패)
+# 사용 예:
+#   python benchmarks/bench_parse.py --nodes 20000 --repeat 5
+# -----------------------------
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mermaid_stream import iter_mermaid  # noqa: E402
+from graph_analysis import parse_mermaid_edges_and_labels  # noqa: E402
+
+
+ARROWS = ["-->", "-.->", "==>", "--o", "-->|call|", "-- async -->", "-. retry .->", "== sync ==>"]
+
+# (입력 한 줄, 기대 엣지) — 인라인 텍스트/따옴표 안 구분자/엣지 id/노드 메타데이터가 노드로 잡히면(유령 엣지) 실패
+PARSER_CHECKS = [
+    ("A --> B --> C", [("A", "B"), ("B", "C")]),
+    ("A & B --> C", [("A", "C"), ("B", "C")]),
+    ("A -->|call| B", [("A", "B")]),
+    ("A -- async --> B", [("A", "B")]),
+    ("A -. retry .-> B", [("A", "B")]),
+    ("A == sync ==> B", [("A", "B")]),
+    ("A -. a b .-> B --> C", [("A", "B"), ("B", "C")]),
+    ("A -- text --- B", []),
+    ("A -. text .- B", []),
+    ("A --x B --> C", [("A", "B"), ("B", "C")]),
+    ("A <--> B", [("A", "B"), ("B", "A")]),
+    ("A --- B -.-> C", [("B", "C")]),
+    ("A o--o B", [("A", "B"), ("B", "A")]),
+    ("A x--x B", [("A", "B"), ("B", "A")]),
+    ('A -->|"a|b"| B', [("A", "B")]),
+    ('A["x ] y"] --> B', [("A", "B")]),
+    ("A e1@--> B", [("A", "B")]),
+    ("A@{ shape: rect } --> B", [("A", "B")]),
+    ('A@{ shape: rect, label: "x, } y" } --> B@{ label: C }', [("A", "B")]),
+]
+
+
+def make_mermaid(n_nodes: int, seed: int = 7) -> str:
+    """서비스 n_nodes개짜리 합성 flowchart 텍스트."""
+    rnd = random.Random(seed)
+    lines = ["graph TD", "    U[User] --> GW[API Gateway]"]
+    prev = ["GW"]
+    i = 0
+    while i < n_nodes:
+        lines.append(f"  subgraph Z{i} [Zone {i}]")
+        layer = []
+        for _ in range(min(8, n_nodes - i)):
+            nid = f"S{i}"
+            src = rnd.choice(prev)
+            arrow = rnd.choice(ARROWS)
+            lines.append(f"    {src} {arrow} {nid}[Service {i}] --> D{i}[(DB {i})]")
+            layer.append(nid)
+            i += 1
+        if len(layer) >= 2:
+            lines.append(f"    {layer[0]} & {layer[1]} --> Q{i}>Queue {i}]")
+        lines.append("  end")
+        prev = layer or prev
+    lines.append("    %% entry: U")
+    return "\n".join(lines) + "\n"
+
+
+def check_parser() -> int:
+    """PARSER_CHECKS 중 틀린 개수 (틀린 줄은 출력)."""
+    failed = 0
+    for line, expected in PARSER_CHECKS:
+        got = [(a, b) for kind, a, b in iter_mermaid(line) if kind == "edge"]
+        if got != expected:
+            print(f"❌ parser check: {line!r} → {got} (기대: {expected})")
+            failed += 1
+    return failed
+
+
+def bench(fn, text: str, repeat: int) -> float:
+    """가장 빠른 회차 기준 MB/s."""
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return size_mb / best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mermaid 파서 처리량 벤치마크")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = check_parser()
+    if failed:
+        return 1
+    print(f"parser checks: {len(PARSER_CHECKS)} ok")
+
+    text = make_mermaid(args.nodes)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+    tok = bench(lambda t: sum(1 for _ in iter_mermaid(t)), text, args.repeat)
+    full = bench(parse_mermaid_edges_and_labels, text, args.repeat)
+
+    print(f"input: {args.nodes} services, {size_mb:.2f} MB")
+    print(f"iter_mermaid                   : {tok:7.2f} MB/s")
+    print(f"parse_mermaid_edges_and_labels : {full:7.2f} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+# -----------------------------
+# benchmarks/bench_stages.py
+# 목적: 채점 단계별 스케일링 벤치마크 (회귀/스케일링 절벽 감지용)
+# - 합성 다이어그램(benchmarks/synth.py: chain / fanin / layered / subgraph / cyclic)을
+#   10 ~ 100k 노드로 만들어서 단계별 시간을 따로 측정
+#   parse → graph(CSR 생성) → roles(노드 역할 분류) → core(entry/exit + core) → spof → critical_edge → redundancy → availability → load → latency
+#   → bottleneck → penalty → rewrite → db_write
+# - roles: 모든 노드 라벨을 정규식 1개로 한 번 훑어 역할 비트마스크 생성 (node_roles.py)
+# - availability: 무작위 장애 비트셋 시뮬레이션 (샘플 수는 availability_model.sample_count 기준)
+# - load: BENCH_TRAFFIC(qps_peak)을 entry에 주입한 부하 전파 (cyclic shape에서 SCC 풀이 포함)
+# - latency: Monte Carlo 지연 추정 (샘플 수는 latency_model.sample_count 기준)
+# - rewrite: 대안 다이어그램 재작성 + SPOF 검증 1회 + Mermaid 직렬화 (graph_rewrite.py)
+# - db_write: 기본은 UPDATE 파라미터/JSON 직렬화까지, --db를 주면 실제 executemany 후 rollback
+# - topk_overlap: 중앙성이 sampled로 계산되는 크기에서 exact 대비 병목 상위 k개가 몇 개 겹치는지
+#   (core가 --topk-check-max 노드 이하일 때만, exact 계산 시간은 단계 시간에 넣지 않음)
+#   sampled_mode = exact면 상위 k 안에 pivot 오차 폭 안의 동점이 있어서 pivot을 core 전체까지 늘린 경우
+# - sampled 병목 시간 역전 검사: 중앙성이 sampled인 크기끼리는 더 큰 그래프의 bottleneck 단계가
+#   작은 그래프보다 BOTTLENECK_SHRINK_RATIO배 넘게 빠르면 실패 (작은 그래프에서 exact로 빠지는 절벽 감지, 종료 코드 1)
+# - 결과는 JSON으로 저장 → --compare 이전결과.json 으로 회귀 비교
+# - 한 단계가 --stage-budget 초를 넘으면 그 shape의 더 큰 크기에서는 해당 단계를 건너뜀
+# 사용 예:
+#   python benchmarks/bench_stages.py --out bench.json
+#   python benchmarks/bench_stages.py --shapes layered,chain --sizes 100,1000,10000,100000
+#   python benchmarks/bench_stages.py --out new.json --compare bench.json
+# -----------------------------
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synth import SHAPES  # noqa: E402
+from graph_csr import CSRGraph  # noqa: E402
+from load_model import compute_load, load_summary  # noqa: E402
+from latency_model import estimate_latency  # noqa: E402
+from review_SPOF_bottleneck import build_result_update  # noqa: E402
+from graph_rewrite import alternative_mermaid  # noqa: E402
+from node_roles import NodeRoles  # noqa: E402
+from graph_analysis import (  # noqa: E402
+    calc_penalties,
+    choose_entry_exit,
+    compute_bottlenecks_csr,
+    compute_critical_edges_csr,
+    compute_availability,
+    compute_redundancy_csr,
+    compute_spof_csr,
+    betweenness_pivots,
+    bfs_work,
+    entry_dominators,
+    parse_model_annotations,
+    generate_alternative_architecture,
+    parse_annotations,
+    parse_mermaid_edges_and_labels,
+)
+
+STAGES = [
+    "parse", "graph", "roles", "core", "spof", "critical_edge", "redundancy", "availability", "load", "latency",
+    "bottleneck", "penalty", "rewrite",
+    "db_write",
+]
+
+# load / latency 단계에 주는 시나리오 트래픽
+BENCH_TRAFFIC = {"qps_peak": 200, "event_rate_peak_per_sec": 800, "sla_p95_latency_ms": 1500}
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+# exact vs sampled 병목 순위 비교
+TOPK = 3
+TOPK_CHECK_MAX_NODES = 5000  # core가 이보다 크면 exact 비교 생략 (exact는 O(V·E))
+
+# 회귀 판정 기준
+REGRESSION_RATIO = 1.25     # 이전 대비 25% 이상 느려지면 표시
+CLIFF_EXPONENT = 2.2        # 크기 10배에 시간 10^2.2배 이상이면 스케일링 절벽으로 표시
+# sampled 병목 단계는 크기에 따라 단조 증가해야 함 (pivot 예산 상한에 닿은 크기끼리는 거의 같으므로 측정 잡음만큼 여유)
+BOTTLENECK_SHRINK_RATIO = 1.5
+
+# db_write 단계에서 쓰는 Stage 1 row (점수/flags 형태만 맞춤)
+_STAGE1_ROW = {
+    "score_total": 90,
+    "score_breakdown_json": {"meta": {}, "items": {}},
+    "risk_flags_json": [],
+}
+
+
+def _timed(fn: Callable, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def run_stages(text: str, skip: set, db_conn=None, db_rows: int = 200) -> Dict:
+    """다이어그램 1개를 단계별로 실행하고 각 단계 시간(초)을 기록."""
+    times: Dict[str, Optional[float]] = {}
+
+    def parse():
+        return parse_annotations(text), parse_model_annotations(text), parse_mermaid_edges_and_labels(text)
+
+    ((redundant, entry_hint, exit_hint), model, (edges, labels)), times["parse"] = _timed(parse)
+
+    g, times["graph"] = _timed(CSRGraph.from_edges, edges)
+    roles, times["roles"] = _timed(NodeRoles.from_graph, g, labels)
+
+    def core():
+        entry, exits = choose_entry_exit(g, labels, entry_hint, exit_hint, roles)
+        return entry, exits, g.core_mask(entry, exits)
+
+    (entry, exits, core_mask), times["core"] = _timed(core)
+
+    spofs: List[str] = []
+    critical_edges: List[List[str]] = []
+    redundancy: Optional[Dict] = None
+    availability: Optional[Dict] = None
+    bottlenecks: List[Dict] = []
+    loads: Optional[Dict] = None
+    load: Optional[Dict] = None
+    latency: Optional[Dict] = None
+    idom = None
+    if "spof" in skip:
+        times["spof"] = None
+    else:
+        idom, t_idom = _timed(entry_dominators, g, entry, exits, core_mask)
+        spofs, t_spof = _timed(compute_spof_csr, g, entry, exits, core_mask, redundant, idom)
+        times["spof"] = t_idom + t_spof
+    if "critical_edge" in skip or "spof" in skip:
+        times["critical_edge"] = None
+    else:
+        critical_edges, times["critical_edge"] = _timed(compute_critical_edges_csr, g, entry, exits, core_mask, idom)
+    if "redundancy" in skip:
+        times["redundancy"] = None
+    else:
+        redundancy, times["redundancy"] = _timed(compute_redundancy_csr, g, entry, exits, core_mask, redundant)
+    if "availability" in skip:
+        times["availability"] = None
+    else:
+        availability, times["availability"] = _timed(
+            compute_availability, g, entry, exits, core_mask, roles, redundant, model
+        )
+    if "load" in skip:
+        times["load"] = None
+    else:
+        def load_stage():
+            out = compute_load(g, entry, exits, core_mask, roles, redundant, BENCH_TRAFFIC, model)
+            return out, (load_summary(g, BENCH_TRAFFIC, out) if out is not None else None)
+
+        (loads, load), times["load"] = _timed(load_stage)
+    if "latency" in skip:
+        times["latency"] = None
+    else:
+        latency, times["latency"] = _timed(
+            estimate_latency, g, entry, exits, core_mask, roles, BENCH_TRAFFIC, model
+        )
+    bottleneck_meta: Dict = {}
+    if "bottleneck" in skip:
+        times["bottleneck"] = None
+    else:
+        bottlenecks, times["bottleneck"] = _timed(
+            compute_bottlenecks_csr, g, core_mask, labels, 3, bottleneck_meta, loads, roles
+        )
+
+    def penalty():
+        return (
+            calc_penalties(spofs, bottlenecks, critical_edges, redundancy),
+            generate_alternative_architecture(
+                spofs, bottlenecks, labels, g, critical_edges, redundancy, load, latency, availability, roles
+            ),
+        )
+
+    (penalty_info, alternative), times["penalty"] = _timed(penalty)
+
+    graph_analysis = {
+        "entry": entry,
+        "exits": exits,
+        "nodes_cnt": len(g),
+        "edges_cnt": g.edge_count,
+        "core_nodes_cnt": sum(core_mask),
+        "spof_candidates": spofs,
+        "critical_edges": critical_edges,
+        "redundancy": redundancy,
+        "availability": availability,
+        "load": load,
+        "latency": latency,
+        "bottleneck_candidates": bottlenecks,
+        "redundant_marked": sorted(redundant),
+    }
+
+    (alt_mermaid, graph_analysis["rewrite"]), times["rewrite"] = _timed(
+        alternative_mermaid, edges, labels, graph_analysis, "TD", roles
+    )
+
+    def db_write():
+        row = json.loads(json.dumps(_STAGE1_ROW))
+        params = build_result_update(row, graph_analysis, penalty_info, alternative, [], None, alt_mermaid)
+        if db_conn is not None:
+            _db_write(db_conn, params, db_rows)
+        return params
+
+    _, times["db_write"] = _timed(db_write)
+
+    return {
+        "nodes": len(g),
+        "edges": g.edge_count,
+        "core_nodes": graph_analysis["core_nodes_cnt"],
+        "bytes": len(text.encode("utf-8")),
+        "betweenness": bottleneck_meta.get("betweenness"),
+        "stages": {k: (round(v, 6) if v is not None else None) for k, v in times.items()},
+    }
+
+
+def topk_overlap(text: str, k: int = TOPK, max_nodes: int = TOPK_CHECK_MAX_NODES) -> Optional[Dict]:
+    """
+    병목 상위 k개를 exact / sampled 중앙성으로 각각 구해 비교 (부하 없이 중앙성 + fan-in/out만).
+    sampled로 계산되지 않는 크기(exact 모드)거나 core가 max_nodes보다 크면 None.
+    """
+    edges, labels = parse_mermaid_edges_and_labels(text)
+    g = CSRGraph.from_edges(edges)
+    roles = NodeRoles.from_graph(g, labels)
+    entry, exits = choose_entry_exit(g, labels, None, None, roles)
+    core_mask = g.core_mask(entry, exits)
+    core_nodes = sum(core_mask)
+    _, outdeg = g.masked_degrees(core_mask)
+    pivots = betweenness_pivots(core_nodes, None, bfs_work(core_nodes, sum(outdeg)))
+    if pivots is None or core_nodes > max_nodes:
+        return None
+
+    exact = [b["node"] for b in compute_bottlenecks_csr(g, core_mask, labels, k, None, None, roles, "exact")]
+    meta: Dict = {}
+    sampled = [b["node"] for b in compute_bottlenecks_csr(g, core_mask, labels, k, meta, None, roles, "sampled")]
+    return {
+        "k": k,
+        "pivots": pivots,
+        "sampled_mode": meta["betweenness"]["mode"],     # exact면 상위 k가 오차 폭 안이라 pivot을 core 전체까지 늘림
+        "exact": exact,
+        "sampled": sampled,
+        "overlap": len(set(exact) & set(sampled)),
+        "same_order": exact == sampled,
+    }
+
+
+def _db_write(conn, params, rows: int):
+    """실제 submission 1건에 대해 같은 upsert를 rows번 묶어서 보내고 rollback (데이터는 바뀌지 않음)."""
+    from grading_db import RESULT_BULK_UPDATE_SQL
+
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT submission_id FROM system_results ORDER BY submission_id DESC LIMIT 1")
+        found = cur.fetchone()
+        if not found:
+            raise RuntimeError("system_results가 비어 있습니다. db_03을 먼저 실행하세요.")
+        cur.executemany(RESULT_BULK_UPDATE_SQL, [(found[0], *params)] * rows)
+    finally:
+        conn.rollback()
+        cur.close()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def find_cliffs(results: List[Dict]) -> List[Dict]:
+    """같은 shape·stage에서 크기 대비 시간 증가 지수가 CLIFF_EXPONENT를 넘는 구간."""
+    cliffs = []
+    by_shape: Dict[str, List[Dict]] = {}
+    for r in results:
+        by_shape.setdefault(r["shape"], []).append(r)
+    for shape, rows in by_shape.items():
+        rows.sort(key=lambda r: r["size"])
+        for a, b in zip(rows, rows[1:]):
+            for stage in STAGES:
+                ta, tb = a["stages"].get(stage), b["stages"].get(stage)
+                if not ta or not tb or ta < 1e-3 or b["nodes"] <= a["nodes"]:
+                    continue
+                exponent = math.log(tb / ta) / math.log(b["nodes"] / a["nodes"])
+                if exponent > CLIFF_EXPONENT:
+                    cliffs.append({
+                        "shape": shape, "stage": stage,
+                        "from": a["size"], "to": b["size"], "exponent": round(exponent, 2),
+                    })
+    return cliffs
+
+
+def find_bottleneck_inversions(results: List[Dict]) -> List[Dict]:
+    """같은 shape에서 중앙성이 sampled로 시작한 크기끼리, 큰 쪽 bottleneck 시간이 BOTTLENECK_SHRINK_RATIO배 넘게 짧은 구간."""
+    inversions = []
+    by_shape: Dict[str, List[Dict]] = {}
+    for r in results:
+        bc = r.get("betweenness") or {}
+        if r["stages"].get("bottleneck") and (bc.get("mode") == "sampled" or "refined_from_pivots" in bc):
+            by_shape.setdefault(r["shape"], []).append(r)
+    for shape, rows in by_shape.items():
+        rows.sort(key=lambda r: r["size"])
+        for a, b in zip(rows, rows[1:]):
+            ta, tb = a["stages"]["bottleneck"], b["stages"]["bottleneck"]
+            if b["nodes"] > a["nodes"] and ta > tb * BOTTLENECK_SHRINK_RATIO:
+                inversions.append({
+                    "shape": shape, "from": a["size"], "to": b["size"],
+                    "from_s": round(ta, 4), "to_s": round(tb, 4),
+                })
+    return inversions
+
+
+def compare(prev: Dict, cur: Dict) -> List[str]:
+    """이전 결과 대비 REGRESSION_RATIO 이상 느려진 (shape, size, stage) 목록."""
+    old = {(r["shape"], r["size"]): r["stages"] for r in prev.get("results", [])}
+    lines = []
+    for r in cur["results"]:
+        base = old.get((r["shape"], r["size"]))
+        if not base:
+            continue
+        for stage in STAGES:
+            t_old, t_new = base.get(stage), r["stages"].get(stage)
+            if not t_old or not t_new or t_old < 1e-3:
+                continue
+            ratio = t_new / t_old
+            if ratio >= REGRESSION_RATIO:
+                lines.append(f"{r['shape']:<9} {r['size']:>7} {stage:<10} {t_old:9.4f}s → {t_new:9.4f}s (x{ratio:.2f})")
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="채점 단계별 스케일링 벤치마크")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="쉼표 구분 (" + ", ".join(SHAPES) + ")")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="쉼표 구분 서비스 노드 수")
+    parser.add_argument("--repeat", type=int, default=3, help="크기별 반복 횟수 (단계별 최솟값 기록)")
+    parser.add_argument("--stage-budget", type=float, default=30.0, help="이 시간(초)을 넘긴 단계는 더 큰 크기에서 생략")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", action="store_true", help="db_write 단계에서 실제 DB에 쓰고 rollback")
+    parser.add_argument("--db-rows", type=int, default=200, help="--db일 때 executemany 1회당 row 수")
+    parser.add_argument("--out", default=None, help="결과 JSON 경로 (기본: 표준출력)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--topk-check-max", type=int, default=TOPK_CHECK_MAX_NODES,
+                        help="exact vs sampled 병목 상위 k 비교를 할 최대 core 노드 수 (0이면 비교 안 함)")
+    args = parser.parse_args()
+
+    shapes = [s.strip() for s in args.shapes.split(",") if s.strip()]
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    unknown = [s for s in shapes if s not in SHAPES]
+    if unknown:
+        parser.error(f"알 수 없는 shape: {', '.join(unknown)}")
+
+    conn = None
+    if args.db:
+        from review_SPOF_bottleneck import get_db_connection
+        conn = get_db_connection()
+
+    results: List[Dict] = []
+    try:
+        for shape in shapes:
+            skip: set = set()
+            for size in sizes:
+                text = SHAPES[shape](size, args.seed)
+                best: Optional[Dict] = None
+                for _ in range(args.repeat):
+                    r = run_stages(text, skip, conn, args.db_rows)
+                    if best is None:
+                        best = r
+                    else:
+                        for k, v in r["stages"].items():
+                            if v is not None and (best["stages"][k] is None or v < best["stages"][k]):
+                                best["stages"][k] = v
+                best.update({"shape": shape, "size": size, "skipped": sorted(skip)})
+                best["topk_overlap"] = topk_overlap(text, TOPK, args.topk_check_max) if args.topk_check_max else None
+                results.append(best)
+
+                total = sum(v for v in best["stages"].values() if v)
+                print(f"{shape:<9} {size:>7} nodes={best['nodes']:>7} edges={best['edges']:>7} "
+                      f"total={total:8.3f}s " +
+                      " ".join(f"{k}={v:.4f}" if v is not None else f"{k}=skip" for k, v in best["stages"].items()),
+                      file=sys.stderr)
+                ov = best["topk_overlap"]
+                if ov is not None and not ov["same_order"]:
+                    print(f"⚠️  병목 상위 {ov['k']} exact≠sampled: {shape} {size} 겹침 {ov['overlap']}/{ov['k']} "
+                          f"(exact {ov['exact']}, sampled {ov['sampled']}, pivots {ov['pivots']})", file=sys.stderr)
+
+                for stage, t in best["stages"].items():
+                    if t is not None and t > args.stage_budget:
+                        skip.add(stage)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    report = {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "db": bool(args.db),
+        },
+        "results": results,
+        "cliffs": find_cliffs(results),
+        "bottleneck_inversions": find_bottleneck_inversions(results),
+    }
+
+    for c in report["cliffs"]:
+        print(f"⚠️  스케일링 절벽: {c['shape']} {c['stage']} {c['from']}→{c['to']} (지수 {c['exponent']})", file=sys.stderr)
+
+    for c in report["bottleneck_inversions"]:
+        print(f"❌ sampled 병목 시간 역전: {c['shape']} {c['from']}({c['from_s']}s) > {c['to']}({c['to_s']}s)",
+              file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report)
+        for line in regressions:
+            print(f"🐢 {line}", file=sys.stderr)
+        if not regressions:
+            print("✅ 이전 결과 대비 회귀 없음", file=sys.stderr)
+
+    out = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(out)
+    else:
+        print(out)
+    return 1 if report["bottleneck_inversions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
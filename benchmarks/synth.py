@@ -0,0 +1,91 @@
+# -----------------------------
+# benchmarks/synth.py
+# 목적: 벤치마크용 합성 Mermaid 다이어그램 생성기
+# - chain    : U → N1 → N2 → ... (전부 SPOF, 가장 긴 경로)
+# - fanin    : 클라이언트 n개가 하나의 DB로 모이는 별 모양 (fan-in 병목)
+# - layered  : Gateway → 서비스 계층들 → DB (실제 제출과 가장 비슷한 모양)
+# - subgraph : subgraph 블록 위주 + & fan-out + 엣지 라벨 (파서 부하)
+# - cyclic   : layered + 재시도(뒤로 가는) 엣지
+# 모든 생성기는 같은 seed면 같은 텍스트를 만들고, entry/exit 힌트 주석을 붙임
+# -----------------------------
+
+import random
+from typing import Callable, Dict, List
+
+
+def chain(n: int, seed: int = 7) -> str:
+    lines = ["graph TD", "    U[User] --> N0[Service 0]"]
+    for i in range(1, n):
+        lines.append(f"    N{i - 1} --> N{i}[Service {i}]")
+    lines.append(f"    N{n - 1} --> DB[(Main DB)]")
+    lines += ["    %% entry: U", "    %% exit: DB"]
+    return "\n".join(lines) + "\n"
+
+
+def fanin(n: int, seed: int = 7) -> str:
+    lines = ["graph LR", "    U[User] --> GW[API Gateway]"]
+    for i in range(n):
+        lines.append(f"    GW --> C{i}[Client {i}] --> DB[(Shared DB)]")
+    lines += ["    %% entry: U", "    %% exit: DB"]
+    return "\n".join(lines) + "\n"
+
+
+def layered(n: int, seed: int = 7, width: int = 16, back_edges: float = 0.0) -> str:
+    """서비스 n개를 width개씩 계층으로 쌓고, 각 서비스는 이전 계층 1~2개에서 호출됨."""
+    rnd = random.Random(seed)
+    lines = ["graph TD", "    U[User] --> LB[Load Balancer]", "    LB --> GW1[Gateway 1]", "    LB --> GW2[Gateway 2]"]
+    prev = ["GW1", "GW2"]
+    i = 0
+    while i < n:
+        layer = []
+        for _ in range(min(width, n - i)):
+            nid = f"S{i}"
+            for src in rnd.sample(prev, min(len(prev), rnd.choice((1, 2)))):
+                lines.append(f"    {src} --> {nid}[Service {i}]")
+            if rnd.random() < 0.25:
+                lines.append(f"    {nid} --> D{i}[(DB {i})]")
+            if back_edges and rnd.random() < back_edges:
+                lines.append(f"    {nid} -.->|retry| {rnd.choice(prev)}")
+            layer.append(nid)
+            i += 1
+        prev = layer
+    for nid in prev:
+        lines.append(f"    {nid} --> OUT[Response]")
+    lines += ["    %% entry: U", "    %% exit: OUT", "    %% redundant: LB"]
+    return "\n".join(lines) + "\n"
+
+
+def cyclic(n: int, seed: int = 7) -> str:
+    return layered(n, seed, back_edges=0.3)
+
+
+def subgraph(n: int, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    arrows = ["-->", "-.->", "==>", "-->|call|", "-- async -->"]
+    lines = ["flowchart TD", "    U[User] --> GW[API Gateway]"]
+    prev = ["GW"]
+    i = 0
+    while i < n:
+        lines.append(f"  subgraph Z{i} [Zone {i}]")
+        lines.append("    direction LR")
+        layer: List[str] = []
+        for _ in range(min(8, n - i)):
+            nid = f"S{i}"
+            lines.append(f"    {rnd.choice(prev)} {rnd.choice(arrows)} {nid}[Service {i}] --> D{i}[(DB {i})]")
+            layer.append(nid)
+            i += 1
+        if len(layer) >= 2:
+            lines.append(f"    {layer[0]} & {layer[1]} --> Q{i}>Queue {i}]")
+        lines.append("  end")
+        prev = layer
+    lines.append("    %% entry: U")
+    return "\n".join(lines) + "\n"
+
+
+SHAPES: Dict[str, Callable[..., str]] = {
+    "chain": chain,
+    "fanin": fanin,
+    "layered": layered,
+    "subgraph": subgraph,
+    "cyclic": cyclic,
+}
@@ -73,7 +73,7 @@ INSERT IGNORE INTO system_scenarios (
   '주문/결제 이벤트 처리(피크 트래픽, 정합성, 재처리)',
   'medium',
   JSON_ARRAY('Event-Driven','Payments','Idempotency','DLQ','Outbox'),
-  '1.0.0',
+  '1.1.0',
   JSON_OBJECT(
     'background','프로모션 시간에 주문/결제가 급증합니다. 이벤트 기반으로 주문/결제/정산을 처리합니다.',
     'goal','중복결제/중복처리 방지 + 장애/재시도 시에도 정합성을 지키는 아키텍처 설계',
@@ -111,6 +111,10 @@ INSERT IGNORE INTO system_scenarios (
         'outbox_saga','outbox|cdc|saga|compens|보상',
         'consistency','state|전이|정합|exactly once|at least once'
       )
+    ),
+    'node_roles', JSON_OBJECT(
+      'queue', JSON_ARRAY('outbox','dlq','cdc'),
+      'worker', JSON_ARRAY('saga','정산')
     )
   ),
   JSON_OBJECT(
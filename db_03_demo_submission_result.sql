@@ -4,6 +4,8 @@
 -- 핵심1: tradeoffs 3개 미만이면 총점 상한(cap) 적용
 -- 핵심2: 점수 가중치(max)는 system_scenarios.checklist_template_json($.scoring.weights)에서 읽음
 --       - 없으면 기본값(기존 03과 동일)으로 fallback
+-- 참고: 같은 채점 로직의 Python 버전이 stage1_scorer.py에 있음
+--       (batch_grader.py --stage1: 여러 건을 한 번에, 그래프 감점까지 합쳐 1회 기록)
 -- =========================================================
 
 USE Engineer_GYM;
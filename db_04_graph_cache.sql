@@ -0,0 +1,34 @@
+-- =========================================================
+-- 04_graph_cache.sql
+-- 그래프 분석 결과 캐시 테이블
+--   - key: sha256(정규화한 Mermaid 텍스트 + 해석한 힌트 + context) (analysis_cache.cache_key)
+--       · 정규화: %% 주석 줄 전부 제거, 공백 정리, 빈 줄 제거
+--       · 힌트: entry/exit/redundant, weight/capacity/latency/availability를 파서로 읽은 값 (주석 줄 모양과 무관)
+--       · context: 시나리오 traffic_json / 역할 어휘처럼 텍스트 밖 분석 입력
+--   - engine_version: 키와 함께 조회 조건 → 다르면 조회되지 않음 (엔진/감점 정책 변경 시 자동 무효화)
+--   - last_used_at 기준 LRU 삭제로 행 수 상한 유지 (analysis_cache.py)
+-- =========================================================
+
+USE Engineer_GYM;
+
+CREATE TABLE IF NOT EXISTS system_graph_cache (
+  cache_key CHAR(64) PRIMARY KEY,          -- sha256(normalized text + parsed hints + context)
+  engine_version VARCHAR(128) NOT NULL,    -- 엔진 버전 + 감점/중앙성 설정 태그
+
+  graph_analysis_json JSON NOT NULL,
+  penalty_json JSON NOT NULL,
+  alternative_text LONGTEXT NULL,
+
+  size_bytes INT NOT NULL DEFAULT 0,
+  hit_count INT NOT NULL DEFAULT 0,
+  last_used_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE INDEX idx_system_graph_cache_last_used ON system_graph_cache(last_used_at);
+CREATE INDEX idx_system_graph_cache_engine_version ON system_graph_cache(engine_version);
+
+-- 확인
+SELECT engine_version, COUNT(*) AS entries, SUM(hit_count) AS hits
+FROM system_graph_cache
+GROUP BY engine_version;
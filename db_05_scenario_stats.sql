@@ -0,0 +1,44 @@
+-- =========================================================
+-- 05_scenario_stats.sql
+-- 시나리오별 채점 통계 요약 테이블 (대시보드용)
+--   - 채점기가 system_results 반영과 같은 트랜잭션에서 증분 갱신 (score_stats.py)
+--     (재채점이면 직전 결과의 기여분을 빼고 새 결과를 더함)
+--   - 대시보드는 system_results를 훑지 않고 이 테이블만 읽음 → O(시나리오 × 항목)
+--   - 어긋났다고 의심되면: python score_stats.py --rebuild
+--
+-- kind / item
+--   score         ''                  cnt = 채점 수, value_sum = 점수 합, value_sq_sum = 점수 제곱 합
+--   score_bucket  '0','10',...,'90'   점수 히스토그램 (10점 단위, 100점은 '90'에 포함)
+--   penalty       ''                  value_sum = 그래프 감점 합
+--   flag          risk flag           flag가 붙은 채점 수 (SPOF 비율 = flag SPOF_DETECTED / score)
+--   spof          노드 id             SPOF로 잡힌 횟수
+--   bottleneck    노드 id             병목 후보로 잡힌 횟수
+-- =========================================================
+
+USE Engineer_GYM;
+
+CREATE TABLE IF NOT EXISTS system_scenario_stats (
+  scenario_id VARCHAR(64) NOT NULL,
+  kind VARCHAR(16) NOT NULL,
+  item VARCHAR(128) NOT NULL DEFAULT '',
+
+  cnt BIGINT NOT NULL DEFAULT 0,
+  value_sum DOUBLE NOT NULL DEFAULT 0,
+  value_sq_sum DOUBLE NOT NULL DEFAULT 0,
+
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  PRIMARY KEY (scenario_id, kind, item)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 확인: 시나리오별 채점 수 / 평균 / 표준편차 / SPOF 비율
+SELECT
+  sc.scenario_id,
+  sc.cnt AS graded,
+  ROUND(sc.value_sum / sc.cnt, 1) AS score_mean,
+  ROUND(SQRT(GREATEST(0, sc.value_sq_sum / sc.cnt - POW(sc.value_sum / sc.cnt, 2))), 1) AS score_stddev,
+  ROUND(IFNULL(f.cnt, 0) / sc.cnt, 3) AS spof_rate
+FROM system_scenario_stats sc
+LEFT JOIN system_scenario_stats f
+  ON f.scenario_id = sc.scenario_id AND f.kind = 'flag' AND f.item = 'SPOF_DETECTED'
+WHERE sc.kind = 'score' AND sc.cnt > 0;
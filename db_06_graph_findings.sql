@@ -0,0 +1,33 @@
+-- =========================================================
+-- 06_graph_findings.sql
+-- 그래프 채점 원재료 저장 테이블 (감점 정책 변경 시 일괄 재채점용)
+--   - 채점기가 system_results 반영과 같은 트랜잭션에서 upsert (graph_findings.py)
+--   - base_score: 그래프 감점 전 점수 (Stage 1 + Cap) → 재채점은 항상 여기서 다시 뺌 (이중 감점 없음)
+--   - graph_json: 파싱한 엣지 목록 {"nodes": [id, ...], "edges": [[i, j], ...]}
+--   - findings_json: {"spof", "bottleneck", "critical_edges", "redundancy", "overloaded", "exceeds_sla", "below_target"}
+--   - 재채점: python graph_findings.py --rescore (Mermaid 재파싱/재분석 없음)
+-- =========================================================
+
+USE Engineer_GYM;
+
+CREATE TABLE IF NOT EXISTS system_graph_findings (
+  submission_id BIGINT PRIMARY KEY,
+  base_score INT NOT NULL,
+  engine_version VARCHAR(128) NOT NULL,     -- 탐지 결과를 만든 엔진 버전
+
+  graph_json JSON NOT NULL,
+  findings_json JSON NOT NULL,
+
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT fk_system_graph_findings_submission
+    FOREIGN KEY (submission_id) REFERENCES system_submissions(id)
+    ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE INDEX idx_system_graph_findings_engine_version ON system_graph_findings(engine_version);
+
+-- 확인: 엔진 버전별 저장 건수 / 평균 기준 점수
+SELECT engine_version, COUNT(*) AS submissions, ROUND(AVG(base_score), 1) AS base_score_avg
+FROM system_graph_findings
+GROUP BY engine_version;
@@ -0,0 +1,32 @@
+-- =========================================================
+-- 07_grading_lease.sql
+-- 여러 채점 프로세스(여러 머신)가 같은 MySQL을 나눠 쓰기 위한 lease 컬럼
+--   - 채점기는 SELECT ... FOR UPDATE SKIP LOCKED로 chunk를 가져가고 (서로 잠긴 row는 건너뜀)
+--     status='grading' + claimed_by(워커 id) + lease_until(만료 시각)을 같은 트랜잭션에서 기록 (grading_db.py)
+--   - lease_until이 지난 grading row는 다른 워커가 다시 가져감 (죽은 워커 회수)
+--     attempts가 MAX_CLAIM_ATTEMPTS에 닿은 row는 재시도하지 않고 failed
+--   - 결과 반영 시 claimed_by가 아직 자기 것인 row만 반영 (lease를 뺏긴 늦은 결과는 버림)
+--   - 시각은 모두 DB의 NOW() 기준 → 워커 머신 사이 시계 차이는 무관
+-- 주의:
+--   - SKIP LOCKED는 MySQL 8.0 이상
+--   - ALTER TABLE이라 두 번 실행하면 Duplicate column 오류 (한 번만 실행)
+-- =========================================================
+
+USE Engineer_GYM;
+
+ALTER TABLE system_submissions
+  ADD COLUMN claimed_by VARCHAR(64) NULL,          -- 채점 중인 워커 (host:pid)
+  ADD COLUMN lease_until TIMESTAMP NULL,           -- 이 시각이 지나면 다른 워커가 회수
+  ADD COLUMN attempts INT NOT NULL DEFAULT 0;      -- 가져간 횟수 (워커를 계속 죽이는 제출 차단)
+
+-- 만료 lease 회수 조회: WHERE status='grading' AND lease_until < NOW()
+CREATE INDEX idx_system_submissions_status_lease ON system_submissions(status, lease_until);
+
+-- 확인: 워커별 채점 중 건수 / 만료된 lease 수
+SELECT
+  claimed_by,
+  COUNT(*) AS grading,
+  SUM(lease_until IS NULL OR lease_until < NOW()) AS expired
+FROM system_submissions
+WHERE status = 'grading'
+GROUP BY claimed_by;
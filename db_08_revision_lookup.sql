@@ -0,0 +1,23 @@
+-- =========================================================
+-- 08_revision_lookup.sql
+-- 수정 제출 증분 재분석용 "직전 graded 제출" 조회 인덱스
+--   - 채점기는 chunk의 submission마다 같은 (user_id, scenario_id)에서 자기 id보다 작은 최근 graded 제출 1건만 찾음
+--     (grading_db.fetch_previous_analyses: 상관 서브쿼리 MAX(id) ... AND id < 현재 id → 인덱스 끝에서 1번 seek)
+--   - 이 인덱스가 없으면 사용자별 전체 제출을 훑음
+-- 주의:
+--   - 두 번 실행하면 Duplicate key name 오류 (한 번만 실행)
+-- =========================================================
+
+USE Engineer_GYM;
+
+CREATE INDEX idx_system_submissions_user_scenario
+  ON system_submissions(user_id, scenario_id, status, id);
+
+-- 확인: 인덱스 사용 여부 (key = idx_system_submissions_user_scenario)
+EXPLAIN
+SELECT c.id,
+       (SELECT MAX(p.id) FROM system_submissions p
+        WHERE p.user_id = c.user_id AND p.scenario_id = c.scenario_id
+          AND p.status = 'graded' AND p.id < c.id) AS previous_id
+FROM system_submissions c
+WHERE c.id IN (1, 2, 3);
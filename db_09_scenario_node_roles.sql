@@ -0,0 +1,28 @@
+-- =========================================================
+-- 09_scenario_node_roles.sql
+-- 이미 seed된 시나리오에 역할 어휘(checklist_template_json.node_roles) 반영
+--   - db_02는 INSERT IGNORE라서 기존 DB에는 다시 실행해도 바뀌지 않음 → 여기서 JSON_SET으로 추가
+--   - version도 같이 올림: 채점기의 시나리오 캐시(scenario_cache)는 (id, version)이 같으면 다시 읽지 않음
+-- 참고:
+--   - 여러 번 실행해도 결과는 같음 (같은 값으로 덮어씀)
+--   - 새로 설치하는 DB는 db_02에 이미 들어 있으므로 실행하지 않아도 됨
+-- =========================================================
+
+USE Engineer_GYM;
+
+UPDATE system_scenarios
+SET
+  checklist_template_json = JSON_SET(
+    checklist_template_json,
+    '$.node_roles', JSON_OBJECT(
+      'queue', JSON_ARRAY('outbox','dlq','cdc'),
+      'worker', JSON_ARRAY('saga','정산')
+    )
+  ),
+  version = '1.1.0'
+WHERE id = 'SYS-ORDER-EVENT-001';
+
+-- 확인
+SELECT id, version, JSON_EXTRACT(checklist_template_json, '$.node_roles') AS node_roles
+FROM system_scenarios
+WHERE id = 'SYS-ORDER-EVENT-001';
@@ -0,0 +1,25 @@
+-- =========================================================
+-- 10_graph_cache_results.sql
+-- 분석 캐시(system_graph_cache)에 파싱 엣지와 대안 다이어그램 저장
+--   - graph_json: {"nodes": [id, ...], "edges": [[i, j], ...]} (graph_findings.compact_graph와 같은 형태)
+--   - alternative_mermaid_text: graph_rewrite로 고쳐 그린 대안 Mermaid (고칠 것이 없으면 NULL)
+--   - 캐시 적중 시 Mermaid 재파싱 / 역할 분류 / 재작성 없이 system_results + findings까지 반영 (analysis_cache.py)
+--   - graph_json이 NULL인 기존 행은 적중으로 치지 않음 (다시 분석해서 덮어씀)
+-- 주의:
+--   - ALTER TABLE이라 두 번 실행하면 Duplicate column 오류 (한 번만 실행)
+--   - 채점기는 이 컬럼이 없으면 실행하라는 오류를 내고 멈춤 (db_04만 있는 상태)
+-- =========================================================
+
+USE Engineer_GYM;
+
+ALTER TABLE system_graph_cache
+  ADD COLUMN alternative_mermaid_text LONGTEXT NULL AFTER alternative_text,
+  ADD COLUMN graph_json JSON NULL AFTER alternative_mermaid_text;
+
+-- 확인: 엣지까지 저장된 캐시 행 비율
+SELECT
+  engine_version,
+  COUNT(*) AS entries,
+  SUM(graph_json IS NOT NULL) AS with_edges
+FROM system_graph_cache
+GROUP BY engine_version;
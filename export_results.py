@@ -0,0 +1,288 @@
+# -----------------------------
+# export_results.py
+# 목적: 채점 결과(graded)를 오프라인 분석용으로 스트리밍 export (JSONL / CSV, .gz면 압축)
+# 1) 컬럼 projection: 필요한 값만 SELECT (JSON 안의 값은 서버에서 JSON_EXTRACT)
+#    → mermaid_text / alternative_mermaid_text / coach_summary / score_breakdown_json 전체는 전송되지 않음
+# 2) 서버 측(unbuffered) 커서 + fetchmany로 읽는 즉시 한 줄씩 기록 → row 수와 무관하게 메모리 일정
+# 3) 증분 export: submission id 워터마크를 상태 파일에 저장, 다음 실행은 그 이후 row만 읽음
+#    (--since로 created_at 하한도 줄 수 있음, 예: 첫 export를 최근 30일로 제한)
+#    - 채점기(배치/서비스 여러 개)는 id 순서대로 끝내지 않음
+#      → 아직 submitted / grading인 가장 작은 id 앞까지만 export (워터마크가 그 id를 넘지 않음)
+#      → 그 row가 graded가 되면 다음 실행에서 그 row와 뒤의 row가 같이 나감 (빠지는 row 없음, 중복 없음)
+#    - failed는 종료 상태라 기다리지 않음 (claim_submissions는 failed를 다시 가져가지 않음)
+#      → 파싱 불가 다이어그램 하나 때문에 그 뒤 export가 영원히 멈추지 않음
+# 전제:
+# - 워터마크보다 작은 id가 나중에 재채점(--rescore, failed row의 --id-from/--id-to 수동 재채점 등)되면
+#   다시 export되지 않음 (전체 다시 받기: --full)
+# 사용 예:
+#   python export_results.py --out results.jsonl.gz                      # 전체 (상태 파일 없으면)
+#   python export_results.py --out daily.jsonl --state export_state.json # 지난 실행 이후 새 row만
+#   python export_results.py --out results.csv --format csv --since 2026-01-01
+# -----------------------------
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from review_SPOF_bottleneck import get_db_connection
+from grading_db import STATUS_GRADED, STATUS_GRADING, STATUS_SUBMITTED
+
+
+EXPORT_FETCH_SIZE = 1000          # fetchmany 1회 row 수
+EXPORT_NET_WRITE_TIMEOUT = 600    # 느린 디스크에 쓰는 동안 서버가 연결을 끊지 않게 (초)
+DEFAULT_STATE_FILE = "export_state.json"
+
+# 채점기가 알아서 graded로 끝낼 상태 (이 중 가장 작은 id 앞에서 export를 멈춤)
+# failed는 수동 재채점 전까지 그대로라 포함하지 않음
+PENDING_STATUSES = (STATUS_SUBMITTED, STATUS_GRADING)
+
+# Stage 1 항목 (stage1_scorer / db_03 breakdown.items 키)
+STAGE1_ITEMS = ("tradeoffs", "acl", "audit_log", "observability", "failure_mode")
+
+
+def _json(path: str, source: str = "r.score_breakdown_json") -> Tuple[str, bool]:
+    return f"JSON_EXTRACT({source}, '{path}')", True
+
+
+# (출력 컬럼명, SELECT 식, JSON 값 여부) — 순서 = JSONL 키 순서 = CSV 헤더
+_GA = "$.items.graph_analysis"
+EXPORT_COLUMNS: List[Tuple[str, str, bool]] = [
+    ("submission_id", "s.id", False),
+    ("scenario_id", "s.scenario_id", False),
+    ("user_id", "s.user_id", False),
+    ("created_at", "s.created_at", False),
+    ("score_total", "r.score_total", False),
+    ("raw_total", *_json("$.meta.raw_total")),
+    ("cap_by_tradeoffs", *_json("$.meta.cap_by_tradeoffs")),
+    *[(f"{item}_score", *_json(f"$.items.{item}.score")) for item in STAGE1_ITEMS],
+    ("graph_penalty", *_json("$.meta.graph_penalty.total_penalty")),
+    ("nodes_cnt", *_json(f"{_GA}.nodes_cnt")),
+    ("edges_cnt", *_json(f"{_GA}.edges_cnt")),
+    ("core_nodes_cnt", *_json(f"{_GA}.core_nodes_cnt")),
+    ("spof_candidates", *_json(f"{_GA}.spof_candidates")),
+    ("critical_edge_cnt", f"JSON_LENGTH(r.score_breakdown_json, '{_GA}.critical_edges')", False),
+    ("bottleneck_cnt", f"JSON_LENGTH(r.score_breakdown_json, '{_GA}.bottleneck_candidates')", False),
+    ("disjoint_paths", *_json(f"{_GA}.redundancy.disjoint_paths")),
+    ("availability_nines", *_json(f"{_GA}.availability.nines")),
+    ("max_utilization", *_json(f"{_GA}.load.max_utilization")),
+    ("p95_ms", *_json(f"{_GA}.latency.p95_ms")),
+    ("analysis_ms", *_json("$.meta.perf.total_ms")),
+    ("risk_flags", "r.risk_flags_json", True),
+]
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+
+def fetch_pending_floor(conn, after_id: int, since: Optional[str] = None) -> Optional[int]:
+    """워터마크 이후 아직 끝나지 않은(submitted / grading) 가장 작은 id (없으면 None)."""
+    sql = (
+        "SELECT MIN(id) FROM system_submissions "
+        f"WHERE status IN ({','.join(['%s'] * len(PENDING_STATUSES))}) AND id > %s"
+    )
+    params: List = [*PENDING_STATUSES, after_id]
+    if since:
+        sql += " AND created_at >= %s"
+        params.append(since)
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, tuple(params))
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        cur.close()
+
+
+def build_export_query(
+    after_id: int,
+    since: Optional[str] = None,
+    before_id: Optional[int] = None
+) -> Tuple[str, tuple]:
+    """
+    워터마크(after_id) 이후 graded submission + 결과의 projection 쿼리 (PK 순서 = 워터마크 순서).
+    before_id: 이 id부터는 읽지 않음 (fetch_pending_floor, None이면 끝까지).
+    """
+    where = ["s.status = %s", "s.id > %s"]
+    params: List = [STATUS_GRADED, after_id]
+    if before_id is not None:
+        where.append("s.id < %s")
+        params.append(before_id)
+    if since:
+        where.append("s.created_at >= %s")
+        params.append(since)
+    sql = (
+        f"SELECT {', '.join(expr for _, expr, _ in EXPORT_COLUMNS)} "
+        "FROM system_submissions s JOIN system_results r ON r.submission_id = s.id "
+        f"WHERE {' AND '.join(where)} ORDER BY s.id"
+    )
+    return sql, tuple(params)
+
+
+def _value(raw, is_json: bool):
+    """DB 값 → 출력 값 (JSON_EXTRACT 결과는 JSON 텍스트로 오므로 파싱, 시각은 ISO 문자열)."""
+    if raw is None:
+        return None
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    if is_json and isinstance(raw, str):
+        return json.loads(raw)
+    if hasattr(raw, "isoformat"):
+        return raw.isoformat(sep=" ")
+    return raw
+
+
+def iter_export_rows(
+    conn,
+    after_id: int = 0,
+    since: Optional[str] = None,
+    before_id: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    서버 측 커서로 한 row씩 반환 (전체 결과를 클라이언트 메모리에 올리지 않음).
+    unbuffered 커서라 다 읽기 전에는 같은 연결로 다른 쿼리를 보내면 안 됨.
+    """
+    sql, params = build_export_query(after_id, since, before_id)
+    kinds = [is_json for _, _, is_json in EXPORT_COLUMNS]
+
+    cur = conn.cursor(buffered=False)
+    try:
+        cur.execute(f"SET SESSION net_write_timeout = {int(EXPORT_NET_WRITE_TIMEOUT)}")
+        cur.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield {name: _value(raw, k) for name, raw, k in zip(COLUMN_NAMES, row, kinds)}
+    finally:
+        cur.close()
+
+
+class _JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, row: Dict):
+        self.f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+        self.f.write("\n")
+
+
+class _CsvWriter:
+    """리스트 값(spof_candidates, risk_flags)은 '|'로 이어 붙임."""
+
+    def __init__(self, f):
+        self.w = csv.writer(f)
+        self.w.writerow(COLUMN_NAMES)
+
+    def write(self, row: Dict):
+        self.w.writerow([
+            "|".join(map(str, v)) if isinstance(v, list) else ("" if v is None else v)
+            for v in row.values()
+        ])
+
+
+WRITERS = {"jsonl": _JsonlWriter, "csv": _CsvWriter}
+
+
+def _open_out(path: str):
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def load_state(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {"last_id": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path: str, state: Dict):
+    """임시 파일에 쓰고 교체 → 중간에 죽어도 이전 워터마크가 남음."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def export_results(
+    conn,
+    out_path: str,
+    fmt: str = "jsonl",
+    after_id: int = 0,
+    since: Optional[str] = None
+) -> Dict:
+    """
+    after_id 이후 graded 결과를 out_path에 기록. 반환: {"rows", "last_id", "last_created_at", "held_at"}
+    아직 끝나지 않은 가장 작은 id(held_at) 앞까지만 기록 → 워터마크가 그 id를 넘지 않음.
+    파일은 임시 경로에 쓰고 끝까지 성공했을 때만 out_path로 교체 (stdout 제외).
+    """
+    tmp = out_path if out_path == "-" else f"{out_path}.part"
+    if out_path != "-" and out_path.endswith(".gz"):
+        tmp = f"{out_path[:-3]}.part.gz"
+    count, last_id, last_created_at = 0, after_id, None
+    held_at = fetch_pending_floor(conn, after_id, since)   # 스트리밍 커서를 열기 전에 조회
+
+    f = _open_out(tmp)
+    try:
+        writer = WRITERS[fmt](f)
+        for row in iter_export_rows(conn, after_id, since, held_at):
+            writer.write(row)
+            count += 1
+            last_id, last_created_at = row["submission_id"], row["created_at"]
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+    if tmp != out_path:
+        os.replace(tmp, out_path)
+    return {"rows": count, "last_id": last_id, "last_created_at": last_created_at, "held_at": held_at}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="채점 결과 스트리밍 export (오프라인 분석용)")
+    parser.add_argument("--out", required=True, help="출력 파일 (.gz면 gzip, -면 stdout)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--state", default=DEFAULT_STATE_FILE, help="워터마크 상태 파일")
+    parser.add_argument("--since", default=None, help="created_at 하한 (예: 2026-01-01)")
+    parser.add_argument("--full", action="store_true", help="워터마크 무시하고 처음부터 (상태 파일은 갱신)")
+    args = parser.parse_args()
+
+    state = {"last_id": 0} if args.full else load_state(args.state)
+    started = time.perf_counter()
+
+    conn = get_db_connection()
+    try:
+        summary = export_results(conn, args.out, args.format, int(state.get("last_id") or 0), args.since)
+    finally:
+        conn.close()
+
+    if summary["rows"]:
+        save_state(args.state, {
+            "last_id": summary["last_id"],
+            "last_created_at": summary["last_created_at"],
+            "rows": summary["rows"],
+            "exported_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ export 완료: {summary['rows']}건 → {args.out} "
+        f"(워터마크 id={summary['last_id']}, {elapsed:.1f}s)",
+        file=sys.stderr
+    )
+    if summary["held_at"] is not None:
+        print(
+            f"⏸️  id={summary['held_at']}가 아직 채점 대기/중이라 그 뒤 graded 결과는 다음 실행으로 보류합니다",
+            file=sys.stderr
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+# -----------------------------
+# grading_db.py
+# 목적: 배치 채점에서 쓰는 DB 접근 함수 모음
+# 1) 채점 대상 submission을 chunk 단위로 가져감 (여러 프로세스/머신이 동시에 돌아도 겹치지 않게)
+#    - SELECT ... FOR UPDATE SKIP LOCKED: 다른 워커가 잠근 row는 기다리지 않고 건너뜀
+#    - 가져간 row에 lease 기록: claimed_by(워커 id) + lease_until(DB NOW() + LEASE_SECONDS)
+#    - lease가 지난 grading row는 먼저 회수 (워커가 죽은 경우), MAX_CLAIM_ATTEMPTS번째면 failed
+#    - 큐에서 기다리는 동안 만료되지 않도록 단계가 넘어갈 때 extend_lease로 연장 (attempts는 그대로)
+# 2) status 전이: submitted → grading → graded / failed (db_07_grading_lease.sql 필요)
+# 3) chunk 단위 트랜잭션으로 system_results 반영
+#    - Stage 1을 Python에서 같이 채점한 경우(stage1_scorer.py) 그 결과를 기준 점수로 사용
+#    - 기존 결과 row는 IN (...) 한 번으로 조회(FOR UPDATE)
+#    - 갱신은 executemany 1회 (multi-row INSERT ... ON DUPLICATE KEY UPDATE로 묶여 전송)
+#    - 시나리오별 통계(system_scenario_stats)도 같은 트랜잭션에서 증분 갱신 (score_stats.py)
+#    - 재채점용 탐지 결과(system_graph_findings)도 같은 트랜잭션에서 저장 (graph_findings.py)
+#    - 반영 전에 lease를 아직 자기가 갖고 있는 row만 잠가서 확인 (뺏긴 row의 늦은 결과는 버림)
+# -----------------------------
+
+import json
+import os
+import socket
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import mysql.connector
+
+from review_SPOF_bottleneck import build_result_update, graph_base_score
+from graph_findings import expand_graph, findings_row, save_findings
+from score_stats import apply_stats_delta, fetch_contributions, result_contribution, stats_delta
+
+
+# submission 상태값 (system_submissions.status, VARCHAR(16))
+STATUS_SUBMITTED = "submitted"
+STATUS_GRADING = "grading"
+STATUS_GRADED = "graded"
+STATUS_FAILED = "failed"
+
+# lease (db_07_grading_lease.sql)
+LEASE_SECONDS = 600           # 가져간 chunk를 이 시간 안에 반영하지 못하면 다른 워커가 회수
+MAX_CLAIM_ATTEMPTS = 3        # 이만큼 가져갔는데도 끝나지 않은 submission은 failed
+
+_ER_BAD_FIELD = 1054
+_ER_NO_SUCH_TABLE = 1146
+_previous_findings_join = True    # system_graph_findings(db_06)가 없으면 False로 바꾸고 엣지 없이 조회
+
+SUBMISSION_COLUMNS = (
+    "id, scenario_id, user_id, mermaid_text, components_text, tradeoffs_json, submission_payload_json"
+)
+
+
+# system_results 일괄 갱신
+# - submission_id가 UNIQUE라 이미 있는 row만 넣으면 항상 UPDATE 경로로 감
+# - mysql-connector의 executemany는 INSERT만 multi-row 한 문장으로 묶어 주므로 UPDATE 대신 이 형태를 씀
+RESULT_BULK_UPDATE_SQL = (
+    "INSERT INTO system_results "
+    "(submission_id, score_total, score_breakdown_json, risk_flags_json, "
+    "alternative_mermaid_text, questions_json, coach_summary) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE score_total=VALUES(score_total), "
+    "score_breakdown_json=VALUES(score_breakdown_json), risk_flags_json=VALUES(risk_flags_json), "
+    "alternative_mermaid_text=VALUES(alternative_mermaid_text), questions_json=VALUES(questions_json), "
+    "coach_summary=VALUES(coach_summary)"
+)
+
+
+def _in_clause(ids: List[int]) -> str:
+    return ",".join(["%s"] * len(ids))
+
+
+def fetch_result_rows(conn, submission_ids: List[int], for_update: bool = False) -> Dict[int, Dict]:
+    """
+    system_results row를 submission_id IN (...) 한 번으로 조회. 반환: {submission_id: row}
+    score_breakdown_json은 여기서 한 번만 파싱 (graph_base_score / build_result_update가 같이 씀)
+    """
+    if not submission_ids:
+        return {}
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(
+            "SELECT submission_id, score_total, score_breakdown_json, risk_flags_json "
+            f"FROM system_results WHERE submission_id IN ({_in_clause(submission_ids)})"
+            + (" FOR UPDATE" if for_update else ""),
+            tuple(submission_ids)
+        )
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+    for row in rows:
+        if isinstance(row["score_breakdown_json"], str):
+            row["score_breakdown_json"] = json.loads(row["score_breakdown_json"])
+    return {row["submission_id"]: row for row in rows}
+
+
+def default_worker_id() -> str:
+    """워커 id = host:pid (같은 프로세스 안의 조회/반영 단계는 같은 id)."""
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+def _lease(conn, submission_ids: List[int], worker_id: str, lease_seconds: int):
+    """grading 전이 + lease 기록 (만료 시각은 DB 시계 기준)."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE system_submissions SET status=%s, claimed_by=%s, "
+            "lease_until=NOW() + INTERVAL %s SECOND, attempts=attempts+1 "
+            f"WHERE id IN ({_in_clause(submission_ids)})",
+            (STATUS_GRADING, worker_id, int(lease_seconds), *submission_ids)
+        )
+    finally:
+        cur.close()
+
+
+def extend_lease(conn, submission_ids: List[int], worker_id: str, lease_seconds: int = LEASE_SECONDS) -> int:
+    """
+    아직 이 워커가 가진 grading row의 lease를 지금부터 lease_seconds로 연장하고 커밋 (attempts는 그대로).
+    반환: 연장된 row 수 (이미 다른 워커가 회수한 row는 빠짐)
+    """
+    if not submission_ids:
+        return 0
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE system_submissions SET lease_until=NOW() + INTERVAL %s SECOND "
+            f"WHERE id IN ({_in_clause(submission_ids)}) AND status = %s AND claimed_by = %s",
+            (int(lease_seconds), *submission_ids, STATUS_GRADING, worker_id)
+        )
+        extended = cur.rowcount
+    finally:
+        cur.close()
+    conn.commit()
+    return extended
+
+
+def _claim(conn, select_sqls: List[tuple], chunk_size: int, worker_id: str, lease_seconds: int) -> List[Dict]:
+    """
+    SKIP LOCKED 조회들을 순서대로 돌려 chunk를 채우고 lease를 건 뒤 커밋.
+    attempts가 MAX_CLAIM_ATTEMPTS에 닿은 row는 lease 대신 failed로 전이.
+    조회한 row가 전부 failed로 빠졌으면 다시 조회 → 빈 리스트는 "가져갈 row가 없음"만 뜻함.
+    """
+    while True:
+        rows, exhausted = _claim_once(conn, select_sqls, chunk_size, worker_id, lease_seconds)
+        if rows or not exhausted:
+            return rows
+
+
+def _claim_once(conn, select_sqls: List[tuple], chunk_size: int, worker_id: str, lease_seconds: int) -> Tuple[List[Dict], int]:
+    """_claim 1회분. 반환: (lease를 건 row, failed로 전이한 row 수)"""
+    rows: List[Dict] = []
+    exhausted: List[int] = []
+    try:
+        cur = conn.cursor(dictionary=True)
+        try:
+            for sql, params in select_sqls:
+                if len(rows) >= chunk_size:
+                    break
+                cur.execute(sql, (*params, chunk_size - len(rows)))
+                for row in cur.fetchall():
+                    if row.pop("attempts") >= MAX_CLAIM_ATTEMPTS:
+                        exhausted.append(row["id"])
+                    else:
+                        rows.append(row)
+        finally:
+            cur.close()
+
+        if exhausted:
+            print(f"⚠️  {MAX_CLAIM_ATTEMPTS}번 가져가고도 끝나지 않은 submission을 failed로 전이: {exhausted}")
+            set_status(conn, exhausted, STATUS_FAILED)
+        if rows:
+            rows.sort(key=lambda r: r["id"])
+            _lease(conn, [r["id"] for r in rows], worker_id, lease_seconds)
+        conn.commit()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        if e.errno == _ER_BAD_FIELD:
+            raise RuntimeError("system_submissions에 lease 컬럼이 없습니다. db_07_grading_lease.sql을 먼저 실행하세요.") from e
+        raise
+    return rows, len(exhausted)
+
+
+def claim_submissions(
+    conn,
+    worker_id: str,
+    chunk_size: int = 200,
+    lease_seconds: int = LEASE_SECONDS
+) -> List[Dict]:
+    """
+    대기 중인 submission chunk 1개를 가져감 (없으면 빈 리스트).
+    - lease가 지난 grading row(죽은 워커 몫)를 먼저, 남는 자리는 submitted를 id 순으로
+    - 다른 워커가 잠근 row는 SKIP LOCKED로 건너뛰므로 워커끼리 같은 row를 가져가지 않음
+    """
+    return _claim(conn, [
+        (
+            f"SELECT {SUBMISSION_COLUMNS}, attempts FROM system_submissions "
+            "WHERE status = %s AND (lease_until IS NULL OR lease_until < NOW()) "
+            "ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED",
+            (STATUS_GRADING,)
+        ),
+        (
+            f"SELECT {SUBMISSION_COLUMNS}, attempts FROM system_submissions "
+            "WHERE status = %s ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED",
+            (STATUS_SUBMITTED,)
+        ),
+    ], chunk_size, worker_id, lease_seconds)
+
+
+def iter_submission_chunks(
+    conn,
+    id_from: Optional[int] = None,
+    id_to: Optional[int] = None,
+    chunk_size: int = 200,
+    worker_id: Optional[str] = None,
+    lease_seconds: int = LEASE_SECONDS
+) -> Iterator[List[Dict]]:
+    """
+    채점 대상 submission을 chunk 단위로 가져감 (chunk마다 lease를 걸고 커밋).
+    - id 범위를 주지 않으면 claim_submissions (만료 lease 회수 + submitted)
+    - id 범위를 주면 상태와 무관하게 재채점 (단, lease가 살아 있는 grading은 제외), id keyset
+    """
+    worker_id = worker_id or default_worker_id()
+
+    if id_from is None and id_to is None:
+        while True:
+            rows = claim_submissions(conn, worker_id, chunk_size, lease_seconds)
+            if not rows:
+                return
+            # chunk가 덜 찼어도 끝이 아님 (failed로 빠진 row 자리), 빈 결과가 나올 때까지 계속
+            yield rows
+
+    last_id = (id_from - 1) if id_from is not None else 0
+    while True:
+        where = ["id > %s", "(status <> %s OR lease_until IS NULL OR lease_until < NOW())"]
+        params: List = [last_id, STATUS_GRADING]
+        if id_to is not None:
+            where.append("id <= %s")
+            params.append(id_to)
+
+        # attempts는 재채점 요청이므로 보지 않음 (0으로 넘겨 한도 검사를 통과시킴)
+        rows = _claim(conn, [(
+            f"SELECT {SUBMISSION_COLUMNS}, 0 AS attempts FROM system_submissions "
+            f"WHERE {' AND '.join(where)} ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED",
+            tuple(params)
+        )], chunk_size, worker_id, lease_seconds)
+        if not rows:
+            return
+
+        last_id = rows[-1]["id"]
+        yield rows
+
+        if len(rows) < chunk_size:
+            return
+
+
+def fetch_previous_analyses(conn, chunk: List[Dict]) -> Dict[int, Dict]:
+    """
+    chunk의 각 submission에 대해 같은 user_id + scenario_id의 직전 graded 제출과 그 graph_analysis를 찾음.
+    - submission마다 자기 id보다 작은 graded 제출 중 가장 최근 1건 (db_08_revision_lookup.sql 인덱스로 1번 seek)
+      → 같은 쌍의 수정 제출 여러 건이 한 chunk에 있거나 더 나중 제출이 이미 graded여도 각자 자기 직전 제출을 받음
+    - Mermaid 원문은 읽지 않고 graph_analysis와 단계별 시간(meta.perf.stages_ms)만 JSON_EXTRACT,
+      엣지는 system_graph_findings의 압축 그래프
+    반환: {submission_id: {"submission_id", "graph_analysis", "stages_ms" (없으면 {}), "edges" (findings가 없으면 None)}}
+    """
+    global _previous_findings_join
+    ids = [s["id"] for s in chunk if s.get("user_id")]
+    if not ids:
+        return {}
+
+    latest = (
+        "SELECT c.id AS for_id, ("
+        "SELECT MAX(p.id) FROM system_submissions p "
+        "WHERE p.user_id = c.user_id AND p.scenario_id = c.scenario_id AND p.status = %s AND p.id < c.id"
+        f") AS id FROM system_submissions c WHERE c.id IN ({','.join(['%s'] * len(ids))})"
+    )
+    params = (STATUS_GRADED, *ids)
+    rows = None
+    cur = conn.cursor(dictionary=True)
+    try:
+        if _previous_findings_join:
+            try:
+                cur.execute(
+                    "SELECT latest.for_id, s.id, "
+                    "JSON_EXTRACT(r.score_breakdown_json, '$.items.graph_analysis') AS graph_analysis, "
+                    "JSON_EXTRACT(r.score_breakdown_json, '$.meta.perf.stages_ms') AS stages_ms, "
+                    "f.graph_json "
+                    f"FROM ({latest}) latest JOIN system_submissions s ON s.id = latest.id "
+                    "JOIN system_results r ON r.submission_id = s.id "
+                    "LEFT JOIN system_graph_findings f ON f.submission_id = s.id",
+                    params
+                )
+                rows = cur.fetchall()
+            except mysql.connector.Error as e:
+                if e.errno != _ER_NO_SUCH_TABLE:
+                    raise
+                _previous_findings_join = False     # db_06 전: 엣지 diff 없이 재사용 판단만
+        if rows is None:
+            cur.execute(
+                "SELECT latest.for_id, s.id, "
+                "JSON_EXTRACT(r.score_breakdown_json, '$.items.graph_analysis') AS graph_analysis, "
+                "JSON_EXTRACT(r.score_breakdown_json, '$.meta.perf.stages_ms') AS stages_ms, "
+                "NULL AS graph_json "
+                f"FROM ({latest}) latest JOIN system_submissions s ON s.id = latest.id "
+                "JOIN system_results r ON r.submission_id = s.id",
+                params
+            )
+            rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    previous: Dict[int, Dict] = {}
+    for row in rows:
+        analysis = _json(row["graph_analysis"])
+        if analysis:
+            graph = _json(row["graph_json"])
+            previous[row["for_id"]] = {
+                "submission_id": row["id"],
+                "graph_analysis": analysis,
+                "stages_ms": _json(row["stages_ms"]) or {},
+                "edges": expand_graph(graph) if graph else None,
+            }
+    return previous
+
+
+def _json(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def fetch_scenarios(conn, scenario_ids: List[str]) -> List[Dict]:
+    """채점 룰 계산에 필요한 system_scenarios 컬럼만 조회."""
+    if not scenario_ids:
+        return []
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(
+            "SELECT id, version, checklist_template_json, traffic_json, constraints_json "
+            f"FROM system_scenarios WHERE id IN ({_in_clause(scenario_ids)})",
+            tuple(scenario_ids)
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def fetch_scenario_versions(conn, scenario_ids: List[str]) -> Dict[str, str]:
+    """{scenario_id: version} (scenario_cache가 바뀐 시나리오만 다시 읽을 때 사용, JSON 컬럼은 안 읽음)."""
+    if not scenario_ids:
+        return {}
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT id, version FROM system_scenarios WHERE id IN ({_in_clause(scenario_ids)})",
+            tuple(scenario_ids)
+        )
+        return {sid: version for sid, version in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def set_status(conn, submission_ids: List[int], status: str, owner: Optional[str] = None):
+    """submission 상태 일괄 변경 + lease 해제 (owner를 주면 그 워커가 가진 row만). 커밋은 호출자가 결정."""
+    if not submission_ids:
+        return
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE system_submissions SET status=%s, claimed_by=NULL, lease_until=NULL "
+            f"WHERE id IN ({_in_clause(submission_ids)})" + (" AND claimed_by=%s" if owner else ""),
+            (status, *submission_ids, *([owner] if owner else []))
+        )
+    finally:
+        cur.close()
+
+
+def lock_owned(conn, submission_ids: List[int], worker_id: str) -> set:
+    """
+    아직 이 워커가 lease를 갖고 있는 submission만 잠가서 반환 (결과 반영 전 fencing).
+    lease가 만료됐어도 다른 워커가 회수하지 않았으면 그대로 자기 것.
+    """
+    if not submission_ids:
+        return set()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT id FROM system_submissions "
+            f"WHERE id IN ({_in_clause(submission_ids)}) AND status = %s AND claimed_by = %s FOR UPDATE",
+            (*submission_ids, STATUS_GRADING, worker_id)
+        )
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def apply_chunk_results(conn, results: List[Dict], worker_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    분석 결과 chunk를 하나의 트랜잭션으로 반영.
+    - 먼저 lease를 아직 갖고 있는 row만 잠금 → 그 사이 다른 워커가 회수한 row의 결과는 버림(lost)
+    - 분석 성공 + Stage 1 결과 존재 → 결과 반영 후 graded
+      (res["stage1"]이 있으면 그걸 기준 점수로, 없으면 system_results의 기존 row를 기준으로)
+    - 분석 실패 또는 Stage 1 결과 없음 → failed
+    - 반영한 결과만큼 시나리오별 통계도 같은 트랜잭션에서 갱신
+    - res["edges"]가 있으면 재채점용 탐지 결과(system_graph_findings)도 저장
+    """
+    graded: List[int] = []
+    failed: List[int] = []
+    updates: List[tuple] = []
+    contributions: Dict[int, List] = {}
+    findings: List[tuple] = []
+    owned: set = set()
+    worker_id = worker_id or default_worker_id()
+
+    cur = conn.cursor()
+    try:
+        owned = lock_owned(conn, [r["submission_id"] for r in results], worker_id)
+        lost = [r["submission_id"] for r in results if r["submission_id"] not in owned]
+        if lost:
+            print(f"⚠️  lease를 잃은 submission은 반영하지 않습니다 (다른 워커가 채점 중): {lost}")
+            results = [r for r in results if r["submission_id"] in owned]
+
+        need_rows = [r["submission_id"] for r in results if not r.get("error") and not r.get("stage1")]
+        rows = fetch_result_rows(conn, need_rows, for_update=True)
+        # 통계에서 뺄 직전 결과 기여분 (db_05 미적용이면 None)
+        previous = fetch_contributions(conn, [r["submission_id"] for r in results if not r.get("error")])
+
+        for res in results:
+            sid = res["submission_id"]
+            if res.get("error"):
+                print(f"⚠️  submission_id={sid} 분석 실패: {res['error']}")
+                failed.append(sid)
+                continue
+
+            row = res.get("stage1") or rows.get(sid)
+            if not row:
+                print(f"⚠️  submission_id={sid}: system_results가 없습니다 (Stage 1 미실행).")
+                failed.append(sid)
+                continue
+
+            base_score = graph_base_score(row)
+            params = build_result_update(
+                row,
+                res["graph_analysis"],
+                res["penalty_info"],
+                res["alternative_arch"],
+                res["questions"],
+                res.get("perf"),
+                res.get("alternative_mermaid")
+            )
+            updates.append((sid, *params))
+            graded.append(sid)
+            if res.get("edges") is not None:
+                findings.append(findings_row(sid, base_score, res["graph_analysis"], res["edges"]))
+            if previous is not None:
+                contributions[sid] = result_contribution(params, res["graph_analysis"], res["penalty_info"])
+
+        if updates:
+            cur.executemany(RESULT_BULK_UPDATE_SQL, updates)
+        if previous is not None:
+            apply_stats_delta(conn, stats_delta(previous, contributions))
+        save_findings(conn, findings)
+
+        set_status(conn, graded, STATUS_GRADED)
+        set_status(conn, failed, STATUS_FAILED)
+        conn.commit()
+
+    except Exception:
+        # DB 오류뿐 아니라 결과 조립 중 예외(KeyError/TypeError 등)도 같은 경로 — 잠금을 쥔 채 반쯤 쓴
+        # 트랜잭션을 남기면 다음 커밋에 같이 반영됨
+        conn.rollback()
+        # 자기 chunk를 failed로 돌려 grading에 갇히지 않게 함 (롤백 사이 다른 워커가 회수한 row는 제외)
+        set_status(conn, sorted(owned), STATUS_FAILED, owner=worker_id)
+        conn.commit()
+        raise
+    finally:
+        cur.close()
+
+    return {"graded": len(graded), "failed": len(failed), "lost": len(lost)}
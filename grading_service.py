@@ -0,0 +1,250 @@
+# -----------------------------
+# grading_service.py
+# 목적: 상시 실행되는 asyncio 채점 서비스 (수업 종료 직후 제출 폭주 대응)
+# 1) fetcher: status='submitted' chunk를 SKIP LOCKED로 가져와 grading + lease → analyze 큐
+#    (만료된 lease도 회수 → 여러 머신에서 서비스를 같이 띄워도 겹치지 않음, grading_db.claim_submissions)
+# 2) analyzer: 캐시/직전 제출 조회 후, 미적중분을 프로세스 풀에서 분석 → write 큐
+#    chunk를 꺼낼 때와 write 큐에 넣기 전에 lease를 연장 (큐에서 기다리는 동안 만료 → 다른 인스턴스가
+#    회수 → 결과 lost + attempts 증가로 멀쩡한 제출이 failed 되는 것을 막음)
+# 3) writer: 캐시 저장 + system_results 반영 + status 전이 (chunk 단위 트랜잭션)
+#    lease를 뺏긴 row(처리가 너무 늦어 다른 워커가 회수)의 결과는 버림
+#    반영 중 어떤 예외든 나면 롤백 후 아직 가진 row만 failed로 돌림 (반쯤 쓴 트랜잭션을 다음 chunk가 커밋하지 않게)
+# - 세 단계가 동시에 돌아서 DB I/O와 그래프 계산이 겹침
+# - 큐는 크기 제한(backpressure): 분석이 밀리면 fetcher가 더 가져오지 않고 대기
+#   → 폭주 시에도 메모리에 올라가는 submission은 (큐 크기 + 처리 중) × chunk_size 이하
+# - DB 드라이버(mysql-connector)는 동기라서 각 단계가 풀에서 빌린 연결로 스레드에서 호출
+# 사용 예:
+#   python grading_service.py                     # 종료 신호까지 계속 polling
+#   python grading_service.py --once --workers 8  # 대기분만 소진하고 종료
+#   python grading_service.py --stage1            # Stage 1 + 그래프 채점을 한 번에
+#   python grading_service.py --lease-seconds 300 # 머신 여러 대: 죽은 워커 몫을 5분 뒤 회수
+# -----------------------------
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from graph_analysis import engine_version
+from review_SPOF_bottleneck import get_db_connection
+from analysis_cache import GraphAnalysisCache
+from grading_db import (
+    LEASE_SECONDS, STATUS_FAILED, apply_chunk_results, claim_submissions, default_worker_id, extend_lease,
+    set_status
+)
+from batch_grader import analyze_job, prepare_chunk, cache_entries, collect_results, load_stage1_rules
+from metrics import METRICS, track_peak_rss
+
+
+# 서비스 기본값
+SERVICE_CHUNK_SIZE = 50          # 폭주 시 첫 결과가 빨리 나오도록 배치 모드보다 작게
+SERVICE_QUEUE_SIZE = 4           # 단계 사이 대기 chunk 수 상한
+SERVICE_POLL_INTERVAL = 2.0      # 대기분이 없을 때 다음 조회까지 초
+
+# 큐 종료 표시
+_DONE = None
+
+
+class GradingService:
+    """fetch → analyze → write 3단계 파이프라인."""
+
+    def __init__(
+        self,
+        workers: int = 0,
+        chunk_size: int = SERVICE_CHUNK_SIZE,
+        queue_size: int = SERVICE_QUEUE_SIZE,
+        poll_interval: float = SERVICE_POLL_INTERVAL,
+        once: bool = False,
+        stage1: bool = False,
+        lease_seconds: int = LEASE_SECONDS
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.once = once
+        self.stage1 = stage1
+        self.lease_seconds = lease_seconds
+        self.worker_id = default_worker_id()
+
+        self.analyze_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.write_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.stop = asyncio.Event()
+
+        self.cache = GraphAnalysisCache(engine_version())
+        self._cache_lock = threading.Lock()   # analyzer/writer 스레드가 같은 LRU를 만짐
+
+        self.totals = {"graded": 0, "failed": 0}
+
+    # ---------- 1) fetch ----------
+    def _claim_chunk(self, conn) -> Optional[List[Dict]]:
+        """대기 chunk 1개를 lease를 걸고 가져옴 (없으면 None)."""
+        return claim_submissions(conn, self.worker_id, self.chunk_size, self.lease_seconds) or None
+
+    async def fetcher(self):
+        conn = get_db_connection(pooled=True)
+        try:
+            while not self.stop.is_set():
+                chunk = await asyncio.to_thread(self._claim_chunk, conn)
+                if chunk:
+                    await self.analyze_q.put(chunk)   # 큐가 차 있으면 여기서 대기 (backpressure)
+                    METRICS.set("grading_queue_depth", self.analyze_q.qsize(), queue="analyze")
+                    continue
+                if self.once:
+                    break
+                try:
+                    await asyncio.wait_for(self.stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            conn.close()
+            await self.analyze_q.put(_DONE)
+
+    # ---------- 2) analyze ----------
+    def _extend_lease(self, conn, chunk: List[Dict]):
+        extend_lease(conn, [s["id"] for s in chunk], self.worker_id, self.lease_seconds)
+
+    def _prepare(self, conn, chunk: List[Dict]):
+        self._extend_lease(conn, chunk)   # analyze 큐에서 기다린 시간만큼 줄어든 lease 복구
+        with self._cache_lock:
+            keys, cached, todo = prepare_chunk(conn, self.cache, chunk)
+        rules = load_stage1_rules(conn, chunk) if self.stage1 else None
+        conn.commit()   # hit_count 갱신 반영 + 다음 조회에서 최신 스냅샷을 보도록
+        return keys, cached, todo, rules
+
+    async def analyzer(self, pool: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        conn = get_db_connection(pooled=True)
+        try:
+            while True:
+                chunk = await self.analyze_q.get()
+                if chunk is _DONE:
+                    break
+                METRICS.set("grading_queue_depth", self.analyze_q.qsize(), queue="analyze")
+
+                try:
+                    keys, cached, todo, rules = await asyncio.to_thread(self._prepare, conn, chunk)
+                    outputs = await asyncio.gather(*[
+                        loop.run_in_executor(pool, analyze_job, job) for job in todo.values()
+                    ])
+                    analyzed = dict(zip(todo, outputs))
+                    results = collect_results(chunk, keys, cached, analyzed, rules)
+                    item = (chunk, results, cache_entries(analyzed))
+                    await asyncio.to_thread(self._extend_lease, conn, chunk)   # write 큐 대기분
+                except Exception as e:
+                    # 여기서 멈추면 fetcher가 꽉 찬 큐에서 영원히 대기 → chunk를 failed로 넘기고 계속
+                    print(f"❌ chunk {chunk[0]['id']}~{chunk[-1]['id']} 분석 준비 실패: {e}")
+                    METRICS.inc("grading_errors_total", stage="prepare")
+                    error = f"{type(e).__name__}: {e}"
+                    item = (chunk, [{"submission_id": s["id"], "error": error} for s in chunk], {})
+                await self.write_q.put(item)
+                METRICS.set("grading_queue_depth", self.write_q.qsize(), queue="write")
+        finally:
+            conn.close()
+            await self.write_q.put(_DONE)
+
+    # ---------- 3) write ----------
+    def _write(self, conn, results: List[Dict], entries: Dict[str, Dict]) -> Dict[str, int]:
+        with self._cache_lock:
+            self.cache.put_many(conn, entries)
+            conn.commit()                   # 캐시는 결과 반영과 별도 트랜잭션
+            self.cache.evict_if_due(conn)   # 행 수 정리도 따로 커밋 (잠금 충돌이면 건너뜀)
+        return apply_chunk_results(conn, results, self.worker_id)
+
+    def _fail_chunk(self, conn, chunk: List[Dict]):
+        """반영 실패한 chunk: 트랜잭션 롤백 후 이 워커가 아직 가진 row만 failed로 (grading에 갇히지 않게)."""
+        conn.rollback()
+        set_status(conn, [s["id"] for s in chunk], STATUS_FAILED, owner=self.worker_id)
+        conn.commit()
+
+    async def writer(self):
+        conn = get_db_connection(pooled=True)
+        try:
+            while True:
+                item = await self.write_q.get()
+                if item is _DONE:
+                    break
+                chunk, results, entries = item
+                METRICS.set("grading_queue_depth", self.write_q.qsize(), queue="write")
+                try:
+                    counts = await asyncio.to_thread(self._write, conn, results, entries)
+                except Exception as e:
+                    # 캐시 저장이든 결과 반영이든 중간에 실패하면 잠금을 쥔 채 반쯤 쓴 상태
+                    # → 롤백하고 chunk를 failed로 돌린 뒤 서비스는 계속
+                    print(f"❌ chunk {chunk[0]['id']}~{chunk[-1]['id']} 반영 실패: {e}")
+                    try:
+                        await asyncio.to_thread(self._fail_chunk, conn, chunk)
+                    except Exception as rollback_error:
+                        # 연결이 끊긴 경우 등: lease가 만료되면 다른 워커가 회수
+                        print(f"⚠️  chunk {chunk[0]['id']}~{chunk[-1]['id']} failed 처리 실패: {rollback_error}")
+                    self.totals["failed"] += len(chunk)
+                    METRICS.inc("grading_errors_total", stage="write")
+                    METRICS.inc("grading_submissions_total", len(chunk), status="failed")
+                    await asyncio.to_thread(METRICS.write_textfile)
+                    continue
+                METRICS.record_chunk(results, counts)
+                METRICS.observe_cache(self.cache.hits, self.cache.misses)
+                await asyncio.to_thread(METRICS.write_textfile)
+                self.totals["graded"] += counts["graded"]
+                self.totals["failed"] += counts["failed"]
+                print(
+                    f"📦 chunk {chunk[0]['id']}~{chunk[-1]['id']}: "
+                    f"graded={counts['graded']} failed={counts['failed']} lost={counts['lost']} "
+                    f"(대기 analyze={self.analyze_q.qsize()} write={self.write_q.qsize()})"
+                )
+        finally:
+            conn.close()
+
+    # ---------- 실행 ----------
+    async def run(self) -> Dict[str, int]:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass   # Windows: Ctrl+C는 KeyboardInterrupt로 처리됨
+
+        METRICS.serve()
+        started = time.perf_counter()
+        print(f"🚀 채점 서비스 시작: worker={self.worker_id} workers={self.workers} chunk={self.chunk_size} "
+              f"queue={self.analyze_q.maxsize} lease={self.lease_seconds}s")
+
+        # 종료 신호를 받아도 이미 grading으로 가져온 chunk는 끝까지 처리하고 멈춤
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=track_peak_rss) as pool:
+            await asyncio.gather(self.fetcher(), self.analyzer(pool), self.writer())
+
+        elapsed = time.perf_counter() - started
+        print(f"\n✅ 채점 서비스 종료: graded={self.totals['graded']} failed={self.totals['failed']} "
+              f"({elapsed:.1f}s, 캐시 적중 {self.cache.hits}/{self.cache.hits + self.cache.misses})")
+        return self.totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="상시 실행 asyncio 그래프 채점 서비스")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunk-size", type=int, default=SERVICE_CHUNK_SIZE, help="한 번에 가져올 submission 수")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE, help="단계 사이 대기 chunk 수 상한")
+    parser.add_argument("--poll-interval", type=float, default=SERVICE_POLL_INTERVAL, help="대기분 없을 때 조회 간격(초)")
+    parser.add_argument("--once", action="store_true", help="대기 중인 submission만 소진하고 종료")
+    parser.add_argument("--stage1", action="store_true", help="Stage 1 키워드 채점도 Python에서 같이 수행")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS,
+                        help="가져간 chunk를 이 시간 안에 반영 못 하면 다른 워커가 회수(초)")
+    args = parser.parse_args()
+
+    async def _run():
+        service = GradingService(
+            args.workers, args.chunk_size, args.queue_size, args.poll_interval, args.once, args.stage1,
+            args.lease_seconds
+        )
+        return await service.run()
+
+    totals = asyncio.run(_run())
+    return 0 if totals["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
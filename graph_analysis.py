@@ -0,0 +1,1214 @@
+# -----------------------------
+# graph_analysis.py
+# 목적: DB 없이 import해서 쓰는 그래프 분석 라이브러리 (SPOF/병목/감점/대안/질문)
+# - analyze(mermaid_text, hints) -> GraphAnalysis : 웹 핸들러/CLI에서 요청마다 호출하는 진입점
+# - analyze_mermaid(...) : graph_analysis + 감점 + 대안 아키텍처(텍스트 + 재작성 Mermaid) + 단계별 perf (채점 파이프라인용)
+# - DB 쪽(결과 UPDATE, 커넥션 풀, 단건 채점 main)은 review_SPOF_bottleneck.py
+# 콜드 스타트:
+# - 기본 경로는 표준 라이브러리 + mermaid_stream/graph_csr/graph_blocks/node_roles/load_model/graph_rewrite/metrics만 import
+#   (mysql/dotenv/networkx 없음, dominator/betweenness 등 그래프 알고리즘은 graph_csr에 직접 구현)
+# - numpy는 traffic을 넘겨 부하 전파(load_model) / 지연 추정(latency_model)을 할 때만 lazy import
+# - 측정: python benchmarks/bench_coldstart.py
+# 노드 역할:
+# - 그래프당 한 번 node_roles.NodeRoles로 분류해서 entry/exit 선택, 병목 가산점, 용량/지연/가용성 기본값,
+#   대안 제시, 재작성이 같이 씀 (단계마다 라벨 키워드를 다시 훑지 않음)
+# - vocab(시나리오 checklist_template_json.node_roles)을 주면 기본 어휘에 더해서 분류
+# -----------------------------
+
+import hashlib
+import json
+from array import array
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypedDict
+
+from mermaid_stream import iter_mermaid
+from graph_csr import BetweennessSampler, CSRGraph
+from graph_blocks import CoreBlocks, block_betweenness, decompose, scoped_critical_edges, scoped_spof, spof_blocks
+from node_roles import BALANCER, CACHE, DB, LLM, QUEUE, SERVICE, USER, VECTOR, WORKER, NodeRoles, matcher_for
+from load_model import compute_load, load_summary
+from latency_model import estimate_latency
+from availability_model import simulate_availability
+from graph_rewrite import alternative_mermaid, mermaid_direction
+from metrics import StageTimer
+
+
+# 감점 정책
+SPOF_PENALTY_PER = 12
+SPOF_PENALTY_CAP = 36
+BOTTLENECK_PENALTY_PER = 6
+BOTTLENECK_PENALTY_CAP = 18
+
+# 단일 링크(critical edge) 감점: 기본은 0(보고/플래그만), 켜려면 PER를 올릴 것
+# 양 끝 중 하나가 이미 SPOF 후보인 링크는 그 SPOF 감점에 포함된 것으로 보고 세지 않음
+CRITICAL_EDGE_PENALTY_PER = 0
+CRITICAL_EDGE_PENALTY_CAP = 12
+
+# 이중화 정도: entry→exit node-disjoint 경로가 목표보다 적으면 부족한 경로 1개당 감점
+# (최소 vertex cut에 SPOF 후보가 있으면 SPOF 감점에 포함된 것으로 보고 감점하지 않음)
+REDUNDANCY_TARGET_PATHS = 2
+REDUNDANCY_PENALTY_PER = 6
+REDUNDANCY_PATH_LIMIT = 64        # 이 이상이면 끊을 수 없는 구조로 보고 cut 계산 생략
+
+# 가용성 목표 (nines, 3 = 99.9%): 무작위 장애 시뮬레이션 추정치가 이보다 낮으면 플래그/제안 (감점 없음)
+AVAILABILITY_TARGET_NINES = 3.0
+
+
+# core 서명이 직전 분석과 같을 때 건너뛰고 직전 결과를 재사용하는 단계
+REUSED_STAGES = ("blocks", "spof", "critical_edge", "redundancy", "availability", "load", "latency", "bottleneck")
+
+# 수정 제출: 서명이 달라도 직전 엣지 대비 변경 비율이 이 이하면 바뀐 block만 다시 계산 (graph_blocks.py)
+# (SPOF / 단일 링크 / exact 병목 중앙성만, 나머지 단계는 전체 계산) → 넘으면 전체 분석
+REVISION_SCOPE_MAX_DIFF = 0.25
+
+# 병목 가산점을 받는 상태 저장 역할 (node_roles 비트)
+STATEFUL_ROLES = DB | VECTOR | CACHE | QUEUE
+
+
+# 분석 엔진 버전 (분석 로직이 바뀌면 올릴 것 → 분석 캐시 자동 무효화)
+GRAPH_ENGINE_VERSION = "v18"
+
+
+# 병목 중앙성(betweenness) 계산 모드
+# - "exact": 정확 계산 O(V·E)
+# - "sampled": pivot 샘플링 근사 (seed 고정 → 같은 그래프면 같은 점수)
+# - "auto": core 노드 수가 임계값을 넘으면 sampled로 전환
+BETWEENNESS_MODE = "auto"
+BETWEENNESS_EXACT_MAX_NODES = 300
+BETWEENNESS_MIN_PIVOTS = 32
+BETWEENNESS_MAX_PIVOTS = 256
+BETWEENNESS_PIVOT_FACTOR = 8      # pivots ≈ factor * sqrt(V)
+# pivot 1개 = BFS 1회 (core 노드 + 무방향 인접 칸) → pivot 수 × 그 크기 상한 (큰 그래프는 pivot을 줄임)
+# sampled 상위 k 안에 오차 폭 안의 동점이 있으면 같은 상한까지 pivot을 더 돌려 다시 순위를 매김
+# (pivot 수가 core 노드 수에 닿으면 exact) → 어떤 크기든 병목 단계는 이 상한 안에서 끝남
+BETWEENNESS_WORK_BUDGET = 1_500_000
+BETWEENNESS_SEED = 42
+# sampled 오차 폭 = 이 값 × pivot 표본에서 추정한 표준오차
+BETWEENNESS_ERROR_Z = 2.0
+# 병목 점수 차이가 이 값 이하면 동점으로 보고 fan-in 큰 순 → 노드 id 순 (sampled 오차로 순위가 흔들리지 않게)
+# fan-out 1 차이(0.02)보다 작게 잡아서 구조 차이는 그대로 순위에 반영됨
+# sampled면 두 노드의 오차 폭(BETWEENNESS_ERROR_Z × 표준오차)이 이보다 클 때 그 폭까지 동점으로 봄
+BOTTLENECK_TIE_TOLERANCE = 0.01
+
+
+# ========== Mermaid 파싱 ==========
+def parse_annotations(mermaid_text: str) -> Tuple[Set[str], Optional[str], Optional[str]]:
+    """
+    Mermaid 주석(%%)에 아래 힌트를 적어두면 정확도가 좋아집니다:
+    - %% redundant: G,R  => G, R은 이중화로 간주하여 SPOF 후보에서 제외
+    - %% entry: U        => entry 노드 지정(시작점)
+    - %% exit: V         => exit 노드 지정(종착점)
+
+    예시:
+      %% entry: Client
+      %% redundant: LB1,LB2,Cache
+      %% exit: DB
+      graph TD
+        Client[Client] --> LB1[Load Balancer 1]
+        ...
+    """
+    redundant: Set[str] = set()
+    entry = None
+    exit_ = None
+
+    for raw in mermaid_text.splitlines():
+        line = raw.strip()
+        if not line.startswith("%%"):
+            continue
+
+        low = line.lower()
+
+        if "redundant:" in low:
+            part = line.split("redundant:", 1)[1]
+            redundant |= {x.strip() for x in part.split(",") if x.strip()}
+
+        if "entry:" in low:
+            entry = line.split("entry:", 1)[1].strip()
+
+        if "exit:" in low:
+            exit_ = line.split("exit:", 1)[1].strip()
+
+    return redundant, entry, exit_
+
+
+# 부하/용량/지연/가용성 수치 모델 주석 (%% key: 대상=값, ...), 대상은 노드 또는 A->B 엣지
+MODEL_ANNOTATION_KEYS = ("weight", "capacity", "latency", "availability")
+# "p50/p99"처럼 값 2개를 받는 키
+MODEL_PAIR_KEYS = ("latency",)
+
+
+def parse_model_annotations(mermaid_text: str) -> Dict[str, Dict]:
+    """
+    수치 모델 주석 파싱 (parse_annotations와 같은 %% 주석 줄):
+    - %% weight: GW->Search=3, GW->Cache=1   => 나가는 엣지 분배 비율(상대 가중치, 기본 1)
+    - %% capacity: DB=800, LLM=15            => 노드 1개 처리 용량(QPS), 없으면 역할별 기본값
+    - %% latency: LLM=800/3000, VDB=30       => 노드 지연 ms (p50/p99 또는 p50), 없으면 역할별 기본값
+    - %% availability: DB=0.9995, LLM=99.5   => 노드 가용성 (비율 또는 %), 없으면 역할별 기본값
+    반환: {"weight": {("GW", "Search"): 3.0, ...}, "capacity": {"DB": 800.0, ...},
+           "latency": {"LLM": (800.0, 3000.0), "VDB": 30.0}, "availability": {"DB": 0.9995, ...}}
+    값이 숫자가 아닌 항목은 무시.
+    """
+    model: Dict[str, Dict] = {k: {} for k in MODEL_ANNOTATION_KEYS}
+
+    for raw in mermaid_text.splitlines():
+        line = raw.strip()
+        if not line.startswith("%%"):
+            continue
+        body = line[2:].strip()
+        key, sep, part = body.partition(":")
+        key = key.strip().lower()
+        if not sep or key not in model:
+            continue
+
+        for item in part.split(","):
+            target, eq, value = item.partition("=")
+            if not eq:
+                continue
+            try:
+                parts = tuple(float(x) for x in value.split("/"))
+            except ValueError:
+                continue
+            if len(parts) == 2 and key in MODEL_PAIR_KEYS:
+                number = parts
+            elif len(parts) == 1:
+                number = parts[0]
+            else:
+                continue
+            if "->" in target:
+                a, b = (x.strip() for x in target.split("->", 1))
+                model[key][(a, b)] = number
+            elif target.strip():
+                model[key][target.strip()] = number
+
+    return model
+
+
+def parse_mermaid_edges_and_labels(mermaid_text: str) -> Tuple[List[Tuple[str, str]], Dict[str, str]]:
+    """Mermaid -> (edges, labels) 파싱 (단일 패스 토크나이저)."""
+    labels: Dict[str, str] = {}
+    edges: Dict[Tuple[str, str], None] = {}
+
+    for kind, a, b in iter_mermaid(mermaid_text):
+        if kind == "edge":
+            edges[(a, b)] = None
+        else:
+            labels[a] = b
+
+    return list(edges), labels
+
+
+def choose_entry_exit(
+    G: CSRGraph,
+    labels: Dict[str, str],
+    entry_hint: Optional[str],
+    exit_hint: Optional[str],
+    roles: Optional[NodeRoles] = None
+) -> Tuple[Optional[str], List[str]]:
+    """Entry/Exit 노드 결정 (roles가 없으면 기본 어휘로 분류)."""
+    entry: Optional[str] = None
+    exits: List[str] = []
+    if roles is None:
+        roles = NodeRoles.from_graph(G, labels)
+
+    if entry_hint and entry_hint in G:
+        entry = entry_hint
+    else:
+        candidates = [n for n in G.nodes if G.in_degree(n) == 0]
+        for n in candidates:
+            if n.lower() == "u" or roles.has(n, USER):
+                entry = n
+                break
+        if not entry and candidates:
+            entry = candidates[0]
+
+    if exit_hint and exit_hint in G:
+        exits = [exit_hint]
+    else:
+        exits = [n for n in G.nodes if G.out_degree(n) == 0]
+
+        if not exits:
+            exits = [n for n in G.nodes if roles.has(n, DB | VECTOR | LLM)]
+
+    return entry, exits
+
+
+# ========== 병목 순위 ==========
+def betweenness_pivots(n: int, mode: Optional[str] = None, work: Optional[int] = None) -> Optional[int]:
+    """
+    노드 n개일 때 사용할 pivot 수 (None이면 exact).
+    work: BFS 1회 크기 (core 노드 + 무방향 인접 칸, bfs_work), 주면 BETWEENNESS_WORK_BUDGET 안으로 줄임.
+    """
+    mode = mode or BETWEENNESS_MODE
+    if mode == "auto":
+        mode = "sampled" if n > BETWEENNESS_EXACT_MAX_NODES else "exact"
+
+    pivots = min(BETWEENNESS_MAX_PIVOTS, int(BETWEENNESS_PIVOT_FACTOR * n ** 0.5))
+    if work:
+        pivots = min(pivots, BETWEENNESS_WORK_BUDGET // work)
+    pivots = min(n, max(BETWEENNESS_MIN_PIVOTS, pivots))
+    if mode == "exact" or pivots >= n:
+        return None
+    return pivots
+
+
+def bfs_work(core_nodes: int, core_edges: int) -> int:
+    """betweenness BFS 1회가 훑는 칸 수 (노드 + 양방향 인접)."""
+    return core_nodes + 2 * core_edges
+
+
+def rank_bottlenecks(
+    stats: List[Tuple[str, int, int, float]],
+    labels: Dict[str, str],
+    topk: int = 3,
+    load: Optional[Dict[str, Tuple[float, float]]] = None,
+    roles: Optional[NodeRoles] = None,
+    errors: Optional[Dict[str, float]] = None,
+    meta: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    (노드, fan-in, fan-out, betweenness) 목록 → 병목 점수 상위 topk.
+    load({노드: (예상 부하 QPS, 용량 QPS)})가 있으면 용량 대비 사용률 순, 같으면 병목 점수 순.
+    병목 점수가 BOTTLENECK_TIE_TOLERANCE 안으로 붙어 있으면 fan-in 큰 순 → 노드 id 순 (_break_near_ties).
+    roles가 없으면 기본 어휘로 분류 (상태 저장 역할이면 가산점).
+    errors: sampled 중앙성의 노드별 표준오차 (있으면 동점 폭을 오차 폭까지 넓힘)
+    meta: 주면 meta["uncertain"] = 상위 topk에 2개 이상짜리 동점 묶음이 있는지
+          (sampled 오차로 순서/경계가 exact와 달라질 수 있음, errors가 있을 때만 True가 될 수 있음)
+    """
+    if roles is None:
+        roles = NodeRoles.from_nodes((n for n, _, _, _ in stats), labels)
+    scored = []
+
+    for n, fanin, fanout, bcv in stats:
+        bonus = 0.0
+        if roles.has(n, STATEFUL_ROLES):
+            bonus += 0.20
+
+        score = bcv + 0.06 * fanin + 0.02 * fanout + bonus
+        scored.append((n, score, fanin, fanout, bcv))
+
+    def utilization(n: str) -> float:
+        qps, cap = load.get(n, (0.0, 0.0))
+        return qps / cap if cap else 0.0
+
+    primary = utilization if load else (lambda n: 0.0)
+    scored.sort(key=lambda x: (primary(x[0]), x[1]), reverse=True)
+
+    ranked, tied = _break_near_ties(scored, primary, topk, errors)
+    if meta is not None:
+        meta["uncertain"] = bool(errors) and tied
+
+    results: List[Dict] = []
+    for n, score, fanin, fanout, bcv in ranked:
+        row = {
+            "node": n,
+            "label": labels.get(n),
+            "score": round(score, 4),
+            "fanin": fanin,
+            "fanout": fanout,
+            "betweenness": round(bcv, 4),
+        }
+        if load and n in load:
+            qps, cap = load[n]
+            row["load_qps"] = round(qps, 2)
+            row["capacity_qps"] = round(cap, 2)
+            row["utilization"] = round(qps / cap, 4) if cap else None
+        results.append(row)
+    return results
+
+
+def _break_near_ties(
+    scored: List[Tuple],
+    primary: Callable[[str], float],
+    topk: int,
+    errors: Optional[Dict[str, float]] = None
+) -> Tuple[List[Tuple], bool]:
+    """
+    (사용률, 병목 점수) 내림차순으로 정렬된 목록의 앞 topk개와, 그 안에 2개 이상짜리 동점 묶음이 있었는지.
+    사용률이 같고 점수가 묶음 첫 항목과 BOTTLENECK_TIE_TOLERANCE 이내인 항목은 한 묶음으로 보고
+    fan-in 큰 순 → 노드 id 순으로 다시 정렬 (묶음이 topk 경계에 걸쳐도 같은 규칙).
+    errors가 있으면 허용 폭 = max(BOTTLENECK_TIE_TOLERANCE, BETWEENNESS_ERROR_Z × 두 노드 표준오차의 합성).
+    """
+    errors = errors or {}
+    out: List[Tuple] = []
+    tied = False
+    i = 0
+    while i < len(scored) and len(out) < topk:
+        head_primary, head_score = primary(scored[i][0]), scored[i][1]
+        head_err = errors.get(scored[i][0], 0.0)
+        j = i + 1
+        while j < len(scored) and primary(scored[j][0]) == head_primary:
+            err = BETWEENNESS_ERROR_Z * (head_err ** 2 + errors.get(scored[j][0], 0.0) ** 2) ** 0.5
+            if head_score - scored[j][1] > max(BOTTLENECK_TIE_TOLERANCE, err):
+                break
+            j += 1
+        tied = tied or j - i > 1
+        out.extend(sorted(scored[i:j], key=lambda x: (-x[2], x[0])))
+        i = j
+    return out[:topk], tied
+
+
+# ========== CSR 기반 분석 단계 (analyze_mermaid에서 사용) ==========
+# 부분 그래프 복사 없이 graph_csr.CSRGraph 배열 + mask로 계산
+def entry_dominators(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray
+) -> Optional[array]:
+    """entry 기준 core dominator tree (entry/exit이 없거나 entry가 core 밖이면 None)."""
+    if not entry or entry not in g or not exits:
+        return None
+    root = g.index[entry]
+    if not core_mask[root]:
+        return None
+    return g.immediate_dominators(root, core_mask)
+
+
+def compute_spof_csr(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    redundant: Set[str],
+    idom: Optional[array] = None
+) -> List[str]:
+    """SPOF 후보 계산 (core mask 안에서 dominator tree, idom을 주면 재사용)."""
+    if idom is None:
+        idom = entry_dominators(g, entry, exits, core_mask)
+    if idom is None:
+        return []
+
+    root = g.index[entry]
+
+    dominators = bytearray(len(g))
+    for ex in exits:
+        v = g.index.get(ex)
+        if v is None or v == root or idom[v] == -1:
+            continue
+        node = idom[v]
+        while node != root and not dominators[node]:
+            dominators[node] = 1
+            node = idom[node]
+
+    excluded = {entry} | set(exits) | set(redundant)
+    return [n for n in g.nodes_of(dominators) if n not in excluded]
+
+
+def compute_critical_edges_csr(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    idom: Optional[array] = None
+) -> List[List[str]]:
+    """
+    단일 링크 후보: 끊기면 entry에서 exit 중 하나라도 도달 불가가 되는 엣지 [[from, to], ...] (노드 번호 순).
+    양 끝이 redundant여도 보고함 (이중화된 두 컴포넌트 사이 네트워크 홉이 하나뿐인 경우).
+    SPOF와 같은 dominator tree를 써서 O(V+E).
+    순서는 block 단위 계산(graph_blocks.scoped_critical_edges)과 맞춤 (dominator tree 순서는 block만 봐서는 모름).
+    """
+    if idom is None:
+        idom = entry_dominators(g, entry, exits, core_mask)
+    if idom is None:
+        return []
+
+    targets = [g.index[ex] for ex in exits if ex in g and ex != entry]
+    return [[g.ids[u], g.ids[v]] for u, v in sorted(g.critical_edges(g.index[entry], targets, core_mask, idom))]
+
+
+def compute_bottlenecks_csr(
+    g: CSRGraph,
+    core_mask: bytearray,
+    labels: Dict[str, str],
+    topk: int = 3,
+    meta: Optional[Dict] = None,
+    load: Optional[Dict[int, Tuple[float, float]]] = None,
+    roles: Optional[NodeRoles] = None,
+    mode: Optional[str] = None,
+    blocks: Optional[CoreBlocks] = None,
+    previous_blocks: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    병목 후보 계산 (core mask 안에서 중앙성 + fan-in/out, load가 있으면 사용률 우선).
+    mode: 중앙성 계산 모드 (없으면 BETWEENNESS_MODE, 벤치마크에서 exact/sampled 비교용)
+    blocks: core block 분해(graph_blocks.decompose). exact일 때 meta["blocks"](다음 수정 제출용 block 표),
+            meta["scope"](block별 재사용/갱신/재계산 수)를 채움
+    previous_blocks: 직전 분석의 block 표 → 엣지가 같은 block은 다시 계산하지 않음 (graph_blocks.block_betweenness)
+    sampled인데 상위 topk에 오차 폭 안의 동점 묶음이 있으면 BETWEENNESS_WORK_BUDGET까지 pivot을 늘려
+    (이미 돌린 pivot은 그대로 두고 뒤에 이어서) 다시 순위를 매김. pivot이 core 전체에 닿으면 exact,
+    늘린 뒤에도 동점이 남으면 meta["betweenness"]["uncertain"] = True.
+    exact(처음부터 또는 pivot을 core 전체까지 늘림)이고 blocks가 있으면 중앙성을 block 단위로 계산.
+    """
+    core = [v for v in range(len(g)) if core_mask[v]]
+    if not core:
+        return []
+
+    indeg, outdeg = g.masked_degrees(core_mask)
+    work = bfs_work(len(core), sum(outdeg[v] for v in core))
+    named_load = {g.ids[v]: lc for v, lc in load.items()} if load else None
+
+    def ranked(bc: Dict[int, float], errors: Optional[Dict[int, float]], rank_meta: Dict) -> List[Dict]:
+        stats = [(g.ids[v], indeg[v], outdeg[v], bc.get(v, 0.0)) for v in core]
+        named_errors = {g.ids[v]: e for v, e in errors.items()} if errors else None
+        return rank_bottlenecks(stats, labels, topk, named_load, roles, named_errors, rank_meta)
+
+    def sampled(sampler: BetweennessSampler, rank_meta: Dict) -> List[Dict]:
+        exact = sampler.k >= len(core)
+        errors: Optional[Dict[int, float]] = None if exact else {}
+        return ranked(sampler.values(errors, exact=exact), errors, rank_meta)
+
+    def block_exact(rank_meta: Dict, spent: int = 0) -> List[Dict]:
+        bc, table, scope = block_betweenness(g, core_mask, blocks, block_tag(), previous_blocks)
+        scope["work"] += spent                 # 먼저 돌린 sampled pivot은 전체 계산이어도 똑같이 돌림
+        scope["full_work"] += spent
+        if meta is not None:
+            meta["blocks"] = table
+            meta["scope"] = scope
+        return ranked(bc, None, rank_meta)
+
+    pivots = betweenness_pivots(len(core), mode, work)
+    if pivots is None and blocks is not None:
+        if meta is not None:
+            meta["betweenness"] = {"mode": "exact", "pivots": len(core), "seed": None}
+        return block_exact({})
+
+    sampler = BetweennessSampler(g, core_mask, BETWEENNESS_SEED if pivots else None, blocks.csr if blocks else None)
+    sampler.extend(pivots or len(core))
+    rank_meta: Dict = {}
+    results = sampled(sampler, rank_meta)
+    info = (
+        {"mode": "exact", "pivots": len(core), "seed": None} if pivots is None
+        else {"mode": "sampled", "pivots": pivots, "seed": BETWEENNESS_SEED}
+    )
+    more = min(len(core), BETWEENNESS_WORK_BUDGET // work)
+    if rank_meta.get("uncertain") and pivots and more > pivots:
+        if more >= len(core) and blocks is not None:
+            results = block_exact(rank_meta, pivots * work)
+        else:
+            sampler.extend(more)
+            results = sampled(sampler, rank_meta)
+        info = {
+            "mode": "exact" if more >= len(core) else "sampled",
+            "pivots": more,
+            "seed": BETWEENNESS_SEED if more < len(core) else None,
+            "refined_from_pivots": pivots,
+        }
+    if rank_meta.get("uncertain"):
+        info["uncertain"] = True     # 예산 안에서 더 못 늘림 → 상위 순위 일부는 오차 폭 안의 동점 처리 결과
+    if meta is not None:
+        meta["betweenness"] = info
+    return results
+
+
+def compute_redundancy_csr(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    redundant: Set[str]
+) -> Optional[Dict]:
+    """
+    이중화 정도: core 안에서 entry → (모든 exit 뒤 슈퍼 싱크) node-disjoint 경로 수 + 최소 vertex cut.
+    - entry와 redundant 표시 노드는 여러 인스턴스로 보고 cut에서 제외
+    - exit은 cut 대상 (레플리카 둘이 DB 하나를 공유하면 경로 1개, cut=[DB])
+    반환: {"disjoint_paths", "min_vertex_cut", "capped"} (entry/exit이 없으면 None)
+    """
+    if not entry or entry not in g or not exits:
+        return None
+    root = g.index[entry]
+    targets = [g.index[ex] for ex in exits if ex in g and ex != entry]
+    if not core_mask[root] or not targets:
+        return None
+
+    paths, cut = g.disjoint_paths(root, targets, core_mask, g.mask_of(redundant), REDUNDANCY_PATH_LIMIT)
+    return {
+        "disjoint_paths": paths,
+        "min_vertex_cut": [g.ids[v] for v in cut] if cut is not None else None,
+        "capped": cut is None,
+    }
+
+
+def compute_availability(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    roles: NodeRoles,
+    redundant: Set[str],
+    model: Optional[Dict] = None
+) -> Optional[Dict]:
+    """무작위 장애 시뮬레이션 가용성 + 목표(AVAILABILITY_TARGET_NINES) 대비 판정 (entry/exit이 없으면 None)."""
+    availability = simulate_availability(g, entry, exits, core_mask, roles, redundant, model)
+    if availability is not None:
+        availability["target_nines"] = AVAILABILITY_TARGET_NINES
+        availability["below_target"] = (
+            not availability["lower_bound"] and availability["nines"] < AVAILABILITY_TARGET_NINES
+        )
+    return availability
+
+
+def redundancy_shortfall(redundancy: Optional[Dict], spofs: List[str]) -> int:
+    """목표 대비 부족한 disjoint 경로 수 (경로가 없거나 cut이 이미 SPOF로 잡힌 경우 0)."""
+    if not redundancy or redundancy.get("min_vertex_cut") is None:
+        return 0
+    paths = redundancy["disjoint_paths"]
+    if paths == 0 or set(redundancy["min_vertex_cut"]) & set(spofs):
+        return 0
+    return max(0, REDUNDANCY_TARGET_PATHS - paths)
+
+
+def uncovered_critical_edges(critical_edges: List[List[str]], spofs: List[str]) -> List[List[str]]:
+    """양 끝 모두 SPOF 후보가 아닌 단일 링크 (SPOF 감점/제안과 겹치지 않는 것만)."""
+    spof_set = set(spofs)
+    return [e for e in critical_edges if e[0] not in spof_set and e[1] not in spof_set]
+
+
+def calc_penalties(
+    spofs: List[str],
+    bottlenecks: List[Dict],
+    critical_edges: Optional[List[List[str]]] = None,
+    redundancy: Optional[Dict] = None
+) -> Dict:
+    """감점 계산 (critical_edges / redundancy는 SPOF와 겹치지 않는 것만 셈)."""
+    spof_count = len(spofs)
+    bottleneck_count = len(bottlenecks)
+    critical_edge_count = len(uncovered_critical_edges(critical_edges or [], spofs))
+    shortfall = redundancy_shortfall(redundancy, spofs)
+
+    spof_penalty = min(SPOF_PENALTY_CAP, spof_count * SPOF_PENALTY_PER)
+    bottleneck_penalty = min(BOTTLENECK_PENALTY_CAP, bottleneck_count * BOTTLENECK_PENALTY_PER)
+    critical_edge_penalty = min(CRITICAL_EDGE_PENALTY_CAP, critical_edge_count * CRITICAL_EDGE_PENALTY_PER)
+    redundancy_penalty = shortfall * REDUNDANCY_PENALTY_PER
+
+    total_penalty = spof_penalty + bottleneck_penalty + critical_edge_penalty + redundancy_penalty
+
+    return {
+        "spof_count": spof_count,
+        "bottleneck_count": bottleneck_count,
+        "critical_edge_count": critical_edge_count,
+        "redundancy_shortfall": shortfall,
+        "spof_penalty": spof_penalty,
+        "bottleneck_penalty": bottleneck_penalty,
+        "critical_edge_penalty": critical_edge_penalty,
+        "redundancy_penalty": redundancy_penalty,
+        "total_penalty": total_penalty,
+        "policy": {
+            "spof_per": SPOF_PENALTY_PER,
+            "spof_cap": SPOF_PENALTY_CAP,
+            "bottleneck_per": BOTTLENECK_PENALTY_PER,
+            "bottleneck_cap": BOTTLENECK_PENALTY_CAP,
+            "critical_edge_per": CRITICAL_EDGE_PENALTY_PER,
+            "critical_edge_cap": CRITICAL_EDGE_PENALTY_CAP,
+            "redundancy_target_paths": REDUNDANCY_TARGET_PATHS,
+            "redundancy_per": REDUNDANCY_PENALTY_PER,
+        }
+    }
+
+
+# 그래프 단계가 붙이는 risk flag (재채점 시 이 flag들은 지우고 다시 계산, Stage 1 flag는 유지)
+GRAPH_FLAGS = (
+    "SPOF_DETECTED", "SCORE_DEDUCTED_FOR_SPOF",
+    "BOTTLENECK_CANDIDATES", "SCORE_DEDUCTED_FOR_BOTTLENECKS",
+    "CRITICAL_LINK_DETECTED", "SCORE_DEDUCTED_FOR_CRITICAL_LINKS",
+    "LOW_REDUNDANCY", "SCORE_DEDUCTED_FOR_LOW_REDUNDANCY",
+    "CAPACITY_EXCEEDED", "SLA_P95_EXCEEDED", "LOW_AVAILABILITY",
+    "GRAPH_PENALTY_APPLIED",
+)
+
+
+def graph_flags(graph_analysis: Dict, penalty_info: Dict) -> Set[str]:
+    """graph_analysis + 감점 결과 → 그래프 단계 risk flag."""
+    flags: Set[str] = set()
+    if penalty_info["spof_count"] > 0:
+        flags.update(("SPOF_DETECTED", "SCORE_DEDUCTED_FOR_SPOF"))
+    if penalty_info["bottleneck_count"] > 0:
+        flags.update(("BOTTLENECK_CANDIDATES", "SCORE_DEDUCTED_FOR_BOTTLENECKS"))
+    if penalty_info.get("critical_edge_count", 0) > 0:
+        flags.add("CRITICAL_LINK_DETECTED")
+    if penalty_info.get("critical_edge_penalty", 0) > 0:
+        flags.add("SCORE_DEDUCTED_FOR_CRITICAL_LINKS")
+    if penalty_info.get("redundancy_shortfall", 0) > 0:
+        flags.add("LOW_REDUNDANCY")
+    if penalty_info.get("redundancy_penalty", 0) > 0:
+        flags.add("SCORE_DEDUCTED_FOR_LOW_REDUNDANCY")
+    if (graph_analysis.get("load") or {}).get("overloaded"):
+        flags.add("CAPACITY_EXCEEDED")
+    if (graph_analysis.get("latency") or {}).get("exceeds_sla"):
+        flags.add("SLA_P95_EXCEEDED")
+    if (graph_analysis.get("availability") or {}).get("below_target"):
+        flags.add("LOW_AVAILABILITY")
+    if penalty_info["total_penalty"] > 0:
+        flags.add("GRAPH_PENALTY_APPLIED")
+    return flags
+
+
+# ========== 대안 아키텍처 제시 로직 ==========
+def generate_alternative_architecture(
+    spofs: List[str],
+    bottlenecks: List[Dict],
+    labels: Dict[str, str],
+    G: CSRGraph,
+    critical_edges: Optional[List[List[str]]] = None,
+    redundancy: Optional[Dict] = None,
+    load: Optional[Dict] = None,
+    latency: Optional[Dict] = None,
+    availability: Optional[Dict] = None,
+    roles: Optional[NodeRoles] = None
+) -> str:
+    """
+    SPOF/병목을 해결하는 대안 구조를 텍스트로 제시.
+    
+    전략:
+    1) SPOF가 있으면 → 이중화/로드밸런싱 제안
+    2) 용량 초과 노드가 있으면 → 증설(인스턴스 수) 제안
+    3) P95 지연이 SLA를 넘으면 → 가장 오래 걸리는 노드에 캐싱/타임아웃/비동기 제안
+    4) 추정 가용성이 목표 미만이면 → 비가용성 기여도 1위 노드 이중화 제안
+    5) 병목이 있으면 → 파티셔닝/샤딩/캐싱 제안
+    6) 단순 구조면 → 관측성/FT 강화 제안
+    """
+    suggestions = []
+    if roles is None:
+        roles = NodeRoles.from_graph(G, labels)
+    
+    # SPOF 해결 방안
+    if spofs:
+        for spof_node in spofs:
+            label = labels.get(spof_node, spof_node)
+            
+            # 노드 타입 (분석 단계에서 분류한 역할)
+            role = roles.of(spof_node)
+            if role & BALANCER:
+                suggestions.append(
+                    f"✓ [{spof_node} 이중화] {label} 앞에 로드밸런서 2대 이상 배치 "
+                    f"(Active-Active 또는 Active-Standby), 헬스체크 기반 페일오버"
+                )
+            elif role & DB:
+                suggestions.append(
+                    f"✓ [{spof_node} 레플리카] {label} 마스터-슬레이브 구성 또는 클러스터(샤딩), "
+                    f"읽기/쓰기 분리로 부하 분산"
+                )
+            elif role & QUEUE:
+                suggestions.append(
+                    f"✓ [{spof_node} 클러스터] {label}를 3개 이상 노드로 구성, "
+                    f"파티션 자동 리밸런싱"
+                )
+            elif role & WORKER:
+                suggestions.append(
+                    f"✓ [{spof_node} 수평확장] {label} 여러 인스턴스 실행, "
+                    f"로드밸런서/메시지 큐로 부하 분산"
+                )
+            else:
+                suggestions.append(
+                    f"✓ [{spof_node} 이중화] {label}를 최소 2개 인스턴스로 구성, "
+                    f"자동 페일오버 및 헬스체크 설정"
+                )
+    
+    # 이중화 부족 해결 방안 (모든 경로가 공유하는 cut 노드)
+    if redundancy_shortfall(redundancy, spofs):
+        shared = ", ".join(labels.get(n) or n for n in redundancy["min_vertex_cut"])
+        suggestions.append(
+            f"✓ [N+1 이중화] entry→exit 독립 경로가 {redundancy['disjoint_paths']}개뿐이고 모두 {shared}를 공유, "
+            f"해당 컴포넌트를 복제(레플리카/클러스터)하거나 경로별로 분리"
+        )
+
+    # 단일 링크 해결 방안 (SPOF 제안과 겹치지 않는 것만, 상위 2개)
+    for a, b in uncovered_critical_edges(critical_edges or [], spofs)[:2]:
+        suggestions.append(
+            f"✓ [{a}→{b} 경로 이중화] {labels.get(a) or a} → {labels.get(b) or b} 구간이 유일한 경로, "
+            f"다른 네트워크/AZ를 지나는 두 번째 경로 또는 중간 LB 추가"
+        )
+
+    # 용량 초과 해결 방안 (traffic_json 부하 전파 결과, 사용률 상위 2개)
+    for row in ((load or {}).get("top") or [])[:2]:
+        if (row.get("utilization") or 0) <= 1.0:
+            break
+        node = row["node"]
+        need = int(-(-row["load_qps"] // row["capacity_qps"]))
+        suggestions.append(
+            f"✓ [{node} 증설] {labels.get(node) or node} 예상 부하 {row['load_qps']:g} QPS > 용량 "
+            f"{row['capacity_qps']:g} QPS, 최소 {need}개 인스턴스로 수평확장하거나 앞단 캐시/큐로 부하 감소"
+        )
+
+    # SLA 초과 해결 방안 (Monte Carlo 지연 추정에서 요청당 시간을 가장 많이 쓰는 노드)
+    if latency and latency.get("exceeds_sla") and latency.get("top_contributors"):
+        top = latency["top_contributors"][0]
+        node = top["node"]
+        suggestions.append(
+            f"✓ [{node} 지연 단축] P95 {latency['p95_ms']:g}ms > SLA {latency['sla_p95_ms']:g}ms, "
+            f"요청 시간의 {top['share']:.0%}를 {labels.get(node) or node}가 차지 → 결과 캐싱, 타임아웃/헤지 요청, "
+            f"응답 경로 밖으로 비동기화"
+        )
+
+    # 가용성 목표 미달 해결 방안 (SPOF 제안과 겹치지 않을 때만)
+    if availability and availability.get("below_target") and availability.get("top_contributors"):
+        top = availability["top_contributors"][0]
+        node = top["node"]
+        if node not in spofs:
+            suggestions.append(
+                f"✓ [{node} 가용성] 추정 가용성 {availability['availability']:.3%} ({availability['nines']:g} nines) "
+                f"< 목표 {availability['target_nines']:g} nines, 장애 시나리오의 {top['unavailability_share']:.0%}가 "
+                f"{labels.get(node) or node} 때문 → 레플리카/멀티 AZ 또는 우회 경로 추가"
+            )
+
+    # 병목 해결 방안
+    if bottlenecks:
+        for bn in bottlenecks[:2]:  # 상위 2개만
+            node = bn["node"]
+            label = bn.get("label") or node  # 라벨 없는 노드는 label=None
+            fanin = bn.get("fanin", 0)
+            
+            if fanin >= 3:
+                suggestions.append(
+                    f"✓ [{node} 캐싱] {label}의 응답을 Redis/Memcached로 캐싱, "
+                    f"TTL 정책으로 신선도 관리"
+                )
+            
+            if roles.has(node, DB):
+                suggestions.append(
+                    f"✓ [{node} 샤딩] {label}를 핫 데이터 기준으로 샤딩, "
+                    f"범위/해시 기반 파티셔닝"
+                )
+            elif roles.has(node, SERVICE):
+                suggestions.append(
+                    f"✓ [{node} 비동기화] {label}의 무거운 작업을 큐에 오프로드, "
+                    f"백그라운드 워커로 처리"
+                )
+    
+    # 기본 제안
+    if not suggestions:
+        suggestions = [
+            "✓ [관측성 강화] Trace/Metric/Log 통합 수집으로 장애 근인 추적 속도 ↑",
+            "✓ [Circuit Breaker] 종속 서비스 장애 시 빠른 페일오버",
+            "✓ [재시도 정책] 일시적 오류는 지수 백오프로 재시도"
+        ]
+    
+    return "\n".join(suggestions)
+
+
+# ========== 동적 Follow-up 질문 생성 ==========
+def generate_followup_questions(
+    submission: Dict,
+    graph_analysis: Dict,
+    penalty_info: Dict
+) -> List[str]:
+    """
+    SPOF/병목/Tradeoff에 따라 시니어 면접관 질문 자동 생성.
+    """
+    questions = []
+    
+    # SPOF 질문
+    if graph_analysis.get("spof_candidates"):
+        spofs = graph_analysis["spof_candidates"]
+        if len(spofs) == 1:
+            q = f"'{spofs[0]}' 컴포넌트가 장애 시, 어떻게 전체 서비스를 보호할 건가요?"
+        else:
+            q = f"이 아키텍처에 {len(spofs)}개 SPOF가 있는데, 최우선 이중화 대상은?"
+        questions.append(q)
+    
+    # 병목 질문
+    if graph_analysis.get("bottleneck_candidates"):
+        bottlenecks = graph_analysis["bottleneck_candidates"]
+        bn_top = bottlenecks[0]["node"] if bottlenecks else "병목"
+        questions.append(
+            f"'{bn_top}' 노드의 처리량(throughput)이 P99에서 폭증하면?"
+        )
+
+    # 용량 초과 질문 (시나리오 피크 트래픽 기준)
+    load = graph_analysis.get("load")
+    if load and load.get("overloaded"):
+        top = load["top"][0]
+        questions.append(
+            f"피크 {load['entry_qps']:g} QPS에서 '{top['node']}'에 약 {top['load_qps']:g} QPS가 몰리는데 "
+            f"(용량 {top['capacity_qps']:g}), 어떻게 버틸 건가요?"
+        )
+
+    # 가용성 목표 미달 질문 (무작위 장애 시뮬레이션)
+    availability = graph_analysis.get("availability")
+    if availability and availability.get("below_target"):
+        questions.append(
+            f"추정 가용성이 {availability['availability']:.3%}({availability['nines']:g} nines)인데, "
+            f"목표 {availability['target_nines']:g} nines를 맞추려면 어떤 컴포넌트부터 이중화할 건가요?"
+        )
+
+    # SLA 초과 질문 (Monte Carlo 지연 추정)
+    latency = graph_analysis.get("latency")
+    if latency and latency.get("exceeds_sla"):
+        questions.append(
+            f"예상 P95 지연이 {latency['p95_ms']:g}ms로 SLA {latency['sla_p95_ms']:g}ms를 넘는데, "
+            f"어느 구간의 지연을 먼저 줄일 건가요?"
+        )
+
+    # 이중화 부족 질문 (레플리카가 공유 컴포넌트 하나로 모이는 구조)
+    redundancy = graph_analysis.get("redundancy")
+    if redundancy_shortfall(redundancy, graph_analysis.get("spof_candidates") or []):
+        shared = ", ".join(redundancy["min_vertex_cut"])
+        questions.append(
+            f"모든 요청 경로가 '{shared}'를 공유하는데, 이 구간이 멈추면 이중화한 나머지 컴포넌트는 어떻게 되나요?"
+        )
+    
+    # Tradeoff 질문
+    tradeoffs_json = submission.get("tradeoffs_json")
+    if isinstance(tradeoffs_json, str):
+        tradeoffs_json = json.loads(tradeoffs_json)
+    
+    if tradeoffs_json:
+        for i, td in enumerate(list(tradeoffs_json)[:2]):
+            topic = td.get("topic", "선택")
+            cons = td.get("cons", "단점")
+            questions.append(
+                f"'{topic}' 트레이드오프에서 '{cons}'를 어떻게 완화할 건가요?"
+            )
+    
+    # 일반 아키텍처 질문
+    if len(questions) < 5:
+        general_qs = [
+            "이 설계에서 가장 취약한 부분(Single Point of Concern)은 어디인가요?",
+            "트래픽이 10배 증가하면, 어떤 컴포넌트부터 스케일링할 건가요?",
+            "장애 발생 시 복구 순서(Recovery Order)를 어떻게 정할 건가요?",
+            "이 아키텍처의 비용은 어떻게 최적화할 수 있나요?",
+            "팀 규모(SRE 몇 명)가 운영 가능할 것 같나요?"
+        ]
+        
+        for gq in general_qs:
+            if len(questions) < 5:
+                questions.append(gq)
+    
+    return questions[:5]  # 상위 5개만
+
+
+# ========== 분석 파이프라인 (단건/배치 공용) ==========
+def engine_version() -> str:
+    """분석 캐시용 버전 태그: 엔진 버전 + 결과에 영향을 주는 감점/중앙성 설정."""
+    return (
+        f"{GRAPH_ENGINE_VERSION}"
+        f"|spof:{SPOF_PENALTY_PER}/{SPOF_PENALTY_CAP}"
+        f"|bn:{BOTTLENECK_PENALTY_PER}/{BOTTLENECK_PENALTY_CAP}"
+        f"|ce:{CRITICAL_EDGE_PENALTY_PER}/{CRITICAL_EDGE_PENALTY_CAP}"
+        f"|rd:{REDUNDANCY_TARGET_PATHS}/{REDUNDANCY_PENALTY_PER}/{REDUNDANCY_PATH_LIMIT}"
+        f"|bc:{BETWEENNESS_MODE}/{BETWEENNESS_EXACT_MAX_NODES}/{BETWEENNESS_MIN_PIVOTS}/{BETWEENNESS_MAX_PIVOTS}"
+        f"/{BETWEENNESS_PIVOT_FACTOR}/{BETWEENNESS_WORK_BUDGET}/{BETWEENNESS_SEED}/{BOTTLENECK_TIE_TOLERANCE}"
+        f"/{BETWEENNESS_ERROR_Z}"
+    )
+
+
+def block_tag() -> str:
+    """graph_blocks 재사용 키에 넣는 엔진 태그 (engine_version이 바뀌면 직전 block 몫을 쓰지 않음)."""
+    return hashlib.sha1(engine_version().encode("utf-8")).hexdigest()[:12]
+
+
+def edge_diff(
+    prev_edges: List[Tuple[str, str]],
+    new_edges: List[Tuple[str, str]]
+) -> Tuple[Set[Tuple[str, str]], Set[Tuple[str, str]]]:
+    """(추가된 엣지, 삭제된 엣지)."""
+    prev_set, new_set = set(map(tuple, prev_edges)), set(map(tuple, new_edges))
+    return new_set - prev_set, prev_set - new_set
+
+
+def revision_scope(
+    previous: Optional[Dict],
+    previous_edges: Optional[List[Tuple[str, str]]],
+    edges: List[Tuple[str, str]],
+    redundant: Set[str]
+) -> Dict:
+    """
+    수정 제출을 바뀐 block만 다시 계산할지 판단: {"mode": "scoped" | "full", "reason", 엣지 diff 요약}.
+    다음이면 full (reason):
+    - no_previous_edges: 직전 엣지가 없어서 변경 규모를 모름
+    - diff_too_large: 변경 비율 > REVISION_SCOPE_MAX_DIFF (대부분 block이 바뀌어 전체 계산이 나음)
+    - no_block_table: 직전 분석에 이번 엔진의 block 표가 없음 (엔진 버전이 다르거나 block 표 도입 전 결과)
+    - redundant_changed: redundant 표시가 다름 (직전 SPOF 후보에서 빠진 노드를 block 몫으로 되살릴 수 없음)
+    """
+    if not previous:
+        return {"mode": "full", "reason": "no_previous"}
+    if previous_edges is None:
+        return {"mode": "full", "reason": "no_previous_edges"}
+    added, removed = edge_diff(previous_edges, edges)
+    union = len(set(map(tuple, previous_edges)) | set(map(tuple, edges)))
+    scope: Dict = {
+        "mode": "scoped",
+        "edges_added": len(added),
+        "edges_removed": len(removed),
+        "diff_ratio": round((len(added) + len(removed)) / union, 3) if union else 0.0,
+    }
+    if scope["diff_ratio"] > REVISION_SCOPE_MAX_DIFF:
+        scope.update(mode="full", reason="diff_too_large")
+    elif (previous.get("blocks") or {}).get("engine") != block_tag():
+        scope.update(mode="full", reason="no_block_table")
+    elif set(previous.get("redundant_marked") or ()) != redundant:
+        scope.update(mode="full", reason="redundant_changed")
+    return scope
+
+
+def core_signature(
+    core_edges: List[Tuple[str, str]],
+    core: Set[str],
+    entry: Optional[str],
+    exits: List[str],
+    redundant: Set[str],
+    labels: Dict[str, str],
+    model: Optional[Dict] = None,
+    roles: Optional[NodeRoles] = None
+) -> str:
+    """
+    SPOF/병목 결과를 결정하는 입력(엔진 버전, core 엣지, entry/exits, core 안의 redundant, core 노드 라벨·역할)의 해시.
+    이 값이 같으면 core 밖 엣지가 바뀌었어도 SPOF/병목 결과는 동일.
+    engine_version()이 들어가므로 분석 로직/감점 설정이 바뀌면 직전 결과를 재사용하지 않음.
+    model: 수치 모델 입력(model_inputs 결과), traffic이나 모델 주석이 있을 때만 넘김
+    roles: 노드 역할 (시나리오 어휘가 바뀌면 라벨이 같아도 역할 기본값이 바뀌므로 같이 넣음)
+    """
+    h = hashlib.sha1()
+    h.update(f"{engine_version()}\n".encode("utf-8"))
+    h.update(json.dumps([entry, sorted(exits), sorted(redundant & core)], ensure_ascii=False).encode("utf-8"))
+    for a, b in sorted(core_edges):
+        h.update(f"{a}\t{b}\n".encode("utf-8"))
+    for n in sorted(core):
+        role = f"|{roles.of(n)}" if roles is not None else ""
+        h.update(f"{n}={labels.get(n) or ''}{role}\n".encode("utf-8"))
+    if model:
+        h.update(json.dumps(model, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def apply_hints(
+    annotations: Tuple[Set[str], Optional[str], Optional[str]],
+    hints: Optional[Dict]
+) -> Tuple[Set[str], Optional[str], Optional[str]]:
+    """
+    주석 힌트(parse_annotations 결과)에 호출자가 준 hints를 덮어씀.
+    hints: {"entry": "U", "exit": "DB", "redundant": ["LB1", "LB2"]} (모두 선택)
+    - entry/exit: 주어지면 주석 힌트보다 우선
+    - redundant: 주석 힌트와 합집합
+    """
+    redundant, entry, exit_ = annotations
+    if not hints:
+        return redundant, entry, exit_
+    extra = hints.get("redundant") or ()
+    if isinstance(extra, str):
+        extra = extra.split(",")
+    redundant = redundant | {x.strip() for x in extra if x and x.strip()}
+    return redundant, hints.get("entry") or entry, hints.get("exit") or exit_
+
+
+def model_inputs(traffic: Optional[Dict], model: Dict[str, Dict], core: Set[str]) -> Optional[Dict]:
+    """
+    core_signature에 넣을 수치 모델 입력 (traffic + core 안의 weight/capacity/latency/availability 주석).
+    traffic도 주석도 없으면 None (→ 서명이 모델 주석 도입 전과 같음).
+    """
+    inputs: Dict = {
+        "weight": sorted(
+            [a, b, w] for (a, b), w in model.get("weight", {}).items() if a in core and b in core
+        ),
+    }
+    for key in ("capacity", "latency", "availability"):
+        inputs[key] = sorted([n, x] for n, x in model.get(key, {}).items() if n in core)
+    if traffic:
+        inputs["traffic"] = traffic
+    return inputs if any(inputs.values()) else None
+
+
+def analyze_mermaid(
+    mermaid_text: str,
+    previous: Optional[Dict] = None,
+    hints: Optional[Dict] = None,
+    traffic: Optional[Dict] = None,
+    vocab: Optional[Dict] = None,
+    previous_edges: Optional[List[Tuple[str, str]]] = None
+) -> Dict:
+    """
+    Mermaid 텍스트 1건에 대해 파싱 → 역할 분류 → core 추출 → SPOF → 가용성 → 부하 → 지연 → 병목 → 감점 → 대안까지 실행.
+    DB를 건드리지 않으므로 배치 채점의 워커 프로세스에서도 그대로 호출 가능.
+    previous: 직전 제출의 graph_analysis. core_signature가 같으면 SPOF/병목 계산을 건너뛰고 재사용.
+    previous_edges: 직전 제출의 엣지. 서명이 달라도 변경이 작으면(revision_scope) SPOF/단일 링크/exact 병목을
+                    바뀐 block만 다시 계산 (graph_blocks.py, 결과는 전체 계산과 같음)
+    hints: entry/exit/redundant 지정 (apply_hints 참고, 없으면 Mermaid 주석 힌트만 사용)
+    traffic: 시나리오 traffic_json (qps_peak 등). 주면 부하 전파 후 병목을 용량 대비 사용률 순으로 정렬하고,
+             entry→exit 지연 P50/P95/P99를 추정해서 sla_p95_latency_ms와 비교
+    vocab: 시나리오 역할 어휘 {역할: [키워드]} (node_roles.scenario_vocabulary, 없으면 기본 어휘만)
+    반환의 perf: 단계별 시간(ms)/그래프 크기/메모리 최고치 (meta.perf로 저장됨)
+                perf.scope: 단계별 재사용/block 단위 계산 기록 {단계: {mode, blocks, reused, ..., work, full_work}}
+    반환의 scope: revision_scope 결과 (서명이 같아 재사용했으면 mode "reuse")
+    반환의 edges: 파싱한 엣지 목록 [(a, b)] (system_graph_findings에 압축 저장, 재채점용)
+    반환의 alternative_mermaid: SPOF 복제/캐시/큐를 넣어 다시 그린 Mermaid (graph_rewrite.py, 고칠 게 없으면 None)
+    """
+    timer = StageTimer()
+
+    with timer.stage("parse"):
+        redundant, entry_hint, exit_hint = apply_hints(parse_annotations(mermaid_text), hints)
+        model = parse_model_annotations(mermaid_text)
+        edges, labels = parse_mermaid_edges_and_labels(mermaid_text)
+
+    with timer.stage("graph"):
+        g = CSRGraph.from_edges(edges)
+
+    with timer.stage("roles"):
+        roles = NodeRoles.from_graph(g, labels, matcher_for(vocab))
+
+    with timer.stage("core"):
+        entry, exits = choose_entry_exit(g, labels, entry_hint, exit_hint, roles)
+        core_mask = g.core_mask(entry, exits)
+        core = set(g.nodes_of(core_mask))
+        core_edges = g.subgraph_edges(core_mask)
+        signature = core_signature(
+            core_edges, core, entry, exits, redundant, labels, model_inputs(traffic, model, core), roles
+        )
+
+    # 서명에 엔진 버전이 들어 있으므로 다른 버전 엔진이 만든 직전 결과는 여기서 걸러짐
+    reused = bool(previous) and previous.get("core_signature") == signature
+    scope = revision_scope(previous, previous_edges, edges, redundant)
+    stage_scope: Dict[str, Dict] = {}
+    if reused:
+        scope.update(mode="reuse")
+        scope.pop("reason", None)
+        stage_scope = {stage: {"mode": "reused"} for stage in REUSED_STAGES}
+        spofs = list(previous["spof_candidates"])
+        critical_edges = [list(e) for e in previous["critical_edges"]]
+        redundancy = previous["redundancy"]
+        availability = previous["availability"]
+        load = previous["load"]
+        latency = previous["latency"]
+        bottlenecks = list(previous["bottleneck_candidates"])
+        bottleneck_meta = {"betweenness": previous.get("betweenness")}
+        blocks_info = previous.get("blocks")
+    else:
+        scoped = scope["mode"] == "scoped"
+        tag = block_tag()
+        with timer.stage("blocks"):
+            blocks = decompose(g, core_mask, entry)
+            relevant = spof_blocks(g, blocks, exits, core_mask, tag)
+        with timer.stage("spof"):
+            if scoped:
+                spofs, local, stage_scope["spof"] = scoped_spof(g, relevant, entry, exits, redundant, previous)
+            else:
+                idom = entry_dominators(g, entry, exits, core_mask)
+                spofs = compute_spof_csr(g, entry, exits, core_mask, redundant, idom)
+        with timer.stage("critical_edge"):
+            if scoped:
+                critical_edges, stage_scope["critical_edge"] = scoped_critical_edges(g, relevant, local, previous)
+            else:
+                critical_edges = compute_critical_edges_csr(g, entry, exits, core_mask, idom)
+        with timer.stage("redundancy"):
+            redundancy = compute_redundancy_csr(g, entry, exits, core_mask, redundant)
+        with timer.stage("availability"):
+            availability = compute_availability(g, entry, exits, core_mask, roles, redundant, model)
+        with timer.stage("load"):
+            loads = compute_load(g, entry, exits, core_mask, roles, redundant, traffic, model) if traffic else None
+            load = load_summary(g, traffic, loads) if loads is not None else None
+        with timer.stage("latency"):
+            latency = estimate_latency(g, entry, exits, core_mask, roles, traffic, model) if traffic else None
+        bottleneck_meta = {}
+        with timer.stage("bottleneck"):
+            bottlenecks = compute_bottlenecks_csr(
+                g, core_mask, labels, topk=3, meta=bottleneck_meta, load=loads, roles=roles, blocks=blocks,
+                previous_blocks=(previous.get("blocks") or {}).get("betweenness") if scoped else None
+            )
+        if scoped:
+            # sampled 중앙성은 block으로 나눌 수 없음 (graph_blocks.py 참고) → 병목 단계는 전체 계산
+            stage_scope["bottleneck"] = bottleneck_meta.get("scope") or {"mode": "full", "reason": "sampled"}
+            for stage in ("spof", "critical_edge"):
+                stage_scope[stage]["full_work"] = len(core) + len(core_edges)
+            for st in stage_scope.values():
+                if "full_work" in st:
+                    st["saved_work"] = st["full_work"] - st["work"]
+        blocks_info = {
+            "engine": tag,
+            "spof": [key for *_, key in relevant if key],
+            "betweenness": bottleneck_meta.get("blocks"),
+        }
+
+    with timer.stage("penalty"):
+        penalty_info = calc_penalties(spofs, bottlenecks, critical_edges, redundancy)
+        alternative_arch = generate_alternative_architecture(
+            spofs, bottlenecks, labels, g, critical_edges, redundancy, load, latency, availability, roles
+        )
+
+    timer.count(
+        input_bytes=len(mermaid_text.encode("utf-8")),
+        nodes=len(g),
+        edges=g.edge_count,
+        core_nodes=len(core),
+        reused=reused,
+    )
+    if stage_scope:
+        timer.count(scope=stage_scope)
+
+    graph_analysis = {
+        "entry": entry,
+        "exits": exits,
+        "nodes_cnt": len(g),
+        "edges_cnt": g.edge_count,
+        "core_nodes_cnt": len(core),
+        "redundant_marked": sorted(list(redundant)),
+        "spof_candidates": spofs,
+        "critical_edges": critical_edges,
+        "redundancy": redundancy,
+        "availability": availability,
+        "load": load,
+        "latency": latency,
+        "bottleneck_candidates": bottlenecks,
+        "betweenness": bottleneck_meta.get("betweenness"),
+        "core_signature": signature,
+        "blocks": blocks_info,
+        "notes": f"{GRAPH_ENGINE_VERSION}: SPOF/병목 탐지 + 대안 아키텍처 + 동적 질문 생성"
+    }
+
+    # 대안 다이어그램: 탐지 결과로 그래프를 고쳐 그리고, 고친 그래프가 SPOF 없는지 확인
+    with timer.stage("rewrite"):
+        alt_mermaid, graph_analysis["rewrite"] = alternative_mermaid(
+            edges, labels, graph_analysis, mermaid_direction(mermaid_text), roles
+        )
+
+    return {
+        "graph_analysis": graph_analysis,
+        "penalty_info": penalty_info,
+        "alternative_arch": alternative_arch,
+        "alternative_mermaid": alt_mermaid,
+        "reused": reused,
+        "scope": scope,
+        "perf": timer.as_dict(),
+        "edges": edges,
+    }
+
+
+# ========== 라이브러리 진입점 ==========
+class GraphAnalysis(TypedDict, total=False):
+    """analyze() 반환 = score_breakdown_json.items.graph_analysis에 저장되는 것과 같은 dict."""
+    entry: Optional[str]
+    exits: List[str]
+    nodes_cnt: int
+    edges_cnt: int
+    core_nodes_cnt: int
+    redundant_marked: List[str]
+    spof_candidates: List[str]
+    critical_edges: List[List[str]]
+    redundancy: Optional[Dict]
+    availability: Optional[Dict]
+    load: Optional[Dict]
+    latency: Optional[Dict]
+    bottleneck_candidates: List[Dict]
+    betweenness: Optional[Dict]
+    core_signature: str
+    blocks: Optional[Dict]
+    notes: str
+    rewrite: Optional[Dict]
+    revision: Dict
+
+
+def analyze(
+    mermaid_text: str,
+    hints: Optional[Dict] = None,
+    traffic: Optional[Dict] = None,
+    vocab: Optional[Dict] = None
+) -> GraphAnalysis:
+    """
+    DB 없이 Mermaid 텍스트 1건을 분석해서 graph_analysis만 돌려줌.
+    감점/대안/perf까지 필요하면 analyze_mermaid를 쓰거나 calc_penalties(spof, 병목, 단일 링크)를 호출.
+    availability(무작위 장애 시 가용성 nines)는 항상 계산.
+    traffic(시나리오 traffic_json)을 주면 load(노드별 예상 부하/사용률)와 latency(P50/P95/P99, SLA 비교)도 채움
+    (이때만 NumPy import).
+    vocab(시나리오 역할 어휘, 예: {"queue": ["outbox"]})을 주면 기본 어휘에 더해서 노드 역할을 분류.
+
+    예:
+      from graph_analysis import analyze
+      ga = analyze(text, {"entry": "U", "redundant": ["LB"]}, {"qps_peak": 200})
+      ga["spof_candidates"], ga["critical_edges"], ga["bottleneck_candidates"], ga["load"], ga["latency"]
+    """
+    return analyze_mermaid(mermaid_text, hints=hints, traffic=traffic, vocab=vocab)["graph_analysis"]
@@ -0,0 +1,323 @@
+# -----------------------------
+# graph_blocks.py
+# 목적: core를 biconnected block(2-연결 요소)으로 나눠서, 수정 제출에서는 바뀐 block만 다시 계산
+# - decompose: entry를 루트로 한 block-cut tree (graph_csr.biconnected_blocks) + block마다 노드별 "매달린 노드 수"
+# 1) SPOF / 단일 링크 (spof_blocks → scoped_spof, scoped_critical_edges)
+#    - entry→exit 경로는 block-cut tree 경로 위 단절점을 모두 지나고, 단절점 사이 구간은 한 block 안에만 있음
+#      → 지배자 = 경로 위 단절점 ∪ 각 block 안에서 (들어오는 노드 → 나가는 노드) 지배자, 단일 링크도 block 안에서 같음
+#    - block 몫은 (block 안 방향 엣지, 들어오는 노드, 나가는 노드들)로만 정해짐 → 이 키가 직전 분석에 있으면
+#      직전 SPOF/단일 링크 중 그 block 몫을 그대로 쓰고, 없는 block만 block 안 dominator tree를 새로 만듦
+#    - bridge(노드 2개) block은 키 없이 바로: 들어오는 쪽 → 나가는 쪽 엣지가 단일 링크
+# 2) betweenness (block_betweenness, exact 모드만)
+#    - block 분해(Puzis et al.): (s, t) 최단 경로는 block-cut tree 경로를 따라가고 block 안 구간은 block 안 최단 경로
+#      → bc(v) = Σ_{v가 속한 block B} L_B(v) + (v를 지우면 갈라지는 쌍 수)
+#        L_B(v) = Σ_{x≠y∈B} d_B(x)·d_B(y)·(x→y 최단 경로 중 v를 지나는 비율),  d_B(x) = B 밖으로 x에 매달린 노드 수(x 포함)
+#      → block마다 source |B|번 가중 BFS (graph_csr.weighted_dependencies)
+#    - L_B는 d_B에 대해 쌍선형 → block 엣지는 같고 d_B만 바뀌었으면(다른 block에 노드 추가/삭제)
+#      바뀐 노드 x마다 BFS 1번: L'(v) = L(v) + Σ_x Δd(x) · δ_x(v; 가중치 d + d')
+#      d_B까지 같으면 L_B를 그대로 씀
+# 3) 다음 수정 제출을 위해 남기는 것 (graph_analysis.blocks): 엔진 태그, SPOF 쪽 block 키, exact betweenness block 표
+# 참고:
+# - 키에 엔진 태그가 들어가므로 다른 엔진 버전이 만든 block 몫은 재사용되지 않음
+# - 재사용해도 결과는 전체 계산과 같음 (betweenness는 부동소수 합 순서 차이 정도, tests/test_graph_blocks.py)
+# - sampled betweenness는 block으로 나누지 않음: pivot 표본이 core 전체에서 뽑히고 오차 폭이 pivot별 의존도의
+#   분산이라 block 몫으로 갈라지지 않음 → exact 모드일 때만 block 표를 만들고, sampled면 병목 단계는 전체 계산
+# -----------------------------
+
+import hashlib
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from graph_csr import CSRGraph, weighted_dependencies
+
+# block 노드 수 × 이 값이 전체 노드 수 이상이면 block 그래프를 따로 만들지 않고 g에서 block mask로 계산
+# (dominator 구간 계산이 노드 수만큼 훑으므로 작은 block은 작은 그래프가, 큰 block은 g가 쌈)
+LOCAL_GRAPH_MAX_SHARE = 4
+
+
+class CoreBlocks:
+    """
+    core의 block 분해 (entry가 core 안이면 entry가 루트).
+    blocks[i][0] = 루트 쪽 노드, weight[i] = {노드: d_B(노드)}, size[i] = block i가 속한 연결 요소 노드 수.
+    csr: core의 무방향 CSR (CSRGraph.undirected, block_betweenness에서 다시 씀)
+    """
+
+    __slots__ = ("root", "blocks", "weight", "size", "csr")
+
+    def __init__(
+        self,
+        root: Optional[int],
+        blocks: List[List[int]],
+        weight: List[Dict[int, int]],
+        size: List[int],
+        csr: Tuple[array, array]
+    ):
+        self.root = root
+        self.blocks = blocks
+        self.weight = weight
+        self.size = size
+        self.csr = csr
+
+
+def decompose(g: CSRGraph, core_mask: bytearray, entry: Optional[str]) -> CoreBlocks:
+    """core mask → CoreBlocks (block-cut tree 후위 순서로 한 번 훑어서 매달린 노드 수 계산)."""
+    root = g.index.get(entry) if entry else None
+    if root is not None and not core_mask[root]:
+        root = None
+    csr = g.undirected(core_mask)
+    blocks, _ = g.biconnected_blocks(core_mask, root, csr)
+
+    below: Dict[int, int] = {}            # 노드 아래(루트 반대쪽)에 매달린 노드 수 (자기 포함)
+    weight: List[Dict[int, int]] = []
+    hanging: List[int] = []               # block 아래 노드 수 (block[0] 쪽 제외)
+    for b in blocks:
+        w = {x: below.get(x, 1) for x in b[1:]}
+        s = sum(w.values())
+        below[b[0]] = below.get(b[0], 1) + s
+        weight.append(w)
+        hanging.append(s)
+
+    # 역순 = 부모 block 먼저 → 연결 요소 크기(루트의 below)를 내려보내고 block[0]의 d_B를 채움
+    comp: Dict[int, int] = {}
+    size = [0] * len(blocks)
+    for i in range(len(blocks) - 1, -1, -1):
+        b = blocks[i]
+        nc = comp.get(b[0]) or below[b[0]]
+        for x in b:
+            comp[x] = nc
+        size[i] = nc
+        weight[i][b[0]] = nc - hanging[i]
+    return CoreBlocks(root, blocks, weight, size, csr)
+
+
+def block_key(tag: str, parts: List[str], edges: List[Tuple[str, str]]) -> str:
+    """block 재사용 키: 엔진 태그 + 포트 등 + 정렬된 엣지의 해시."""
+    h = hashlib.sha1()
+    h.update(tag.encode("utf-8"))
+    for p in parts:
+        h.update(f"\t{p}".encode("utf-8"))
+    h.update(b"\n")
+    for a, b in edges:
+        h.update(f"{a}\t{b}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+# ========== SPOF / 단일 링크 ==========
+def spof_blocks(
+    g: CSRGraph,
+    cb: CoreBlocks,
+    exits: List[str],
+    core_mask: bytearray,
+    tag: str
+) -> List[Tuple[List[int], int, List[int], Optional[List[Tuple[str, str]]], Optional[str]]]:
+    """
+    entry→exit 경로가 지나는 block: (block, 들어오는 노드, 나가는 노드들, block 안 방향 엣지, 키) 목록.
+    나가는 노드 = exit이거나 그 아래(entry 반대쪽)에 exit이 있는 노드. bridge는 엣지/키 없이 None.
+    entry가 core 밖이거나 어느 exit에도 못 가면(core_mask가 전체 그래프로 대체된 경우) 빈 목록.
+    """
+    root = cb.root
+    n = len(g)
+    if root is None:
+        return []
+    exit_ids = [g.index[e] for e in exits if e in g and core_mask[g.index[e]] and g.index[e] != root]
+    if not exit_ids:
+        return []
+    if core_mask.count(0) == 0:           # 전체 그래프 = core가 없어서 대체됐을 수 있음 → 실제로 닿는지 확인
+        seen = g.reach([root], mask=core_mask)
+        if not any(seen[t] for t in exit_ids):
+            return []
+
+    ids, off, adj = g.ids, g.fwd_off, g.fwd_adj
+    toward = bytearray(n)                  # 이 노드 아래에 exit이 있음 (exit 자신 포함)
+    for t in exit_ids:
+        toward[t] = 1
+    inside = bytearray(n)
+    found = []
+    for b in cb.blocks:                   # 후위 순서 → 하위 block의 toward가 먼저 채워짐
+        out = [x for x in b[1:] if toward[x]]
+        if not out:
+            continue
+        a = b[0]
+        toward[a] = 1
+        if len(b) == 2:
+            found.append((b, a, out, None, None))
+            continue
+        for v in b:
+            inside[v] = 1
+        edges = sorted((ids[v], ids[adj[k]]) for v in b for k in range(off[v], off[v + 1]) if inside[adj[k]])
+        for v in b:
+            inside[v] = 0
+        key = block_key(tag, [ids[a], *sorted(ids[x] for x in out)], edges)
+        found.append((b, a, out, edges, key))
+    return found
+
+
+def scoped_spof(
+    g: CSRGraph,
+    relevant: List[Tuple],
+    entry: Optional[str],
+    exits: List[str],
+    redundant: Set[str],
+    previous: Dict
+) -> Tuple[List[str], Dict[str, Tuple], Dict]:
+    """
+    spof_blocks 결과로 SPOF 후보 계산 (compute_spof_csr와 같은 결과, 같은 노드 순서).
+    previous: 직전 graph_analysis (blocks.spof 키, spof_candidates) — 키가 있는 block은 직전 몫 재사용
+    반환: (SPOF 후보, 새로 계산한 block의 {키: (그래프, block mask, 루트, 나가는 노드, idom)}, 단계 기록)
+          작은 block은 block 엣지로 만든 작은 그래프(mask None), 큰 block은 g + block mask
+    """
+    ids = g.ids
+    prev_keys = set((previous.get("blocks") or {}).get("spof") or ())
+    prev_spofs = set(previous.get("spof_candidates") or ())
+    dominators: Set[str] = set()
+    local: Dict[str, Tuple] = {}
+    stats = {"mode": "scoped", "blocks": 0, "reused": 0, "recomputed": 0, "work": 0}
+
+    for b, a, out, edges, key in relevant:
+        if ids[a] != entry:
+            dominators.add(ids[a])             # 경로 위 단절점
+        if edges is None:
+            continue
+        stats["blocks"] += 1
+        if key in prev_keys:
+            stats["reused"] += 1
+            ports = {a, *out}
+            dominators.update(ids[x] for x in b if x not in ports and ids[x] in prev_spofs)
+            continue
+        stats["recomputed"] += 1
+        stats["work"] += len(b) + len(edges)
+        if len(b) * LOCAL_GRAPH_MAX_SHARE < len(g):
+            sub, mask = CSRGraph.from_edges(edges), None
+            r = sub.index[ids[a]]
+            targets = [sub.index[ids[x]] for x in out]
+        else:                                  # 큰 block: 작은 그래프를 새로 만드는 비용이 더 큼 → block mask로 g에서 바로
+            sub, mask, r, targets = g, bytearray(len(g)), a, out
+            for v in b:
+                mask[v] = 1
+        idom = sub.immediate_dominators(r, mask)
+        for t in targets:
+            v = idom[t]
+            while v not in (r, -1):
+                dominators.add(sub.ids[v])
+                v = idom[v]
+        local[key] = (sub, mask, r, targets, idom)
+
+    excluded = {entry} | set(exits) | set(redundant)
+    return sorted(dominators - excluded, key=g.index.__getitem__), local, stats
+
+
+def scoped_critical_edges(
+    g: CSRGraph,
+    relevant: List[Tuple],
+    local: Dict[str, Tuple],
+    previous: Dict
+) -> Tuple[List[List[str]], Dict]:
+    """
+    spof_blocks 결과로 단일 링크 계산 (compute_critical_edges_csr와 같은 결과, 같은 순서).
+    local: scoped_spof가 새로 만든 block dominator tree (그 block만 다시 계산, 나머지는 직전 몫)
+    """
+    ids = g.ids
+    prev_critical = {tuple(e) for e in previous.get("critical_edges") or ()}
+    found: List[Tuple[str, str]] = []
+    stats = {"mode": "scoped", "blocks": 0, "reused": 0, "recomputed": 0, "work": 0}
+
+    for b, a, out, edges, key in relevant:
+        if edges is None:
+            found.append((ids[a], ids[out[0]]))
+            continue
+        stats["blocks"] += 1
+        if key not in local:
+            stats["reused"] += 1
+            found.extend(e for e in edges if e in prev_critical)
+            continue
+        stats["recomputed"] += 1
+        stats["work"] += len(b) + len(edges)
+        sub, mask, r, targets, idom = local[key]
+        found.extend((sub.ids[u], sub.ids[v]) for u, v in sub.critical_edges(r, targets, mask, idom))
+
+    index = g.index
+    found.sort(key=lambda e: (index[e[0]], index[e[1]]))
+    return [list(e) for e in found], stats
+
+
+# ========== betweenness (exact) ==========
+def block_betweenness(
+    g: CSRGraph,
+    core_mask: bytearray,
+    cb: CoreBlocks,
+    tag: str,
+    previous: Optional[Dict] = None
+) -> Tuple[Dict[int, float], Dict[str, Dict[str, List]], Dict]:
+    """
+    core의 exact 정규화 betweenness를 block 단위로 계산 (CSRGraph.betweenness(mask)와 같은 값).
+    previous: 직전 분석의 block 표 {키: {노드: [d_B, L_B]}} — 엣지가 같은 block은 재사용/갱신
+    반환: (bc, 이번 block 표, 단계 기록)
+    """
+    ids = g.ids
+    off, adj = cb.csr
+    n_core = sum(core_mask)
+    previous = previous or {}
+
+    inside = bytearray(len(g))
+    raw: Dict[int, float] = {}
+    split: Dict[int, float] = {}        # Σ_B (n_c - d_B(v))²: v를 지웠을 때 갈라지는 조각 크기 제곱합
+    comp: Dict[int, int] = {}
+    table: Dict[str, Dict[str, List]] = {}
+    stats = {"mode": "scoped" if previous else "full", "blocks": 0, "reused": 0, "updated": 0, "recomputed": 0,
+             "work": 0, "full_work": 0}
+
+    for b, weight, nc in zip(cb.blocks, cb.weight, cb.size):
+        for v in b:
+            split[v] = split.get(v, 0) + (nc - weight[v]) ** 2
+            comp[v] = nc
+        if len(b) < 3:                  # bridge: 끝점만 있으므로 block 안 몫 0
+            continue
+
+        for v in b:
+            inside[v] = 1
+        edges = []
+        for v in b:
+            for k in range(off[v], off[v + 1]):
+                w = adj[k]
+                if inside[w] and v < w:
+                    edges.append((ids[v], ids[w]) if ids[v] < ids[w] else (ids[w], ids[v]))
+        edges.sort()
+        key = block_key(tag, [], edges)
+        bfs = len(b) + 2 * len(edges)
+        stats["blocks"] += 1
+        stats["full_work"] += len(b) * bfs
+
+        prev = previous.get(key)
+        if prev is None:
+            stats["recomputed"] += 1
+            stats["work"] += len(b) * bfs
+            local = dict.fromkeys(b, 0.0)
+            for x in b:
+                dx = weight[x]
+                for v, dv in weighted_dependencies(off, adj, inside, x, weight).items():
+                    local[v] += dx * dv
+        else:
+            old = {v: prev[ids[v]] for v in b}
+            local = {v: old[v][1] for v in b}
+            changed = [(x, weight[x] - old[x][0]) for x in b if weight[x] != old[x][0]]
+            if changed:
+                stats["updated"] += 1
+                stats["work"] += len(changed) * bfs
+                both = {v: weight[v] + old[v][0] for v in b}
+                for x, dx in changed:
+                    for v, dv in weighted_dependencies(off, adj, inside, x, both).items():
+                        local[v] += dx * dv
+            else:
+                stats["reused"] += 1
+        for v in b:
+            inside[v] = 0
+            raw[v] = raw.get(v, 0.0) + local[v]
+        table[key] = {ids[v]: [weight[v], local[v]] for v in b}
+
+    N = n_core - 1
+    scale = 1.0 / (N * (N - 1)) if N >= 2 else 1.0
+    bc = {
+        v: (raw.get(v, 0.0) + (comp[v] - 1) ** 2 - split[v]) * scale if v in comp else 0.0
+        for v in range(len(g)) if core_mask[v]
+    }
+    return bc, table, stats
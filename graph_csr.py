@@ -0,0 +1,713 @@
+# -----------------------------
+# graph_csr.py
+# 목적: 분석 단계용 압축 그래프 (CSR, compressed sparse row)
+# - 노드 id(문자열)를 0..n-1 정수로 interning (엣지 목록에 처음 등장한 순서)
+# - 정방향/역방향 인접 리스트를 offsets + targets 두 배열로 저장 (array('i'))
+# - core 추출 / 도달성 / dominator(SPOF) / 단일 링크(critical edge) / disjoint 경로(max-flow) / SCC /
+#   biconnected block·단절점 / betweenness를 이 배열 위에서 계산
+#   → 노드 1만 개 다이어그램도 dict-of-dict 복사(subgraph().copy(), to_undirected(), reverse()) 없이
+#     배열 몇 개만 할당
+# 참고:
+# - 부분 그래프는 복사하지 않고 bytearray mask(1=포함)로 표현
+# - dominator: 반복 교집합 방식(Cooper-Harvey-Kennedy), betweenness: Brandes (무방향, 정규화)
+#   (sampled 모드는 seed 고정 → 같은 그래프면 같은 pivot, 같은 값)
+#   BetweennessSampler: pivot을 나눠서 늘릴 수 있음 (앞에서 돌린 BFS 결과에 이어서 누적)
+#   weighted_dependencies: block 안에서만 도는 가중 Brandes BFS 1번 (graph_blocks.py의 block 단위 중앙성용)
+# -----------------------------
+
+import itertools
+import random
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+class CSRGraph:
+    """정수 id 기반 방향 그래프 (정방향/역방향 CSR)."""
+
+    __slots__ = ("ids", "index", "fwd_off", "fwd_adj", "rev_off", "rev_adj")
+
+    def __init__(self, ids: List[str], index: Dict[str, int], fwd_off, fwd_adj, rev_off, rev_adj):
+        self.ids = ids
+        self.index = index
+        self.fwd_off = fwd_off
+        self.fwd_adj = fwd_adj
+        self.rev_off = rev_off
+        self.rev_adj = rev_adj
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str]]) -> "CSRGraph":
+        """(a, b) 엣지 목록 → CSR. 중복 엣지는 1개로 취급."""
+        index: Dict[str, int] = {}
+        ids: List[str] = []
+        src = array("i")
+        dst = array("i")
+        seen: Set[Tuple[int, int]] = set()
+
+        for a, b in edges:
+            for x in (a, b):
+                if x not in index:
+                    index[x] = len(ids)
+                    ids.append(x)
+            ia, ib = index[a], index[b]
+            if (ia, ib) in seen:
+                continue
+            seen.add((ia, ib))
+            src.append(ia)
+            dst.append(ib)
+
+        n = len(ids)
+        fwd_off, fwd_adj = _build_csr(n, src, dst)
+        rev_off, rev_adj = _build_csr(n, dst, src)
+        return cls(ids, index, fwd_off, fwd_adj, rev_off, rev_adj)
+
+    # ---------- 노드 조회 / 차수 (choose_entry_exit 등) ----------
+    def __contains__(self, node) -> bool:
+        return node in self.index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nodes(self) -> List[str]:
+        return self.ids
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.fwd_adj)
+
+    def in_degree(self, node: str) -> int:
+        i = self.index[node]
+        return self.rev_off[i + 1] - self.rev_off[i]
+
+    def out_degree(self, node: str) -> int:
+        i = self.index[node]
+        return self.fwd_off[i + 1] - self.fwd_off[i]
+
+    # ---------- 기본 연산 ----------
+    def mask_of(self, nodes: Iterable[str]) -> bytearray:
+        mask = bytearray(len(self.ids))
+        for x in nodes:
+            i = self.index.get(x)
+            if i is not None:
+                mask[i] = 1
+        return mask
+
+    def nodes_of(self, mask: bytearray) -> List[str]:
+        return [self.ids[i] for i in range(len(self.ids)) if mask[i]]
+
+    def reach(self, sources: Sequence[int], reverse: bool = False, mask: Optional[bytearray] = None) -> bytearray:
+        """sources에서 (역)방향으로 도달 가능한 노드 mask. mask가 있으면 그 안에서만 이동."""
+        off, adj = (self.rev_off, self.rev_adj) if reverse else (self.fwd_off, self.fwd_adj)
+        seen = bytearray(len(self.ids))
+        stack = []
+        for s in sources:
+            if not seen[s] and (mask is None or mask[s]):
+                seen[s] = 1
+                stack.append(s)
+        while stack:
+            v = stack.pop()
+            for k in range(off[v], off[v + 1]):
+                w = adj[k]
+                if not seen[w] and (mask is None or mask[w]):
+                    seen[w] = 1
+                    stack.append(w)
+        return seen
+
+    def core_mask(self, entry: Optional[str], exits: List[str]) -> bytearray:
+        """entry에서 도달 가능 ∩ 어떤 exit으로든 도달 가능한 노드. 없으면 전체."""
+        n = len(self.ids)
+        full = bytearray(b"\x01") * n
+        if not entry or entry not in self.index or not exits:
+            return full
+
+        exit_ids = [self.index[e] for e in exits if e in self.index]
+        if not exit_ids:
+            return full
+
+        fwd = self.reach([self.index[entry]])
+        rev = self.reach(exit_ids, reverse=True)
+        core = bytearray(a & b for a, b in zip(fwd, rev))
+        return core if any(core) else full
+
+    def subgraph_edges(self, mask: bytearray) -> List[Tuple[str, str]]:
+        """mask 안 노드끼리의 엣지 (id 문자열)."""
+        ids, off, adj = self.ids, self.fwd_off, self.fwd_adj
+        return [
+            (ids[v], ids[adj[k]])
+            for v in range(len(ids)) if mask[v]
+            for k in range(off[v], off[v + 1]) if mask[adj[k]]
+        ]
+
+    def masked_degrees(self, mask: bytearray) -> Tuple[array, array]:
+        """mask 부분 그래프 안에서의 (in_degree, out_degree) 배열."""
+        n = len(self.ids)
+        indeg = array("i", [0]) * n
+        outdeg = array("i", [0]) * n
+        off, adj = self.fwd_off, self.fwd_adj
+        for v in range(n):
+            if not mask[v]:
+                continue
+            for k in range(off[v], off[v + 1]):
+                w = adj[k]
+                if mask[w]:
+                    outdeg[v] += 1
+                    indeg[w] += 1
+        return indeg, outdeg
+
+    # ---------- SPOF: dominator tree ----------
+    def immediate_dominators(self, entry: int, mask: Optional[bytearray] = None) -> array:
+        """
+        Cooper-Harvey-Kennedy 반복 알고리즘. idom[v] (entry는 자기 자신, 도달 불가는 -1).
+        """
+        n = len(self.ids)
+        order = self._postorder(entry, mask)           # 후위 순서
+        post_num = array("i", [-1]) * n
+        for i, v in enumerate(order):
+            post_num[v] = i
+
+        idom = array("i", [-1]) * n
+        idom[entry] = entry
+        rev_off, rev_adj = self.rev_off, self.rev_adj
+
+        changed = True
+        while changed:
+            changed = False
+            for v in reversed(order):                  # 역후위 순서
+                if v == entry:
+                    continue
+                new = -1
+                for k in range(rev_off[v], rev_off[v + 1]):
+                    p = rev_adj[k]
+                    if idom[p] == -1:
+                        continue
+                    if new == -1:
+                        new = p
+                        continue
+                    a, b = p, new                      # intersect
+                    while a != b:
+                        while post_num[a] < post_num[b]:
+                            a = idom[a]
+                        while post_num[b] < post_num[a]:
+                            b = idom[b]
+                    new = a
+                if new != -1 and idom[v] != new:
+                    idom[v] = new
+                    changed = True
+        return idom
+
+    def dominator_intervals(self, root: int, idom: array) -> Tuple[array, array]:
+        """
+        dominator tree 전위 진입/탈출 번호 (tin, tout).
+        u가 v를 지배 ⇔ tin[u] <= tin[v] and tout[v] <= tout[u] → O(1) 질의.
+        """
+        n = len(self.ids)
+        child_off = array("i", [0]) * (n + 1)
+        for v in range(n):
+            if idom[v] != -1 and v != root:
+                child_off[idom[v] + 1] += 1
+        for v in range(n):
+            child_off[v + 1] += child_off[v]
+        children = array("i", [0]) * child_off[n]
+        fill = array("i", child_off[:n])
+        for v in range(n):
+            if idom[v] != -1 and v != root:
+                p = idom[v]
+                children[fill[p]] = v
+                fill[p] += 1
+
+        tin = array("i", [-1]) * n
+        tout = array("i", [-1]) * n
+        t = 0
+        tin[root] = t
+        stack = [(root, child_off[root])]
+        while stack:
+            v, k = stack[-1]
+            if k < child_off[v + 1]:
+                stack[-1] = (v, k + 1)
+                w = children[k]
+                t += 1
+                tin[w] = t
+                stack.append((w, child_off[w]))
+            else:
+                stack.pop()
+                tout[v] = t
+        return tin, tout
+
+    def critical_edges(
+        self,
+        root: int,
+        targets: Sequence[int],
+        mask: Optional[bytearray] = None,
+        idom: Optional[array] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        제거하면 root에서 targets 중 하나라도 도달 불가가 되는 엣지 (u, v) 목록 (dominator tree 순서).
+        엣지 (u, v)가 root→t의 모든 경로에 있음 ⇔
+          v가 t를 지배하고, v로 들어오는 엣지 중 v가 지배하지 않는 (도달 가능한) 선행 노드가 u 하나뿐.
+        → dominator tree 1번 + 지배 체인 위 노드의 in-edge 1번씩 = O(V+E).
+        """
+        if idom is None:
+            idom = self.immediate_dominators(root, mask)
+        tin, tout = self.dominator_intervals(root, idom)
+        rev_off, rev_adj = self.rev_off, self.rev_adj
+
+        seen = bytearray(len(self.ids))
+        found: List[Tuple[int, int]] = []
+        for t in targets:
+            v = t
+            if idom[v] == -1:
+                continue
+            while v != root and not seen[v]:
+                seen[v] = 1
+                u, entering = -1, 0
+                for k in range(rev_off[v], rev_off[v + 1]):
+                    p = rev_adj[k]
+                    if idom[p] == -1:                          # mask 밖 / 도달 불가
+                        continue
+                    if tin[v] <= tin[p] and tout[p] <= tout[v]:  # v를 거쳐 되돌아오는 엣지
+                        continue
+                    u = p
+                    entering += 1
+                    if entering > 1:
+                        break
+                if entering == 1:
+                    found.append((u, v))
+                v = idom[v]
+
+        found.sort(key=lambda e: tin[e[1]])
+        return found
+
+    def _postorder(self, root: int, mask: Optional[bytearray]) -> List[int]:
+        off, adj = self.fwd_off, self.fwd_adj
+        seen = bytearray(len(self.ids))
+        seen[root] = 1
+        order: List[int] = []
+        stack = [(root, off[root])]
+        while stack:
+            v, k = stack[-1]
+            if k < off[v + 1]:
+                stack[-1] = (v, k + 1)
+                w = adj[k]
+                if not seen[w] and (mask is None or mask[w]):
+                    seen[w] = 1
+                    stack.append((w, off[w]))
+            else:
+                stack.pop()
+                order.append(v)
+        return order
+
+    # ---------- 강연결 요소 (재시도 사이클) ----------
+    def strongly_connected_components(self, mask: bytearray) -> List[List[int]]:
+        """mask 부분 그래프의 SCC (반복 Tarjan). 반환 순서 = 역위상 순서 (하류 SCC가 먼저)."""
+        n = len(self.ids)
+        off, adj = self.fwd_off, self.fwd_adj
+        index = array("i", [-1]) * n
+        low = array("i", [0]) * n
+        on_stack = bytearray(n)
+        stack: List[int] = []
+        comps: List[List[int]] = []
+        t = 0
+
+        for root in range(n):
+            if not mask[root] or index[root] != -1:
+                continue
+            index[root] = low[root] = t
+            t += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, off[root])]
+            while work:
+                v, k = work[-1]
+                if k < off[v + 1]:
+                    work[-1] = (v, k + 1)
+                    w = adj[k]
+                    if not mask[w]:
+                        continue
+                    if index[w] == -1:
+                        index[w] = low[w] = t
+                        t += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        work.append((w, off[w]))
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                else:
+                    work.pop()
+                    if work:
+                        p = work[-1][0]
+                        if low[v] < low[p]:
+                            low[p] = low[v]
+                    if low[v] == index[v]:
+                        comp = []
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = 0
+                            comp.append(w)
+                            if w == v:
+                                break
+                        comps.append(comp)
+        return comps
+
+    # ---------- 이중화 정도: node-disjoint 경로 / 최소 vertex cut ----------
+    def disjoint_paths(
+        self,
+        root: int,
+        targets: Sequence[int],
+        mask: bytearray,
+        uncuttable: Optional[bytearray] = None,
+        limit: int = 64
+    ) -> Tuple[int, Optional[List[int]]]:
+        """
+        root → targets(슈퍼 싱크로 묶음) node-disjoint 경로 수와 최소 vertex cut.
+        노드 분할 그래프(v_in → v_out 용량 1) 위 max-flow (Edmonds-Karp, 증강 1번 = BFS 1번).
+        - uncuttable 노드(root, redundant 등)와 노드 사이 엣지는 용량 limit → cut에 들어가지 않음
+        - 경로 수가 limit에 도달하면 (limit, None): 사실상 끊을 수 없는 구조
+        반환: (경로 수, cut 노드 목록)  경로 수 k = 최소 cut 크기 (Menger)
+        """
+        n = len(self.ids)
+        sink = 2 * n
+        head = [-1] * (2 * n + 1)
+        nxt: List[int] = []
+        to: List[int] = []
+        cap: List[int] = []
+
+        def add(a: int, b: int, c: int):
+            to.append(b); cap.append(c); nxt.append(head[a]); head[a] = len(to) - 1
+            to.append(a); cap.append(0); nxt.append(head[b]); head[b] = len(to) - 1
+
+        off, adj = self.fwd_off, self.fwd_adj
+        for v in range(n):
+            if not mask[v]:
+                continue
+            add(2 * v, 2 * v + 1, limit if v == root or (uncuttable and uncuttable[v]) else 1)
+            for k in range(off[v], off[v + 1]):
+                w = adj[k]
+                if w != v and mask[w]:
+                    add(2 * v + 1, 2 * w, limit)
+        for t in set(targets):
+            if mask[t] and t != root:
+                add(2 * t + 1, sink, limit)
+
+        source = 2 * root + 1
+        flow = 0
+        while flow < limit:
+            parent_edge = [-1] * (2 * n + 1)
+            parent_edge[source] = -2
+            queue = [source]
+            for a in queue:                                # BFS (리스트에 append하며 순회)
+                if a == sink:
+                    break
+                e = head[a]
+                while e != -1:
+                    b = to[e]
+                    if cap[e] > 0 and parent_edge[b] == -1:
+                        parent_edge[b] = e
+                        queue.append(b)
+                    e = nxt[e]
+            if parent_edge[sink] == -1:
+                break
+
+            push = limit - flow
+            b = sink
+            while b != source:
+                e = parent_edge[b]
+                push = min(push, cap[e])
+                b = to[e ^ 1]
+            b = sink
+            while b != source:
+                e = parent_edge[b]
+                cap[e] -= push
+                cap[e ^ 1] += push
+                b = to[e ^ 1]
+            flow += push
+
+        if flow >= limit:
+            return limit, None
+
+        # 잔여 그래프에서 source 쪽 집합 S: v_in ∈ S, v_out ∉ S 인 노드가 최소 cut
+        side = bytearray(2 * n + 1)
+        side[source] = 1
+        stack = [source]
+        while stack:
+            a = stack.pop()
+            e = head[a]
+            while e != -1:
+                b = to[e]
+                if cap[e] > 0 and not side[b]:
+                    side[b] = 1
+                    stack.append(b)
+                e = nxt[e]
+        return flow, [v for v in range(n) if mask[v] and side[2 * v] and not side[2 * v + 1]]
+
+    # ---------- 무방향 뷰 ----------
+    def undirected(self, mask: bytearray) -> Tuple[array, array]:
+        """mask 부분 그래프의 무방향 CSR (양방향 엣지/자기 루프 제거)."""
+        n = len(self.ids)
+        fwd_off, fwd_adj, rev_off, rev_adj = self.fwd_off, self.fwd_adj, self.rev_off, self.rev_adj
+        off = array("i", [0]) * (n + 1)
+        adj = array("i")
+        for v in range(n):
+            if mask[v]:
+                nbrs = dict.fromkeys(fwd_adj[fwd_off[v]:fwd_off[v + 1]])
+                nbrs.update(dict.fromkeys(rev_adj[rev_off[v]:rev_off[v + 1]]))
+                adj.extend([w for w in nbrs if w != v and mask[w]])
+            off[v + 1] = len(adj)
+        return off, adj
+
+    def biconnected_blocks(
+        self,
+        mask: bytearray,
+        root: Optional[int] = None,
+        csr: Optional[Tuple[array, array]] = None
+    ) -> Tuple[List[List[int]], bytearray]:
+        """
+        무방향 부분 그래프의 biconnected block(2-연결 요소)과 단절점 mask (반복 Hopcroft-Tarjan, 재귀 없음).
+        DFS는 root부터(주면), 나머지 연결 요소는 번호 순으로 시작.
+        csr: 이미 만든 undirected(mask) 결과 (호출자가 block 안 계산에 다시 쓸 때)
+        - block[0] = DFS 루트 쪽 노드 (root 기준 block-cut tree에서 block의 부모 단절점, 루트 block이면 루트)
+        - 반환 순서 = block-cut tree 후위 순서 (하위 block이 먼저), 연결 요소끼리는 이어서 나옴
+        - bridge는 노드 2개짜리 block, 인접 노드가 없는 노드는 어느 block에도 없음
+        """
+        n = len(self.ids)
+        off, adj = csr or self.undirected(mask)
+        disc = array("i", [-1]) * n
+        low = array("i", [0]) * n
+        parent = array("i", [-1]) * n
+        nxt = array("i", off)                      # 노드별 다음에 볼 인접 칸 (DFS 스택에 튜플을 만들지 않음)
+        is_cut = bytearray(n)
+        blocks: List[List[int]] = []
+        visited: List[int] = []                    # 발견 순서 스택 (block이 닫히면 그만큼 꺼냄)
+        t = 0
+
+        starts = range(n) if root is None else itertools.chain((root,), range(n))
+        for r in starts:
+            if not mask[r] or disc[r] != -1:
+                continue
+            disc[r] = low[r] = t
+            t += 1
+            root_children = 0
+            stack = [r]
+            while stack:
+                v = stack[-1]
+                k = nxt[v]
+                if k < off[v + 1]:
+                    nxt[v] = k + 1
+                    w = adj[k]
+                    if disc[w] == -1:
+                        parent[w] = v
+                        disc[w] = low[w] = t
+                        t += 1
+                        visited.append(w)
+                        if v == r:
+                            root_children += 1
+                        stack.append(w)
+                    elif w != parent[v] and disc[w] < low[v]:
+                        low[v] = disc[w]
+                else:
+                    stack.pop()
+                    p = parent[v]
+                    if p == -1:
+                        continue
+                    if low[v] < low[p]:
+                        low[p] = low[v]
+                    if low[v] >= disc[p]:                 # p 아래로 v 서브트리가 닫힘 → block 1개
+                        if p != r:
+                            is_cut[p] = 1
+                        block = [p]
+                        while True:
+                            w = visited.pop()
+                            block.append(w)
+                            if w == v:
+                                break
+                        blocks.append(block)
+            if root_children > 1:
+                is_cut[r] = 1
+
+        return blocks, is_cut
+
+    # ---------- 병목: betweenness ----------
+    def betweenness(
+        self,
+        mask: bytearray,
+        k: Optional[int] = None,
+        seed: Optional[int] = None,
+        errors: Optional[Dict[int, float]] = None
+    ) -> Dict[int, float]:
+        """
+        무방향 부분 그래프의 정규화 betweenness (Brandes).
+        k가 있으면 seed 고정으로 pivot k개만 비복원 추출해서 사용 (같은 seed면 같은 샘플).
+        errors: k가 있을 때 노드별 표준오차(정규화 단위)를 채움 (BetweennessSampler.values 참고).
+        pivot을 나눠서 늘려가려면 BetweennessSampler를 직접 사용.
+        """
+        sampler = BetweennessSampler(self, mask, seed if k is not None else None)
+        sampler.extend(len(sampler.nodes) if k is None else k)
+        return sampler.values(errors if k is not None else None, exact=k is None)
+
+
+class BetweennessSampler:
+    """
+    pivot 샘플 betweenness를 pivot을 늘려가며 계산 (앞에서 돌린 BFS는 다시 돌리지 않음).
+    pivot 순서 = seed 고정으로 섞은 노드 순서 → 앞 k개는 언제나 크기 k 비복원 표본,
+    extend(k2)는 k..k2번째 pivot만 BFS해서 누적 (seed가 None이면 노드 순서 그대로 = exact용).
+    csr: 이미 만든 g.undirected(mask) 결과 (graph_blocks.CoreBlocks.csr, 없으면 새로 만듦)
+    """
+
+    def __init__(
+        self,
+        g: CSRGraph,
+        mask: bytearray,
+        seed: Optional[int] = None,
+        csr: Optional[Tuple[array, array]] = None
+    ):
+        n = len(g.ids)
+        self.nodes = [v for v in range(n) if mask[v]]
+        self.order = random.Random(seed).sample(self.nodes, len(self.nodes)) if seed is not None else self.nodes
+        self.k = 0
+        self._off, self._adj = csr or g.undirected(mask)
+        self._bc = [0.0] * n
+        self._sq = [0.0] * n
+        self._sigma = [0.0] * n                # 경로 수는 금방 아주 커지므로 float
+        self._dist = array("i", [-1]) * n
+        self._delta = [0.0] * n
+        self._preds: List[List[int]] = [[] for _ in range(n)]
+
+    def extend(self, k: int):
+        """pivot을 k개까지 늘림 (이미 k개 이상이면 그대로)."""
+        k = min(k, len(self.order))
+        off, adj = self._off, self._adj
+        bc, sq, sigma, dist, delta, preds = self._bc, self._sq, self._sigma, self._dist, self._delta, self._preds
+
+        for s in self.order[self.k:k]:
+            order: List[int] = []
+            sigma[s] = 1.0
+            dist[s] = 0
+            queue = [s]
+            head = 0
+            while head < len(queue):
+                v = queue[head]
+                head += 1
+                order.append(v)
+                dv = dist[v] + 1
+                for i in range(off[v], off[v + 1]):
+                    w = adj[i]
+                    if dist[w] < 0:
+                        dist[w] = dv
+                        queue.append(w)
+                    if dist[w] == dv:
+                        sigma[w] += sigma[v]
+                        preds[w].append(v)
+
+            while order:
+                w = order.pop()
+                coeff = (1.0 + delta[w]) / sigma[w]
+                for v in preds[w]:
+                    delta[v] += sigma[v] * coeff
+                if w != s:
+                    bc[w] += delta[w]
+                    sq[w] += delta[w] * delta[w]
+                # 다음 source를 위해 방문한 칸만 초기화
+                sigma[w] = 0.0
+                dist[w] = -1
+                delta[w] = 0.0
+                preds[w] = []
+        self.k = max(self.k, k)
+
+    def values(self, errors: Optional[Dict[int, float]] = None, exact: bool = False) -> Dict[int, float]:
+        """
+        지금까지 pivot으로 추정한 정규화 betweenness (exact: 전체 노드를 돌린 exact 정규화).
+        errors: 노드별 표준오차(정규화 단위)를 채움 — pivot별 의존도의 분산에서 추정,
+                비복원 추출이라 k가 노드 수에 가까우면 0에 가까워짐.
+                k < 2면 분산을 추정할 수 없으므로 inf (값 자체를 믿을 수 없음).
+        """
+        nodes, k, bc, sq = self.nodes, self.k, self._bc, self._sq
+        scales = _bc_scales(len(nodes), nodes, self.order[:k], None if exact else k)
+        if errors is not None and k < 2:
+            for v in nodes:
+                errors[v] = float("inf")
+        elif errors is not None:
+            fpc = (len(nodes) - k) / (len(nodes) - 1) if len(nodes) > 1 else 0.0
+            for v, sc in zip(nodes, scales):
+                mean = bc[v] / k
+                var = max(0.0, sq[v] / k - mean * mean)
+                errors[v] = sc * (k * var * fpc) ** 0.5
+        return {v: bc[v] * sc for v, sc in zip(nodes, scales)}
+
+
+def _bc_scales(n: int, nodes: List[int], sources: List[int], k: Optional[int]):
+    """
+    노드별 정규화 계수 (끝점 제외, 무방향).
+    - 전체: 1 / ((n-1)(n-2))  (무방향이라 s→t / t→s를 두 번 센 것까지 반영)
+    - 샘플 k개: 합을 (n-1)/k배로 외삽한 값에 같은 정규화 → 1 / (k(n-2)),
+      pivot으로 뽑힌 노드는 자기 자신에게서는 몫을 못 받으므로 k 대신 k-1 → 1 / ((k-1)(n-2))
+      (k = 1이면 유일한 pivot은 값을 받을 곳이 없으므로 0, k = 0이면 전부 0)
+    """
+    N = n - 1
+    if N < 2:
+        return [1.0] * n
+    if k is None:
+        return [1.0 / (N * (N - 1))] * n
+    if k < 1:
+        return [0.0] * n
+    src = set(sources)
+    scale_source = 1.0 / ((k - 1) * (N - 1)) if k > 1 else 0.0
+    scale_nonsource = 1.0 / (k * (N - 1))
+    return [scale_source if v in src else scale_nonsource for v in nodes]
+
+
+def weighted_dependencies(
+    off: array,
+    adj: array,
+    inside: bytearray,
+    source: int,
+    weight: Dict[int, float]
+) -> Dict[int, float]:
+    """
+    무방향 CSR(undirected 결과)에서 inside 노드만 지나는 BFS 1번으로 source의 가중 의존도 (Brandes 누적).
+    δ(v) = Σ_t weight[t] · σ_st(v) / σ_st  (t ≠ source, v),  weight는 inside 노드마다 있어야 함
+    block 단위 betweenness에서 block 밖에 매달린 노드 수를 weight로 실어 보낼 때 씀 (graph_blocks.py).
+    반환: source에서 닿는 inside 노드별 δ (source 자신은 0).
+    """
+    dist = {source: 0}
+    sigma = {source: 1.0}
+    preds: Dict[int, List[int]] = {source: []}
+    queue = [source]
+    head = 0
+    while head < len(queue):
+        v = queue[head]
+        head += 1
+        dv = dist[v] + 1
+        for i in range(off[v], off[v + 1]):
+            w = adj[i]
+            if not inside[w]:
+                continue
+            if w not in dist:
+                dist[w] = dv
+                sigma[w] = 0.0
+                preds[w] = []
+                queue.append(w)
+            if dist[w] == dv:
+                sigma[w] += sigma[v]
+                preds[w].append(v)
+
+    delta = dict.fromkeys(queue, 0.0)
+    for w in reversed(queue):
+        coeff = (weight[w] + delta[w]) / sigma[w]
+        for v in preds[w]:
+            delta[v] += sigma[v] * coeff
+    delta[source] = 0.0
+    return delta
+
+
+def _build_csr(n: int, src: array, dst: array) -> Tuple[array, array]:
+    """(src[i] → dst[i]) 목록 → (offsets, targets). 같은 src 안에서는 입력 순서 유지."""
+    off = array("i", [0]) * (n + 1)
+    for s in src:
+        off[s + 1] += 1
+    for i in range(n):
+        off[i + 1] += off[i]
+    pos = array("i", off[:n])
+    adj = array("i", [0]) * len(src)
+    for s, d in zip(src, dst):
+        adj[pos[s]] = d
+        pos[s] += 1
+    return off, adj
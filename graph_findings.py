@@ -0,0 +1,245 @@
+# -----------------------------
+# graph_findings.py
+# 목적: 그래프 채점의 원재료(파싱 엣지 / Stage 1 기준 점수 / SPOF·병목 등 원시 탐지 결과)를 압축 저장하고,
+#       감점 정책(SPOF_PENALTY_PER 등)이 바뀌면 Mermaid 재파싱·재분석 없이 전체 점수를 일괄 재계산
+# 1) 저장: 결과 반영과 같은 트랜잭션에서 system_graph_findings(db_06_graph_findings.sql)에 upsert
+#    - graph_json: {"nodes": [id, ...], "edges": [[i, j], ...]} (노드 id interning)
+#    - findings_json: spof / bottleneck / critical_edges / redundancy / overloaded / exceeds_sla / below_target
+#    - base_score: 그래프 감점 전 점수 (Stage 1 + Cap)
+# 2) 재채점(--rescore): findings만 읽어서 calc_penalties → 최종 점수 = max(0, base_score - 감점)
+#    - 항상 base_score에서 다시 빼므로 몇 번을 돌려도 같은 결과 (이중 감점 없음)
+#    - 그래프 flag는 지우고 다시 계산, Stage 1 flag는 유지
+#    - score_breakdown_json은 JSON_SET으로 meta.graph_penalty만 교체 (전체를 읽고 쓰지 않음)
+#    - 바뀐 row만 갱신 + 시나리오 통계(score_stats) 증분 반영, chunk 단위 트랜잭션
+# 참고:
+# - Mermaid 텍스트 / networkx / 그래프 분석 단계는 쓰지 않음
+# - db_06을 아직 안 돌렸으면 경고 후 저장만 건너뜀 (채점은 그대로)
+# 사용 예:
+#   python graph_findings.py --rescore                 # 현재 감점 정책으로 전체 재채점
+#   python graph_findings.py --rescore --dry-run       # 바뀔 건수만 확인
+# -----------------------------
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from graph_analysis import GRAPH_FLAGS, calc_penalties, engine_version, graph_flags
+from score_stats import apply_stats_delta, fetch_contributions, result_contribution, stats_delta
+
+
+RESCORE_CHUNK_SIZE = 500
+
+_ER_NO_SUCH_TABLE = 1146
+_findings_enabled = True
+
+FINDINGS_UPSERT_SQL = (
+    "INSERT INTO system_graph_findings "
+    "(submission_id, base_score, engine_version, graph_json, findings_json) "
+    "VALUES (%s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE base_score=VALUES(base_score), engine_version=VALUES(engine_version), "
+    "graph_json=VALUES(graph_json), findings_json=VALUES(findings_json)"
+)
+
+# 재채점 결과 일괄 반영 (grading_db.RESULT_BULK_UPDATE_SQL과 같은 multi-row upsert 형태)
+# - row는 항상 있으므로 UPDATE 경로로만 감
+# - score_breakdown_json 자리에는 새 meta.graph_penalty만 넘기고, 기존 문서에 JSON_SET으로 끼워 넣음
+RESCORE_BULK_UPDATE_SQL = (
+    "INSERT INTO system_results (submission_id, score_total, score_breakdown_json, risk_flags_json) "
+    "VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE score_total=VALUES(score_total), risk_flags_json=VALUES(risk_flags_json), "
+    "score_breakdown_json=JSON_SET(score_breakdown_json, '$.meta.graph_penalty', "
+    "CAST(VALUES(score_breakdown_json) AS JSON))"
+)
+
+
+def compact_graph(edges: Sequence[Tuple[str, str]]) -> Dict:
+    """[(a, b)] → {"nodes": [...], "edges": [[i, j], ...]} (노드 id는 처음 나온 순서로 번호)."""
+    index: Dict[str, int] = {}
+    pairs = []
+    for a, b in edges:
+        pairs.append([index.setdefault(a, len(index)), index.setdefault(b, len(index))])
+    return {"nodes": list(index), "edges": pairs}
+
+
+def expand_graph(graph: Dict) -> List[Tuple[str, str]]:
+    nodes = graph["nodes"]
+    return [(nodes[i], nodes[j]) for i, j in graph["edges"]]
+
+
+def compact_findings(graph_analysis: Dict) -> Dict:
+    """감점/flag/통계를 다시 계산하는 데 필요한 원시 탐지 결과만."""
+    return {
+        "spof": graph_analysis.get("spof_candidates") or [],
+        "bottleneck": [b["node"] for b in graph_analysis.get("bottleneck_candidates") or []],
+        "critical_edges": graph_analysis.get("critical_edges") or [],
+        "redundancy": graph_analysis.get("redundancy"),
+        "overloaded": (graph_analysis.get("load") or {}).get("overloaded") or [],
+        "exceeds_sla": bool((graph_analysis.get("latency") or {}).get("exceeds_sla")),
+        "below_target": bool((graph_analysis.get("availability") or {}).get("below_target")),
+    }
+
+
+def findings_analysis(findings: Dict) -> Dict:
+    """findings → calc_penalties / graph_flags / 통계가 읽는 graph_analysis 모양의 dict."""
+    return {
+        "spof_candidates": findings["spof"],
+        "bottleneck_candidates": [{"node": n} for n in findings["bottleneck"]],
+        "critical_edges": findings["critical_edges"],
+        "redundancy": findings["redundancy"],
+        "load": {"overloaded": findings["overloaded"]},
+        "latency": {"exceeds_sla": findings["exceeds_sla"]},
+        "availability": {"below_target": findings["below_target"]},
+    }
+
+
+def findings_row(
+    submission_id: int,
+    base_score: int,
+    graph_analysis: Dict,
+    edges: Sequence[Tuple[str, str]]
+) -> Tuple:
+    """FINDINGS_UPSERT_SQL 파라미터."""
+    return (
+        submission_id,
+        int(base_score),
+        engine_version(),
+        json.dumps(compact_graph(edges), ensure_ascii=False, separators=(",", ":")),
+        json.dumps(compact_findings(graph_analysis), ensure_ascii=False, separators=(",", ":")),
+    )
+
+
+def save_findings(conn, rows: List[Tuple]):
+    """findings 일괄 upsert (커밋은 호출자가 결과 반영과 함께). 테이블이 없으면 경고 후 건너뜀."""
+    global _findings_enabled
+    if not rows or not _findings_enabled:
+        return
+    cur = conn.cursor()
+    try:
+        cur.executemany(FINDINGS_UPSERT_SQL, rows)
+    except Exception as e:
+        # MySQL은 실패한 문장만 취소하므로 결과 반영 트랜잭션은 그대로
+        if getattr(e, "errno", None) == _ER_NO_SUCH_TABLE:
+            print("⚠️  system_graph_findings 테이블이 없습니다. db_06_graph_findings.sql 실행 전까지 저장을 건너뜁니다.")
+            _findings_enabled = False
+            return
+        raise
+    finally:
+        cur.close()
+
+
+def _json(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def rescore_row(row: Dict) -> Optional[Tuple[int, Dict, List[str], Dict]]:
+    """
+    findings + 현재 결과 row → (새 점수, graph_penalty, 새 flag 목록, graph_analysis 모양 dict).
+    현재 값과 같으면 None (갱신 불필요).
+    """
+    ga = findings_analysis(_json(row["findings_json"]))
+    penalty_info = calc_penalties(
+        ga["spof_candidates"], ga["bottleneck_candidates"], ga["critical_edges"], ga["redundancy"]
+    )
+    base = int(row["base_score"])
+    score = max(0, base - int(penalty_info["total_penalty"]))
+    graph_penalty = {"old_score_total": base, "new_score_total": score, **penalty_info}
+
+    old_flags = _json(row["risk_flags_json"]) or []
+    flags = sorted({f for f in old_flags if f not in GRAPH_FLAGS} | graph_flags(ga, penalty_info))
+
+    if (
+        score == row["score_total"]
+        and set(flags) == set(old_flags)
+        and _json(row["graph_penalty"]) == graph_penalty
+    ):
+        return None
+    return score, graph_penalty, flags, ga
+
+
+def rescore_all(conn, chunk_size: int = RESCORE_CHUNK_SIZE, dry_run: bool = False) -> Dict[str, int]:
+    """findings가 있는 전체 결과를 현재 감점 정책으로 재계산 (submission_id keyset, chunk마다 커밋)."""
+    totals = {"scanned": 0, "updated": 0}
+    last_id = 0
+    while True:
+        cur = conn.cursor(dictionary=True)
+        try:
+            cur.execute(
+                "SELECT f.submission_id, f.base_score, f.findings_json, r.score_total, r.risk_flags_json, "
+                "JSON_EXTRACT(r.score_breakdown_json, '$.meta.graph_penalty') AS graph_penalty "
+                "FROM system_graph_findings f JOIN system_results r ON r.submission_id = f.submission_id "
+                "WHERE f.submission_id > %s ORDER BY f.submission_id LIMIT %s FOR UPDATE",
+                (last_id, chunk_size)
+            )
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+        if not rows:
+            break
+        last_id = rows[-1]["submission_id"]
+        totals["scanned"] += len(rows)
+
+        changed = {}
+        for row in rows:
+            out = rescore_row(row)
+            if out is not None:
+                changed[row["submission_id"]] = out
+        totals["updated"] += len(changed)
+
+        if dry_run or not changed:
+            conn.rollback()
+        else:
+            try:
+                previous = fetch_contributions(conn, list(changed))
+                cur = conn.cursor()
+                try:
+                    cur.executemany(RESCORE_BULK_UPDATE_SQL, [
+                        (sid, score, json.dumps(gp, ensure_ascii=False), json.dumps(flags, ensure_ascii=False))
+                        for sid, (score, gp, flags, _) in changed.items()
+                    ])
+                finally:
+                    cur.close()
+                if previous is not None:
+                    apply_stats_delta(conn, stats_delta(previous, {
+                        sid: result_contribution((score, None, flags), ga, gp)
+                        for sid, (score, gp, flags, ga) in changed.items()
+                    }))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        if len(rows) < chunk_size:
+            break
+    return totals
+
+
+def main() -> int:
+    # review_SPOF_bottleneck이 이 모듈을 import하므로 DB 연결 함수는 실행 시점에 가져옴
+    from review_SPOF_bottleneck import get_db_connection
+
+    parser = argparse.ArgumentParser(description="저장된 그래프 탐지 결과로 감점/최종 점수 일괄 재계산")
+    parser.add_argument("--rescore", action="store_true", help="현재 감점 정책으로 전체 재채점")
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE, help="트랜잭션 1회당 row 수")
+    parser.add_argument("--dry-run", action="store_true", help="바뀔 건수만 세고 반영하지 않음")
+    args = parser.parse_args()
+    if not args.rescore:
+        parser.error("--rescore를 지정하세요")
+
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        totals = rescore_all(conn, args.chunk_size, args.dry_run)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    verb = "변경 예정" if args.dry_run else "갱신"
+    print(f"✅ 재채점 완료: {totals['scanned']}건 확인, {totals['updated']}건 {verb} ({elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# -----------------------------
+# graph_rewrite.py
+# 목적: 분석 결과(SPOF/병목/부하/지연)를 보고 파싱한 그래프를 직접 고쳐서 대안 다이어그램(Mermaid)을 만듦
+#       → system_results.alternative_mermaid_text (텍스트 제안은 coach_summary에 그대로)
+# 재작성 (이 순서로, 각 단계는 바꾼 노드의 이웃만 건드림 → O(차수)):
+# 1) 무거운 서비스 앞 큐: 용량 초과 / SLA 초과 주범 / service·api·worker 병목
+#    (LB/gateway·DB·vector·캐시 역할이 하나라도 있으면 큐 대상에서 제외)
+#    preds → Q → H   (Q는 3노드 클러스터 → redundant 표시)
+# 2) 상태 저장 노드 앞 read-through 캐시: fan-in ≥ REWRITE_CACHE_MIN_FANIN인 DB·store·vector 병목
+#    + 용량 초과 / SLA 초과 주범인 DB·store·vector (fan-in 무관)
+#    preds → C → B 를 추가하고 preds → B(쓰기/미스)는 유지
+# 3) SPOF 복제: preds → LB → {S, S 레플리카} → succs   (LB는 Active-Standby → redundant 표시)
+#    S가 이미 LB/gateway면 LB 없이 레플리카만 같은 preds/succs에 연결
+# 증분 SPOF 검증:
+# - 단계마다 바뀐 노드의 pred/succ 집합만 보고 불변식을 확인하고 SPOF 집합을 갱신
+#   (큐: H의 pred가 Q 하나 → 기존 dominator 관계 유지, 새 SPOF는 redundant인 Q뿐
+#    캐시: C를 거치는 경로마다 C를 건너뛰는 경로가 있음 → 변화 없음
+#    복제: S와 레플리카가 같은 pred/succ → S만 SPOF에서 빠짐)
+# - 끝에서 재작성된 그래프에 dominator 기반 SPOF 탐지를 한 번 돌려 확인 (O(V+E), 병목/가용성 등은 다시 안 돌림)
+# 참고:
+# - 노드 역할(서비스/상태 저장/큐/LB)은 분석 단계에서 만든 node_roles.NodeRoles를 그대로 씀
+# - 새 sink/source를 만들지 않으므로 entry/exit 자동 선택이 바뀌지 않음, entry(와 exit 1개면 exit)는 주석으로 고정
+# - 수치 모델 주석(%% capacity 등)은 옮기지 않음
+# -----------------------------
+
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from node_roles import BALANCER, CACHE, DB, LLM, QUEUE, SERVICE, VECTOR, WORKER, NodeRoles
+
+
+REWRITE_CACHE_MIN_FANIN = 3
+
+# 재작성 대상 역할 (node_roles 비트)
+QUEUE_TARGET_ROLES = SERVICE | WORKER | LLM
+CACHE_TARGET_ROLES = DB | VECTOR
+QUEUE_EXCLUDED_ROLES = BALANCER | DB | VECTOR | CACHE    # 역할이 겹쳐도 (예: "API Gateway") 큐 대상 아님
+
+LB_LABEL = "LB (Active-Standby)"
+QUEUE_LABEL = "Queue (3-node cluster)"
+CACHE_LABEL = "Read-through Cache"
+
+_HEADER_RE = re.compile(r"^\s*(?:graph|flowchart)\s+(TB|TD|BT|RL|LR)\b", re.MULTILINE)
+
+
+def mermaid_direction(mermaid_text: str) -> str:
+    """원본 선언(graph LR 등)의 방향, 없으면 TD."""
+    m = _HEADER_RE.search(mermaid_text)
+    return m.group(1) if m else "TD"
+
+
+class RewriteGraph:
+    """삽입 순서를 유지하는 가변 인접 집합 (dict를 ordered set으로 사용)."""
+
+    def __init__(self, edges: Sequence[Tuple[str, str]]):
+        self.succ: Dict[str, Dict[str, None]] = {}
+        self.pred: Dict[str, Dict[str, None]] = {}
+        for a, b in edges:
+            self.add_edge(a, b)
+
+    def add_node(self, n: str):
+        self.succ.setdefault(n, {})
+        self.pred.setdefault(n, {})
+
+    def add_edge(self, a: str, b: str):
+        self.add_node(a)
+        self.add_node(b)
+        self.succ[a][b] = None
+        self.pred[b][a] = None
+
+    def remove_edge(self, a: str, b: str):
+        del self.succ[a][b]
+        del self.pred[b][a]
+
+    def fresh(self, base: str) -> str:
+        """base가 이미 있으면 base2, base3 ... (Mermaid 노드 id 규칙 [A-Za-z0-9_]를 그대로 따름)."""
+        name, i = base, 2
+        while name in self.succ:
+            name, i = f"{base}{i}", i + 1
+        return name
+
+    def edges(self) -> List[Tuple[str, str]]:
+        return [(a, b) for a, succs in self.succ.items() for b in succs]
+
+
+def insert_queue(g: RewriteGraph, node: str) -> Tuple[str, bool]:
+    """preds → Q → node. 반환: (Q, 불변식 확인 결과)."""
+    q = g.fresh(f"{node}_Q")
+    preds = list(g.pred[node])
+    for p in preds:
+        g.remove_edge(p, node)
+        g.add_edge(p, q)
+    g.add_edge(q, node)
+    ok = list(g.pred[node]) == [q] and list(g.pred[q]) == preds
+    return q, ok
+
+
+def insert_cache(g: RewriteGraph, node: str) -> Tuple[str, bool]:
+    """preds → C → node (기존 preds → node는 유지). 반환: (C, 불변식 확인 결과)."""
+    c = g.fresh(f"{node}_CACHE")
+    preds = list(g.pred[node])
+    for p in preds:
+        g.add_edge(p, c)
+    g.add_edge(c, node)
+    ok = list(g.succ[c]) == [node] and all(p in g.pred[node] for p in g.pred[c])
+    return c, ok
+
+
+def replicate(g: RewriteGraph, node: str, behind_lb: bool) -> Tuple[List[str], bool]:
+    """
+    node 레플리카 추가 (behind_lb면 preds → LB → {node, 레플리카}, 아니면 레플리카가 같은 preds를 받음).
+    반환: (추가한 노드 [LB?, 레플리카], 불변식 확인 결과)
+    """
+    replica = g.fresh(f"{node}_R2")
+    added = [replica]
+    preds = [p for p in g.pred[node] if p != node]
+    succs = [s for s in g.succ[node] if s != node]
+
+    if behind_lb:
+        lb = g.fresh(f"{node}_LB")
+        added.insert(0, lb)
+        for p in preds:
+            g.remove_edge(p, node)
+            g.add_edge(p, lb)
+        g.add_edge(lb, node)
+        g.add_edge(lb, replica)
+    else:
+        for p in preds:
+            g.add_edge(p, replica)
+    for s in succs:
+        g.add_edge(replica, s)
+    if node in g.succ[node]:
+        g.add_edge(replica, replica)
+
+    same_pred = {p for p in g.pred[node] if p != node} == {p for p in g.pred[replica] if p != replica}
+    same_succ = {s for s in g.succ[node] if s != node} == {s for s in g.succ[replica] if s != replica}
+    return added, same_pred and same_succ
+
+
+def _pressure_nodes(graph_analysis: Dict) -> List[str]:
+    """용량 초과 노드 + SLA 초과 주범 (순서 유지)."""
+    nodes = list((graph_analysis.get("load") or {}).get("overloaded") or [])
+    latency = graph_analysis.get("latency") or {}
+    if latency.get("exceeds_sla") and latency.get("top_contributors"):
+        nodes.append(latency["top_contributors"][0]["node"])
+    return nodes
+
+
+def heavy_services(graph_analysis: Dict, roles: NodeRoles) -> List[str]:
+    """
+    큐를 앞에 둘 노드: 용량 초과 → SLA 초과 주범 → service/api/worker 병목 순 (중복 제거).
+    LB/gateway·DB·vector·캐시 역할이 있는 노드는 출처와 관계없이 제외 (상태 저장 노드는 캐시 단계로).
+    """
+    picked: Dict[str, None] = {}
+    for n in _pressure_nodes(graph_analysis):
+        if not roles.has(n, QUEUE_EXCLUDED_ROLES):
+            picked[n] = None
+    for bn in graph_analysis.get("bottleneck_candidates") or []:
+        n = bn["node"]
+        if roles.has(n, QUEUE_TARGET_ROLES) and not roles.has(n, QUEUE_EXCLUDED_ROLES):
+            picked[n] = None
+    return list(picked)
+
+
+def stateful_bottlenecks(graph_analysis: Dict, roles: NodeRoles) -> List[str]:
+    """캐시를 앞에 둘 노드: fan-in 높은 DB/vector 병목 → 용량 초과 / SLA 초과 주범인 DB/vector (중복 제거)."""
+    picked: Dict[str, None] = {}
+    for bn in graph_analysis.get("bottleneck_candidates") or []:
+        if (bn.get("fanin") or 0) >= REWRITE_CACHE_MIN_FANIN and roles.has(bn["node"], CACHE_TARGET_ROLES):
+            picked[bn["node"]] = None
+    for n in _pressure_nodes(graph_analysis):
+        if roles.has(n, CACHE_TARGET_ROLES):
+            picked[n] = None
+    return list(picked)
+
+
+def rewrite_graph(
+    edges: Sequence[Tuple[str, str]],
+    labels: Dict[str, str],
+    graph_analysis: Dict,
+    roles: Optional[NodeRoles] = None
+) -> Optional[Dict]:
+    """
+    graph_analysis(entry/exits/redundant_marked/spof_candidates/병목/부하/지연) 기준으로 그래프 재작성.
+    roles: 분석 단계의 노드 역할 (없으면 기본 어휘로 여기서 분류)
+    entry가 없으면 None.
+    반환: {"edges", "labels", "redundant", "steps": [{"op", "node", "added"}], "remaining_spof", "local_ok"}
+    """
+    entry = graph_analysis.get("entry")
+    exits = list(graph_analysis.get("exits") or [])
+    if not entry or not edges:
+        return None
+
+    g = RewriteGraph(edges)
+    if roles is None:
+        roles = NodeRoles.from_nodes(g.succ, labels)
+    added_roles: Dict[str, int] = {}     # 재작성으로 생긴 노드의 역할
+
+    def role_of(n: str) -> int:
+        return added_roles.get(n) or roles.of(n)
+
+    labels = dict(labels)
+    redundant = set(graph_analysis.get("redundant_marked") or [])
+    spofs = set(graph_analysis.get("spof_candidates") or [])
+    steps: List[Dict] = []
+    local_ok = True
+    fixed = {entry}
+    exit_set = set(exits)
+
+    # 1) 무거운 서비스 앞 큐 (이미 큐 뒤에 있거나 큐 자체면 생략)
+    for node in heavy_services(graph_analysis, roles):
+        if node in fixed or not g.pred.get(node) or role_of(node) & QUEUE:
+            continue
+        if all(role_of(p) & QUEUE for p in g.pred[node]):
+            continue
+        q, ok = insert_queue(g, node)
+        labels[q] = QUEUE_LABEL
+        added_roles[q] = QUEUE
+        redundant.add(q)
+        local_ok &= ok
+        fixed.add(node)
+        steps.append({"op": "queue", "node": node, "added": [q]})
+
+    # 2) 상태 저장 병목(fan-in 높음 / 용량·SLA 초과) 앞 캐시
+    for node in stateful_bottlenecks(graph_analysis, roles):
+        if node in fixed or not g.pred.get(node):
+            continue
+        c, ok = insert_cache(g, node)
+        labels[c] = CACHE_LABEL
+        added_roles[c] = CACHE
+        local_ok &= ok
+        fixed.add(node)
+        steps.append({"op": "cache", "node": node, "added": [c]})
+
+    # 3) SPOF 복제 (캐시/큐 삽입 뒤라 새 preds까지 LB 뒤로 들어감)
+    for node in graph_analysis.get("spof_candidates") or []:
+        if node not in g.pred or node == entry or node in exit_set:
+            continue
+        behind_lb = not role_of(node) & BALANCER
+        added, ok = replicate(g, node, behind_lb)
+        label = labels.get(node) or node
+        labels[added[-1]] = f"{label} (replica)"
+        if behind_lb:
+            labels[added[0]] = LB_LABEL
+            redundant.add(added[0])
+        local_ok &= ok
+        if ok:
+            spofs.discard(node)
+        steps.append({"op": "replicate", "node": node, "added": added})
+
+    return {
+        "edges": g.edges(),
+        "labels": labels,
+        "redundant": redundant,
+        "steps": steps,
+        "remaining_spof": sorted(spofs),
+        "local_ok": local_ok,
+    }
+
+
+def verify_spof_free(rewritten: Dict, entry: str, exits: List[str]) -> List[str]:
+    """재작성된 그래프에 SPOF 탐지를 한 번 실행 (core + dominator, O(V+E)). 반환: 남은 SPOF 목록."""
+    # graph_analysis가 이 모듈을 import하므로 실행 시점에 가져옴
+    from graph_analysis import compute_spof_csr
+    from graph_csr import CSRGraph
+
+    g = CSRGraph.from_edges(rewritten["edges"])
+    return compute_spof_csr(g, entry, exits, g.core_mask(entry, exits), rewritten["redundant"])
+
+
+def _mermaid_label(label: str) -> str:
+    return label.replace('"', "#quot;").replace("[", "(").replace("]", ")")
+
+
+def to_mermaid(
+    edges: Sequence[Tuple[str, str]],
+    labels: Dict[str, str],
+    entry: Optional[str],
+    exits: List[str],
+    redundant: Set[str],
+    direction: str = "TD"
+) -> str:
+    """재작성 결과 → Mermaid (힌트 주석 + 노드 선언 + 엣지, parse_mermaid_edges_and_labels로 다시 읽힘)."""
+    nodes: Dict[str, None] = {}
+    for a, b in edges:
+        nodes[a] = None
+        nodes[b] = None
+
+    lines = []
+    if entry:
+        lines.append(f"%% entry: {entry}")
+    if len(exits) == 1:
+        lines.append(f"%% exit: {exits[0]}")
+    marked = [n for n in nodes if n in redundant]
+    if marked:
+        lines.append(f"%% redundant: {', '.join(marked)}")
+    lines.append(f"graph {direction}")
+    for n in nodes:
+        if labels.get(n):
+            lines.append(f'  {n}["{_mermaid_label(labels[n])}"]')
+    for a, b in edges:
+        lines.append(f"  {a} --> {b}")
+    return "\n".join(lines) + "\n"
+
+
+def rewrite_summary(rewritten: Optional[Dict], remaining: List[str]) -> Optional[Dict]:
+    """graph_analysis.rewrite에 저장할 요약 (Mermaid 본문은 alternative_mermaid_text에만)."""
+    if rewritten is None:
+        return None
+    return {
+        "steps": rewritten["steps"],
+        "nodes_added": sum(len(s["added"]) for s in rewritten["steps"]),
+        "spof_free": not remaining,
+        "remaining_spof": remaining,
+        "incremental_ok": rewritten["local_ok"] and rewritten["remaining_spof"] == remaining,
+    }
+
+
+def alternative_mermaid(
+    edges: Sequence[Tuple[str, str]],
+    labels: Dict[str, str],
+    graph_analysis: Dict,
+    direction: str = "TD",
+    roles: Optional[NodeRoles] = None
+) -> Tuple[Optional[str], Optional[Dict]]:
+    """
+    재작성 + 검증 + 직렬화. 반환: (Mermaid 텍스트, 요약)
+    고칠 것이 없으면 (None, 요약), entry가 없으면 (None, None).
+    """
+    rewritten = rewrite_graph(edges, labels, graph_analysis, roles)
+    if rewritten is None:
+        return None, None
+    entry, exits = graph_analysis["entry"], list(graph_analysis.get("exits") or [])
+    if not rewritten["steps"]:
+        return None, rewrite_summary(rewritten, rewritten["remaining_spof"])
+
+    remaining = verify_spof_free(rewritten, entry, exits)
+    text = to_mermaid(rewritten["edges"], rewritten["labels"], entry, exits, rewritten["redundant"], direction)
+    return text, rewrite_summary(rewritten, remaining)
+
@@ -0,0 +1,97 @@
+# -----------------------------
+# incremental_review.py
+# 목적: 같은 사용자·같은 시나리오의 "수정 제출"을 직전 분석 결과 기준으로 다시 분석
+# 1) 직전 graph_analysis + 직전 엣지(system_graph_findings에 저장된 압축 그래프)를 analyze_mermaid에 넘김
+#    - core(entry→exit 경로) 서명이 같으면 SPOF~병목 단계를 모두 건너뛰고 재사용 (mode "reuse")
+#      (core 밖 곁가지 수정 — 감사로그/모니터링 추가 등 — 이 대부분)
+#    - 서명이 달라도 엣지 변경 비율이 REVISION_SCOPE_MAX_DIFF 이하면 바뀐 biconnected block만 다시 계산 (mode "scoped")
+#      SPOF/단일 링크: (block 엣지, 들어오는/나가는 노드)가 바뀐 block만 block 안 dominator tree
+#      병목 중앙성(exact): 엣지가 바뀐 block만 다시, 매달린 노드 수만 바뀐 block은 바뀐 노드당 BFS 1번으로 갱신
+#      이중화/가용성/부하/지연은 전체 계산 (graph_analysis.revision_scope, graph_blocks.py)
+#    - 직전 엣지/block 표가 없거나 변경이 크거나 redundant 표시가 바뀌었으면 전체 분석 (mode "recompute", reason)
+# 2) 단계별로 건너뛰거나 줄인 일을 meta.perf.scope[단계]에 기록
+#    - reused: 건너뜀 / scoped: blocks, reused, updated, recomputed, work, full_work, saved_work
+#      (work = 이번에 다시 계산한 block의 노드+엣지, 중앙성은 BFS 칸 수 / full_work = 전체 계산이었으면 한 일)
+#    - saved_ms: 그 단계의 기준 시간(마지막으로 전체 계산한 제출의 stages_ms) - 이번 시간
+# 3) 결과 요약을 graph_analysis.revision에 기록 (mode, 엣지 diff, 건너뛴/줄인 단계, baseline_ms, saved_ms)
+# 참고:
+# - Mermaid는 analyze_mermaid 안에서 한 번만 파싱 (직전 제출 원문은 읽지 않음)
+# - scoped 결과는 전체 분석과 같음 (tests/test_graph_blocks.py에서 무작위 수정본으로 비교)
+# - sampled 중앙성(core가 큰 그래프)은 block으로 나눌 수 없음: pivot 표본과 오차 폭이 core 전체에 걸쳐 있음
+#   → scoped여도 병목 단계는 전체 계산 (perf.scope.bottleneck = {"mode": "full", "reason": "sampled"})
+# -----------------------------
+
+import time
+from typing import Dict, Optional
+
+from graph_analysis import REUSED_STAGES, analyze_mermaid
+
+
+def baseline_cost(previous: Dict) -> Dict[str, float]:
+    """
+    단계별 기준 시간(ms) = 마지막으로 전체 계산했을 때 걸린 시간:
+    직전 revision.baseline_ms(직전도 건너뛰거나 block 단위였던 단계는 이어받은 값), 없으면 직전 stages_ms.
+    둘 다 없는 단계(perf 기록 전 결과)는 빠짐.
+    """
+    stages_ms = previous.get("stages_ms") or {}
+    inherited = ((previous.get("graph_analysis") or {}).get("revision") or {}).get("baseline_ms") or {}
+    cost: Dict[str, float] = {}
+    for stage in REUSED_STAGES:
+        ms = inherited.get(stage, stages_ms.get(stage))
+        if ms is not None:
+            cost[stage] = ms
+    return cost
+
+
+def analyze_revision(
+    mermaid_text: str,
+    previous: Optional[Dict] = None,
+    traffic: Optional[Dict] = None,
+    vocab: Optional[Dict] = None
+) -> Dict:
+    """
+    수정 제출 분석 (서명이 같으면 재사용, 변경이 작으면 바뀐 block만 다시 계산, 아니면 전체 분석).
+    previous: {"submission_id", "graph_analysis", "stages_ms", "edges" (없으면 None)}
+              (grading_db.fetch_previous_analyses), 없으면 전체 분석.
+    traffic: 시나리오 traffic_json (부하 전파용, analyze_mermaid에 그대로 전달)
+    vocab: 시나리오 역할 어휘 (checklist_template_json.node_roles, analyze_mermaid에 그대로 전달)
+    """
+    started = time.perf_counter()
+    previous = previous or {}
+    prev_analysis = previous.get("graph_analysis")
+
+    result = analyze_mermaid(
+        mermaid_text, previous=prev_analysis, traffic=traffic, vocab=vocab, previous_edges=previous.get("edges")
+    )
+    scope = result["scope"]
+    perf = result["perf"]
+
+    # full: 직전 없음 / reuse / scoped / recompute: 전체 (reason)
+    info: Dict = {"mode": "full", "base_submission_id": None}
+    if prev_analysis:
+        info["mode"] = scope["mode"] if scope["mode"] in ("reuse", "scoped") else "recompute"
+        info["base_submission_id"] = previous["submission_id"]
+        for key in ("reason", "edges_added", "edges_removed", "diff_ratio"):
+            if key in scope:
+                info[key] = scope[key]
+
+    stage_scope = perf.get("scope") or {}
+    base = baseline_cost(previous) if prev_analysis else {}
+    baseline: Dict[str, float] = {}
+    saved: Dict[str, float] = {}
+    for stage in REUSED_STAGES:
+        st = stage_scope.get(stage) or {}
+        ms = perf["stages_ms"].get(stage)
+        if st.get("mode") in ("reused", "scoped") and stage in base:
+            baseline[stage] = base[stage]
+            saved[stage] = st["saved_ms"] = round(max(0.0, base[stage] - (ms or 0.0)), 3)
+        elif ms is not None:
+            baseline[stage] = ms
+    info["skipped_stages"] = [s for s in REUSED_STAGES if (stage_scope.get(s) or {}).get("mode") == "reused"]
+    info["scoped_stages"] = [s for s in REUSED_STAGES if (stage_scope.get(s) or {}).get("mode") == "scoped"]
+    info["baseline_ms"] = baseline
+    info["saved_ms"] = round(sum(saved.values()), 3)
+    info["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    result["graph_analysis"]["revision"] = info
+    return result
@@ -0,0 +1,254 @@
+# -----------------------------
+# latency_model.py
+# 목적: entry → exit 요청 지연시간 Monte Carlo 추정 → P50/P95/P99, 시나리오 SLA(sla_p95_latency_ms) 비교
+# 1) 경로: load_model과 같은 분배 비율로 entry에서 exit까지 무작위 경로를 샘플링
+#    (재시도 사이클도 비율대로 다시 돌고, exit에서 종료)
+# 2) 노드 지연: 로그정규 분포 (p50, p99로 모양 결정)
+#    %% latency: LLM=800/3000, VDB=30   (ms, "p50/p99" 또는 p50만 → p99 = p50 × DEFAULT_TAIL_RATIO)
+#    주석이 없으면 역할별 기본값 (node_roles.NodeRoles)
+# 3) 벡터화: 샘플 전체를 NumPy 배열로 한 칸씩 같이 전진 (노드 선택은 구간 누적합 + searchsorted 한 번)
+#    → 비용 = 샘플 수 × 걸음 수라, 샘플 수는 core의 최장 경로 깊이(SCC 축약 DAG, 사이클은 크기만큼)로 정함
+#      기본 100k 샘플, 깊으면 LATENCY_WORK_BUDGET 안에서 줄임
+#    → 다음 노드가 하나뿐이면 난수 없이 전진, 모든 샘플이 같은 노드에서 갈림길 없는 구간에 들어서면
+#      구간 전체를 (구간 노드 × 샘플) 블록으로 한 번에 샘플링 (긴 체인에서 걸음당 NumPy 호출을 없앰)
+# 참고:
+# - seed 고정 → 같은 입력이면 같은 백분위수 (캐시/증분 재사용과 일관)
+# - entry 노드(클라이언트)의 지연은 세지 않음
+# -----------------------------
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from graph_csr import CSRGraph
+from node_roles import BALANCER, CACHE, DB, LLM, QUEUE, VECTOR, NodeRoles, first_role_value
+from load_model import split_fractions
+
+
+# 역할별 기본 지연 (p50 ms, p99 ms), 위에서부터 먼저 맞는 것
+DEFAULT_LATENCY_MS: List[Tuple[int, Tuple[float, float]]] = [
+    (LLM, (800.0, 3000.0)),
+    (VECTOR, (20.0, 80.0)),
+    (CACHE, (1.0, 5.0)),
+    (QUEUE, (5.0, 30.0)),
+    (BALANCER, (2.0, 10.0)),
+    (DB, (5.0, 40.0)),
+]
+DEFAULT_SERVICE_LATENCY_MS = (10.0, 60.0)
+DEFAULT_TAIL_RATIO = 4.0          # p50만 적었을 때 p99 = p50 × 이 값
+
+LATENCY_SAMPLES = 100_000
+LATENCY_MIN_SAMPLES = 1_000
+LATENCY_WORK_BUDGET = 2_000_000   # 샘플 수 × 걸음 수(walk_depth) 상한 (깊은 그래프는 샘플 수를 줄임)
+LATENCY_SEED = 42
+RUN_BLOCK_ELEMS = 1_000_000       # 갈림길 없는 구간을 한 번에 그릴 때 난수 블록 크기 (구간 노드 수 × 샘플 수)
+LATENCY_TOP_CONTRIBUTORS = 3
+
+_Z99 = 2.3263478740408408         # 표준정규 99% 분위수
+
+
+def _numpy():
+    import numpy as np
+    return np
+
+
+def node_latency(roles: int, override=None) -> Tuple[float, float]:
+    """노드 1개의 (p50 ms, p99 ms). roles: 역할 비트마스크, override: 주석 값 (p50 또는 (p50, p99))."""
+    if override is not None:
+        if isinstance(override, (tuple, list)):
+            return float(override[0]), float(override[1])
+        return float(override), float(override) * DEFAULT_TAIL_RATIO
+    return first_role_value(roles, DEFAULT_LATENCY_MS, DEFAULT_SERVICE_LATENCY_MS)
+
+
+def lognormal_params(p50: float, p99: float) -> Tuple[float, float]:
+    """(p50, p99) → 로그정규 (mu, sigma). p50 <= 0이면 항상 0ms."""
+    if p50 <= 0:
+        return -math.inf, 0.0
+    return math.log(p50), max(0.0, math.log(max(p99, p50) / p50) / _Z99)
+
+
+def walk_depth(g: CSRGraph, core_mask: bytearray) -> int:
+    """
+    core 안 무작위 경로의 예상 최대 걸음 수: SCC 축약 DAG의 최장 경로 (SCC 하나는 노드 수만큼 걸음으로 침).
+    """
+    comps = g.strongly_connected_components(core_mask)   # 하류 SCC가 먼저
+    comp_of = {}
+    depth: List[int] = []
+    off, adj = g.fwd_off, g.fwd_adj
+    for c, comp in enumerate(comps):
+        for v in comp:
+            comp_of[v] = c
+        down = 0
+        for v in comp:
+            for k in range(off[v], off[v + 1]):
+                d = comp_of.get(adj[k])
+                if d is not None and d != c and depth[d] > down:
+                    down = depth[d]
+        depth.append(len(comp) + down)
+    return max(depth, default=0)
+
+
+def _straight_run(only_next: List[int], stop, u: int, limit: int) -> List[int]:
+    """u 다음부터 갈림길/exit 노드까지 (포함) 걸음이 정해진 노드들, 최대 limit개."""
+    run: List[int] = []
+    seen = set()
+    v = only_next[u]
+    while len(run) < limit and v not in seen:
+        run.append(v)
+        if stop[v] or only_next[v] < 0:
+            break
+        seen.add(v)
+        v = only_next[v]
+    return run
+
+
+def sample_count(depth: int) -> int:
+    return max(LATENCY_MIN_SAMPLES, min(LATENCY_SAMPLES, LATENCY_WORK_BUDGET // max(1, depth)))
+
+
+def estimate_latency(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    roles: NodeRoles,
+    traffic: Optional[Dict],
+    annotations: Optional[Dict] = None,
+    samples: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    entry → exit 지연 분포 요약. entry/exit이 없거나 entry에서 exit에 닿지 않으면 None.
+    반환: {"samples", "seed", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "sla_p95_ms", "exceeds_sla",
+           "truncated", "top_contributors": [{"node", "mean_ms", "share"}]}
+    """
+    if not entry or entry not in g or not exits:
+        return None
+    root = g.index[entry]
+    absorbing = g.mask_of(exits)
+    if not core_mask[root] or absorbing[root]:
+        return None
+    if not any(a and r for a, r in zip(absorbing, g.reach([root]))):
+        return None     # core가 전체 그래프(폴백)라 경로가 정의되지 않음
+
+    np = _numpy()
+    annotations = annotations or {}
+    n = len(g)
+    out = split_fractions(g, core_mask, absorbing, annotations.get("weight") or {})
+
+    # 노드별 구간 [start, end) 안의 누적 비율을 "노드 번호 + 누적합"으로 한 배열에 펼침
+    # → 위치 p에서 난수 u로 다음 노드 = dst[searchsorted(cum, p + u)]
+    end_l: List[int] = []
+    dst: List[int] = []
+    cum: List[float] = []
+    for u in range(n):
+        acc = 0.0
+        for v, f in out[u]:
+            acc += f
+            dst.append(v)
+            cum.append(u + acc)
+        end_l.append(len(dst))
+    end = np.array(end_l, dtype=np.int64)
+    dst_a = np.array(dst, dtype=np.int64)
+    cum_a = np.array(cum)
+    stop = np.array([bool(absorbing[v]) or not out[v] for v in range(n)])
+    # 다음 노드가 하나뿐이면 난수/searchsorted 없이 바로 (-1: 갈림길)
+    only_next_l = [out[v][0][0] if len(out[v]) == 1 else -1 for v in range(n)]
+    only_next = np.array(only_next_l, dtype=np.int64)
+
+    overrides = annotations.get("latency") or {}
+    mu = np.zeros(n)
+    sigma = np.zeros(n)
+    for v in range(n):
+        if core_mask[v]:
+            name = g.ids[v]
+            mu[v], sigma[v] = lognormal_params(*node_latency(roles.masks[v], overrides.get(name)))
+
+    depth = walk_depth(g, core_mask)
+    samples = samples or sample_count(depth)
+    rng = np.random.default_rng(LATENCY_SEED)
+    total = np.zeros(samples)
+    contrib = np.zeros(n)
+    # 아직 exit에 닿지 않은 샘플만 압축 배열로 들고 다님 (샘플 번호 / 현재 위치 / 누적 지연)
+    ids = np.arange(samples)
+    pos = np.full(samples, root, dtype=np.int64)
+    acc = np.zeros(samples)
+    # 노드별 기여는 모아 두었다가 n개 이상 쌓이면 bincount 한 번 (걸음마다 하면 O(n) × 걸음 수)
+    seen_nodes: List = []
+    seen_lat: List = []
+    pending = 0
+
+    # 사이클 없는 core는 depth 걸음 안에 끝남, 재시도 사이클은 그 4배까지 허용
+    max_steps = 4 * depth + 16
+    steps = 0
+    while steps < max_steps:
+        u = int(pos[0])
+        if only_next_l[u] >= 0 and (pos == u).all():
+            # 모든 샘플이 같은 노드에서 갈림길 없는 구간에 들어섬 → 구간 전체를 블록 단위로 한 번에
+            run = np.array(_straight_run(only_next_l, stop, u, max_steps - steps), dtype=np.int64)
+            rows = max(1, RUN_BLOCK_ELEMS // ids.size)
+            for b in range(0, run.size, rows):
+                block = run[b:b + rows]
+                lat = np.exp(mu[block, None] + sigma[block, None] * rng.standard_normal((block.size, ids.size)))
+                acc += lat.sum(axis=0)
+                contrib[block] += lat.sum(axis=1)
+            steps += run.size
+            last = int(run[-1])
+            if stop[last]:
+                total[ids] = acc
+                ids, acc = ids[:0], acc[:0]
+                break
+            pos[:] = last
+            continue
+
+        steps += 1
+        nxt = only_next[pos]
+        fork = np.flatnonzero(nxt < 0)
+        if fork.size:
+            p = pos[fork]
+            idx = np.searchsorted(cum_a, p + rng.random(fork.size), side="right")
+            nxt[fork] = dst_a[np.minimum(idx, end[p] - 1)]
+        lat = np.exp(mu[nxt] + sigma[nxt] * rng.standard_normal(ids.size))
+        acc += lat
+        seen_nodes.append(nxt)
+        seen_lat.append(lat)
+        pending += nxt.size
+        if pending >= n:
+            contrib += np.bincount(np.concatenate(seen_nodes), np.concatenate(seen_lat), minlength=n)
+            seen_nodes, seen_lat, pending = [], [], 0
+        done = stop[nxt]
+        if done.any():
+            total[ids[done]] = acc[done]
+            keep = ~done
+            ids, nxt, acc = ids[keep], nxt[keep], acc[keep]
+            if ids.size == 0:
+                break
+        pos = nxt
+    total[ids] = acc        # 걸음 상한까지 못 끝난 샘플 (truncated)
+    if seen_nodes:
+        contrib += np.bincount(np.concatenate(seen_nodes), np.concatenate(seen_lat), minlength=n)
+
+    p50, p95, p99 = (float(x) for x in np.percentile(total, [50, 95, 99]))
+    mean = float(total.mean())
+    sla = (traffic or {}).get("sla_p95_latency_ms")
+
+    per_request = contrib / samples
+    top = np.argsort(-per_request)[:LATENCY_TOP_CONTRIBUTORS]
+    return {
+        "samples": samples,
+        "seed": LATENCY_SEED,
+        "p50_ms": round(p50, 1),
+        "p95_ms": round(p95, 1),
+        "p99_ms": round(p99, 1),
+        "mean_ms": round(mean, 1),
+        "sla_p95_ms": sla,
+        "exceeds_sla": bool(sla) and p95 > float(sla),
+        "truncated": int(ids.size),
+        "top_contributors": [
+            {
+                "node": g.ids[v],
+                "mean_ms": round(float(per_request[v]), 1),
+                "share": round(float(per_request[v]) / mean, 3) if mean else 0.0,
+            }
+            for v in top.tolist() if per_request[v] > 0
+        ],
+    }
@@ -0,0 +1,254 @@
+# -----------------------------
+# load_model.py
+# 목적: 시나리오 traffic_json 기반 부하 전파 → 노드별 예상 부하(QPS) / 용량 대비 사용률
+# 1) 주입: entry에 qps_peak (없으면 event_rate_peak_per_sec → msg_fanout_peak_per_sec)
+#    qps_peak와 event_rate_peak_per_sec가 같이 있으면 이벤트는 core 안 broker/queue 노드에 추가 주입
+# 2) 분배: 노드의 나가는 엣지로 가중치 비율만큼 나눔 (기본 가중치 1 = 균등 분배)
+#    %% weight: GW->Search=3, Search->GW=0.1   (상대 가중치, 재시도 엣지는 작게)
+# 3) 풀이: L = 주입 + Pᵀ·L 을 SCC 단위 블록 삼각 시스템으로 풂
+#    - 사이클 없는 구간은 위상 순서로 한 번에 전파
+#    - 재시도 사이클(SCC)은 NumPy로 (I - Pᵀ) 블록을 직접 풂 (큰 SCC는 희소 행렬-벡터 곱 + 재시작 GMRES)
+#    - exit은 요청이 끝나는 곳(흡수)으로 보고 더 전파하지 않음 → 시스템이 항상 풀림
+# 4) 용량: %% capacity: DB=800, LLM=15  (인스턴스당 QPS) 또는 역할별 기본값, redundant 노드는 ×2
+#    (역할은 node_roles.NodeRoles에서 읽음 → 라벨을 다시 훑지 않음)
+# 참고:
+# - NumPy는 traffic이 주어졌을 때만 import (analyze() 기본 경로 콜드 스타트에 영향 없음)
+# -----------------------------
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from graph_csr import CSRGraph
+from node_roles import BALANCER, CACHE, DB, LLM, QUEUE, VECTOR, NodeRoles, first_role_value
+
+
+# 역할별 기본 용량 (인스턴스 1개 기준 QPS, 위에서부터 먼저 맞는 것)
+DEFAULT_CAPACITY_QPS: List[Tuple[int, float]] = [
+    (LLM, 20.0),
+    (VECTOR, 300.0),
+    (CACHE, 20000.0),
+    (QUEUE, 10000.0),
+    (BALANCER, 10000.0),
+    (DB, 800.0),
+]
+DEFAULT_SERVICE_CAPACITY_QPS = 1000.0
+REPLICA_FACTOR = 2.0              # redundant 표시 노드의 용량 배수
+
+# 이벤트 추가 주입 대상 역할 (qps_peak와 event_rate_peak_per_sec가 같이 있을 때)
+EVENT_NODE_ROLES = QUEUE
+
+# weight 0 이하로 적은 엣지도 이 비율만큼은 남김 (사이클이 exit 없이 닫혀 부하가 발산하지 않게)
+MIN_SPLIT_WEIGHT = 1e-3
+
+# 이 크기를 넘는 SCC는 밀집 행렬 대신 반복법(재시작 GMRES)으로 풂
+DENSE_SCC_MAX = 1500
+GMRES_RESTART = 50
+ITER_MAX = 5000              # 전체 matvec 횟수 상한
+ITER_TOL = 1e-10
+
+
+def _numpy():
+    import numpy as np
+    return np
+
+
+def entry_rates(traffic: Optional[Dict]) -> Tuple[float, float]:
+    """traffic_json → (entry 주입 QPS, broker 노드 추가 이벤트/s)."""
+    traffic = traffic or {}
+    qps = float(traffic.get("qps_peak") or 0)
+    events = float(traffic.get("event_rate_peak_per_sec") or 0)
+    if qps:
+        return qps, events
+    return events or float(traffic.get("msg_fanout_peak_per_sec") or 0), 0.0
+
+
+def node_capacity(roles: int, redundant: bool, override: Optional[float] = None) -> float:
+    """노드 1개의 처리 용량(QPS). roles: 역할 비트마스크 (NodeRoles.of)."""
+    if override is not None:
+        return override
+    capacity = first_role_value(roles, DEFAULT_CAPACITY_QPS, DEFAULT_SERVICE_CAPACITY_QPS)
+    return capacity * REPLICA_FACTOR if redundant else capacity
+
+
+def split_fractions(
+    g: CSRGraph,
+    core_mask: bytearray,
+    absorbing: bytearray,
+    weights: Dict[Tuple[str, str], float]
+) -> List[List[Tuple[int, float]]]:
+    """노드별 [(다음 노드, 분배 비율)] (core 밖 엣지 제외, exit은 빈 목록)."""
+    ids, off, adj = g.ids, g.fwd_off, g.fwd_adj
+    out: List[List[Tuple[int, float]]] = [[] for _ in range(len(ids))]
+    for u in range(len(ids)):
+        if not core_mask[u] or absorbing[u]:
+            continue
+        nxt = [adj[k] for k in range(off[u], off[u + 1]) if core_mask[adj[k]]]
+        if not weights:
+            out[u] = [(v, 1.0 / len(nxt)) for v in nxt]
+            continue
+        edges = [(v, max(MIN_SPLIT_WEIGHT, weights.get((ids[u], ids[v]), 1.0))) for v in nxt]
+        total = sum(w for _, w in edges)
+        out[u] = [(v, w / total) for v, w in edges]
+    return out
+
+
+def propagate_load(
+    g: CSRGraph,
+    core_mask: bytearray,
+    absorbing: bytearray,
+    out: List[List[Tuple[int, float]]],
+    inject: Dict[int, float]
+):
+    """
+    L = inject + Pᵀ·L 풀이 → 노드별 예상 부하 (리스트, core 밖은 0).
+    SCC를 위상 순서로 처리: 상류 SCC의 유출량이 하류 SCC의 우변(b)이 됨.
+    exit(absorbing)은 나가는 엣지가 있어도 흐름을 끝내므로 SCC 계산에서 빼고 마지막에 유입량만 받음.
+    사이클 없는 노드는 파이썬 float로 바로 전파하고, NumPy는 SCC 블록 풀이에만 씀.
+    """
+    np = _numpy()
+    n = len(g)
+    load = [0.0] * n
+    inflow = [0.0] * n
+    for v, rate in inject.items():
+        inflow[v] += rate
+
+    flow_mask = bytearray(c and not a for c, a in zip(core_mask, absorbing))
+    comps = g.strongly_connected_components(flow_mask)[::-1]     # 위상 순서 (상류부터)
+    comps += [[v] for v in range(n) if core_mask[v] and absorbing[v]]
+    comp_of = [-1] * n
+    for c, comp in enumerate(comps):
+        for v in comp:
+            comp_of[v] = c
+
+    for c, comp in enumerate(comps):
+        if len(comp) == 1 and all(v != comp[0] for v, _ in out[comp[0]]):
+            u = comp[0]
+            load[u] = inflow[u]
+        else:
+            x = _solve_scc(np, comp, comp_of, c, out, np.array([inflow[v] for v in comp]))
+            for v, lv in zip(comp, x.tolist()):
+                load[v] = lv
+        for u in comp:
+            lu = load[u]
+            if lu:
+                for v, f in out[u]:
+                    if comp_of[v] != c:
+                        inflow[v] += lu * f
+    return load
+
+
+def _solve_scc(np, comp: Sequence[int], comp_of: List[int], c: int, out, b):
+    """SCC 하나의 (I - Pᵀ)·L = b. 작으면 직접 풀이, 크면 재시작 GMRES (행렬은 만들지 않고 bincount로 곱)."""
+    local = {v: i for i, v in enumerate(comp)}
+    src, dst, frac = [], [], []
+    for u in comp:
+        for v, f in out[u]:
+            if comp_of[v] == c:
+                src.append(local[u])
+                dst.append(local[v])
+                frac.append(f)
+    s = len(comp)
+    src_a, dst_a, frac_a = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64), np.array(frac)
+
+    if s <= DENSE_SCC_MAX:
+        a = np.eye(s)
+        np.add.at(a, (dst_a, src_a), -frac_a)
+        return np.linalg.solve(a, b)
+
+    def matvec(x):
+        return x - np.bincount(dst_a, weights=frac_a * x[src_a], minlength=s)
+
+    # 재시작 GMRES(m): 재시도 비율이 커서 (I - Pᵀ)가 특이에 가까워도 잔차가 단조 감소
+    x = np.zeros(s)
+    stop = ITER_TOL * max(1.0, float(np.linalg.norm(b)))
+    m = min(GMRES_RESTART, s)
+    for _ in range(ITER_MAX // m + 1):
+        r = b - matvec(x)
+        beta = float(np.linalg.norm(r))
+        if beta <= stop:
+            break
+        q = np.zeros((m + 1, s))
+        h = np.zeros((m + 1, m))
+        q[0] = r / beta
+        k = 0
+        for k in range(m):
+            w = matvec(q[k])
+            for i in range(k + 1):
+                h[i, k] = q[i] @ w
+                w = w - h[i, k] * q[i]
+            h[k + 1, k] = np.linalg.norm(w)
+            if h[k + 1, k] <= 1e-14 * beta:
+                break
+            q[k + 1] = w / h[k + 1, k]
+        e1 = np.zeros(k + 2)
+        e1[0] = beta
+        y = np.linalg.lstsq(h[:k + 2, :k + 1], e1, rcond=None)[0]
+        x = x + q[:k + 1].T @ y
+    return x
+
+
+def compute_load(
+    g: CSRGraph,
+    entry: Optional[str],
+    exits: List[str],
+    core_mask: bytearray,
+    roles: NodeRoles,
+    redundant,
+    traffic: Optional[Dict],
+    annotations: Optional[Dict] = None
+) -> Optional[Dict[int, Tuple[float, float]]]:
+    """
+    노드별 (예상 부하 QPS, 용량 QPS). traffic이 없거나 entry가 core 밖이면 None.
+    annotations: parse_model_annotations() 결과 ({"weight": {(a, b): w}, "capacity": {node: qps}})
+    """
+    qps, events = entry_rates(traffic)
+    if not qps or not entry or entry not in g or not core_mask[g.index[entry]]:
+        return None
+    absorbing = g.mask_of(exits)
+    if not any(a and r for a, r in zip(absorbing, g.reach([g.index[entry]]))):
+        return None     # entry에서 exit에 닿지 않으면 core가 전체 그래프(폴백)라 흐름이 정의되지 않음
+    annotations = annotations or {}
+
+    out = split_fractions(g, core_mask, absorbing, annotations.get("weight") or {})
+
+    inject = {g.index[entry]: qps}
+    if events:
+        brokers = [v for v in range(len(g)) if core_mask[v] and roles.masks[v] & EVENT_NODE_ROLES]
+        for v in brokers:
+            inject[v] = inject.get(v, 0.0) + events / len(brokers)
+
+    load = propagate_load(g, core_mask, absorbing, out, inject)
+
+    capacity_override = annotations.get("capacity") or {}
+    result: Dict[int, Tuple[float, float]] = {}
+    for v in range(len(g)):
+        if not core_mask[v] or g.ids[v] == entry:
+            continue
+        name = g.ids[v]
+        cap = node_capacity(roles.masks[v], name in redundant, capacity_override.get(name))
+        result[v] = (float(load[v]), cap)
+    return result
+
+
+def load_summary(g: CSRGraph, traffic: Optional[Dict], loads: Dict[int, Tuple[float, float]], top: int = 5) -> Dict:
+    """graph_analysis.load에 저장할 요약 (사용률 상위 노드 + 용량 초과 노드)."""
+    qps, events = entry_rates(traffic)
+    rows = sorted(
+        (
+            {
+                "node": g.ids[v],
+                "load_qps": round(load, 2),
+                "capacity_qps": round(cap, 2),
+                "utilization": round(load / cap, 4) if cap else None,
+            }
+            for v, (load, cap) in loads.items()
+        ),
+        key=lambda r: r["utilization"] or 0.0,
+        reverse=True,
+    )
+    return {
+        "entry_qps": qps,
+        "event_qps": events,
+        "max_utilization": rows[0]["utilization"] if rows else 0.0,
+        "overloaded": [r["node"] for r in rows if (r["utilization"] or 0) > 1.0][:10],
+        "top": rows[:top],
+    }
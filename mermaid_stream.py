@@ -0,0 +1,170 @@
+# -----------------------------
+# mermaid_stream.py
+# 목적: Mermaid flowchart 텍스트를 한 번만 훑어서 라벨/엣지를 순서대로 내보내는 토크나이저
+# - 입력: 문자열 또는 줄 단위로 읽히는 텍스트 스트림(파일 객체 등)
+# - 출력: ("label", node_id, label) / ("edge", src, dst) 튜플을 즉시 yield
+# 지원:
+# - 체인: A --> B --> C
+# - fan-out/fan-in: A & B --> C & D
+# - 엣지 라벨: A -->|text| B, A -- text --> B, A -. text .-> B, A == text ==> B
+#   (인라인 텍스트 링크는 여는 기호부터 머리까지 토큰 1개 → 텍스트 단어가 노드로 잡히지 않음)
+# - 화살표 변형: -->, --->, -.->, ==>, --o, --x, <-->, o--o, x--x, (비표준) ->
+# - 엣지 id: A e1@--> B (id는 노드가 아님)
+# - 노드 메타데이터: A@{ shape: rect, label: "x" } --> B ({...}는 A의 속성, label:이 있으면 라벨로 사용)
+# - 따옴표 라벨: A["x ] y"], A -->|"a|b"| B (따옴표 안의 구분자는 무시)
+# - subgraph/end, graph/flowchart 선언, classDef/style 등은 건너뜀
+# 참고:
+# - 머리 없는 링크(---, -.-, ===)는 요청 흐름이 아니므로 엣지로 보지 않음 (기존 파서와 동일)
+# -----------------------------
+
+import io
+import re
+from typing import Iterable, Iterator, List, Tuple, Union
+
+
+# 라벨 본문: 따옴표 문자열 안의 ], |, ) 등은 구분자로 보지 않음 (A["x ] y"], A -->|"a|b"| B)
+# ([^c"]*("..."[^c"]*)* 형태로 펼쳐서 글자마다 분기하지 않게 함)
+def _body(stop: str) -> str:
+    return rf'[^{stop}"]*(?:"[^"]*"[^{stop}"]*)*'
+
+
+def _lazy_body(stop: str) -> str:
+    """2글자 닫는 기호용: stop 글자는 바로 뒤가 닫는 기호가 아닐 때만 본문에 포함."""
+    return rf'[^{stop}"]*(?:(?:"[^"]*"|[{stop}])[^{stop}"]*)*?'
+
+
+_IN_PAREN, _IN_BRACKET, _IN_BRACE = _body(r"\)"), _body(r"\]"), _body(r"\}")
+_IN_PAREN2, _IN_BRACKET2, _IN_BRACE2 = _lazy_body(r"\)"), _lazy_body(r"\]"), _lazy_body(r"\}")
+_IN_SLASH2 = _lazy_body(r"/\\")
+
+# 노드 메타데이터 A@{ ... }: 따옴표 문자열과 한 단계 안쪽 {...}까지 짝을 맞춰 건너뜀
+_META = r'@\{(?:[^{}"]|"[^"]*"|\{[^{}]*\})*\}'
+_META_LABEL_RE = re.compile(r"""\blabel\s*:\s*(?:"([^"]*)"|'([^']*)'|([^,}]*))""")
+
+# 노드 모양(라벨) 패턴: 긴 구분자((( )), [( )], [[ ]] ...)를 먼저 시도
+_SHAPE = (
+    rf"\(\({_IN_PAREN2}\)\)|\(\[{_IN_BRACKET2}\]\)|\[\[{_IN_BRACKET2}\]\]"
+    rf"|\[\({_IN_PAREN2}\)\]|\{{\{{{_IN_BRACE2}\}}\}}"
+    rf"|\[[/\\]{_IN_SLASH2}[/\\]\]"
+    rf"|\[{_IN_BRACKET}\]|\({_IN_PAREN}\)|\{{{_IN_BRACE}\}}|>{_IN_BRACKET}\]"
+)
+
+# 인라인 링크 텍스트: 선 기호(-, =, .)나 머리(>)로 시작하지 않음 → "-->", "-.->", "==>"는 텍스트 링크로 안 잡힘
+# 여는 기호에 붙어 있으면 머리 o/x 한 글자("A --x B")도 텍스트가 아님
+_LINK_TEXT = r"(?:\s+|(?![ox](?![A-Za-z0-9_])))[^\s;|\-=.>][^;|\n]*?"
+
+# 링크 본체: 인라인 텍스트 링크 "-- text -->", "-. text .->", "== text ==>" (여는 기호와 같은 종류로 닫음)
+#           또는 선 본체만
+_LINK_BODY = (
+    rf"(?:--{_LINK_TEXT}\s*-{{2,}}|=={_LINK_TEXT}\s*={{2,}}|-\.{_LINK_TEXT}\s*\.-+"
+    r"|-{2,}|={2,}|-\.+-)"
+)
+
+# 화살표: 양방향 o--o / x--x (앞 글자가 노드 id에 붙어 있지 않을 때만)
+#        또는 (선택) < + 본체 + (선택) 머리 >, o, x
+_ARROW = (
+    rf"(?<![A-Za-z0-9_])o{_LINK_BODY}o|(?<![A-Za-z0-9_])x{_LINK_BODY}x"
+    rf"|<?{_LINK_BODY}[>ox]?"
+    r"|<?->"
+)
+
+TOKEN_RE = re.compile(
+    r"(?P<ws>\s+)"
+    rf"|(?P<arrow>{_ARROW})"
+    rf"|(?P<node>[A-Za-z0-9_]+)(?:(?P<meta>{_META})|(?P<eid>@)|\s*(?P<shape>{_SHAPE}))?(?::::[A-Za-z0-9_-]+)?"
+    rf"|(?P<elabel>\|{_body('|')}\|)"
+    r"|(?P<amp>&)"
+    r"|(?P<semi>;)"
+    r"|(?P<other>.)"
+)
+
+# 문장 맨 앞에 오면 해당 문장 전체를 건너뛰는 키워드 (Mermaid 예약어, 대소문자 구분)
+SKIP_KEYWORDS = {
+    "graph", "flowchart", "subgraph", "end", "direction",
+    "classDef", "class", "style", "linkStyle", "click",
+}
+
+LABEL_STRIP = "[](){}/\\> "
+
+
+def _arrow_direction(arrow: str) -> int:
+    """
+    1: 정방향(a→b), 2: 양방향(a↔b: <-->, o--o, x--x), 0: 엣지 아님(머리 없는 링크).
+    """
+    has_head = arrow[-1] in ">ox"
+    if not has_head:
+        return 0
+    return 2 if arrow[0] in "<ox" else 1
+
+
+def iter_mermaid(source: Union[str, Iterable[str]]) -> Iterator[Tuple[str, str, str]]:
+    """
+    Mermaid 텍스트를 한 번 훑으면서 라벨/엣지를 바로 yield.
+    - ("label", node_id, label)
+    - ("edge", src, dst)   (중복 제거는 호출자 몫)
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    match_tokens = TOKEN_RE.finditer
+
+    for line in lines:
+        if line.lstrip().startswith("%%"):
+            continue
+
+        # 문장 단위 상태 (';' 또는 줄 끝에서 초기화)
+        skipping = False
+        at_start = True
+        left: List[str] = []
+        cur: List[str] = []
+        direction = 0
+
+        for m in match_tokens(line):
+            kind = m.lastgroup
+
+            if kind == "ws":
+                continue
+
+            if kind == "semi":
+                if left and cur and direction:
+                    yield from _emit(left, cur, direction)
+                skipping = False
+                at_start = True
+                left, cur, direction = [], [], 0
+                continue
+
+            if skipping:
+                continue
+
+            if kind in ("node", "shape", "meta"):  # lastgroup은 라벨/메타데이터가 있으면 shape/meta
+                node_id = m.group("node")
+                if at_start and node_id in SKIP_KEYWORDS:
+                    skipping = True
+                    continue
+                at_start = False
+                cur.append(node_id)
+                shape = m.group("shape")
+                if shape:
+                    yield ("label", node_id, shape.strip(LABEL_STRIP).strip('"'))
+                elif kind == "meta":
+                    label = _META_LABEL_RE.search(m.group("meta"))
+                    if label:
+                        yield ("label", node_id, next(g for g in label.groups() if g is not None).strip())
+
+            elif kind == "arrow":
+                at_start = False
+                if left and cur and direction:
+                    yield from _emit(left, cur, direction)
+                left, cur = cur, []
+                direction = _arrow_direction(m.group("arrow"))
+
+            # eid(엣지 id "e1@" → 노드 아님), elabel(|text|), amp(&), other: 상태 변화 없음
+
+        if not skipping and left and cur and direction:
+            yield from _emit(left, cur, direction)
+
+
+def _emit(left: List[str], right: List[str], direction: int) -> Iterator[Tuple[str, str, str]]:
+    for a in left:
+        for b in right:
+            yield ("edge", a, b)
+            if direction == 2:
+                yield ("edge", b, a)
@@ -0,0 +1,277 @@
+# -----------------------------
+# metrics.py
+# 목적: 채점 성능 계측
+# 1) StageTimer: submission 1건의 단계별 시간(ms) / 그래프 크기 / 메모리 최고치 기록
+#    → score_breakdown_json.meta.perf 로 저장 (느린 제출 찾기)
+# 2) Metrics: 프로세스 전체 지표를 Prometheus 텍스트 형식으로 노출 (외부 라이브러리 없음)
+#    - grading_stage_seconds (히스토그램, stage별)
+#    - grading_queue_depth (게이지, 서비스 모드 큐별)
+#    - grading_cache_hits_total / grading_cache_misses_total / grading_cache_hit_ratio
+#    - grading_errors_total (stage별), grading_submissions_total (결과별)
+#    - METRICS_FILE: 이 경로에 주기적으로 기록 (node_exporter textfile collector용)
+#    - METRICS_PORT: 지정하면 http://0.0.0.0:PORT/metrics 로 노출
+# 참고:
+# - 워커 프로세스는 perf dict만 돌려주고, 집계는 부모 프로세스 한 곳에서만 함
+# - 메모리(peak_mem_kb, peak_mem_source): 필드는 항상 기록 (못 재면 null + 이유)
+#   - 채점 워커(batch_grader / grading_service의 프로세스 풀, initializer=track_peak_rss):
+#     제출 시작 때 프로세스 RSS 최고치를 초기화(/proc/self/clear_refs ← 5)하고 끝날 때 VmHWM을 읽음
+#     → "rss_hwm": 이 제출 동안의 프로세스 RSS 최고치 (인터프리터 기본 메모리 포함 → 제출 자체 사용량의 상한)
+#     워커 프로세스는 한 번에 제출 1건만 분석하므로 다른 제출과 섞이지 않음 (/proc 없으면 "unavailable")
+#   - 그 밖(analyze()를 부르는 웹 핸들러 등): 프로세스 전체 값을 건드리지 않음 → "disabled"
+#     (한 프로세스에서 여러 요청이 동시에 돌면 초기화가 서로의 최고치를 망가뜨림)
+#   - PERF_TRACEMALLOC=1: 제출 단위 tracemalloc 최고치 ("tracemalloc", 파이썬 할당만, 분석이 눈에 띄게 느려짐)
+#   (프로세스 ru_maxrss는 워커가 지금까지 처리한 모든 제출의 최고치라 제출별 값이 아님 → 쓰지 않음)
+# -----------------------------
+
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# 단계 시간 히스토그램 버킷(초)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PERF_TRACEMALLOC = os.getenv("PERF_TRACEMALLOC", "0") == "1"
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+_track_peak_rss = False         # track_peak_rss()를 부른 프로세스(제출 1건씩 분석하는 워커)만 True
+
+
+def track_peak_rss():
+    """이 프로세스에서 StageTimer가 제출마다 RSS 최고치를 초기화/기록하게 함 (워커 풀 initializer용)."""
+    global _track_peak_rss
+    _track_peak_rss = True
+
+
+def reset_peak_rss() -> bool:
+    """프로세스 RSS 최고치(VmHWM)를 현재 RSS로 초기화 (Linux 4.0+). 안 되면 False."""
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb() -> Optional[int]:
+    """마지막 초기화 이후 프로세스 RSS 최고치(kB), 읽을 수 없으면 None."""
+    try:
+        with open(_PROC_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# ========== 1) 제출 단위 계측 ==========
+class StageTimer:
+    """
+    with timer.stage("parse"): ... 형태로 단계 시간을 잼.
+    as_dict() 결과를 그대로 meta.perf에 저장.
+    """
+
+    def __init__(self):
+        self.stages_ms: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._tracing = PERF_TRACEMALLOC and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        self._rss_reset = _track_peak_rss and not self._tracing and reset_peak_rss()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages_ms[name] = round(self.stages_ms.get(name, 0.0) + (time.perf_counter() - t0) * 1000, 3)
+
+    def count(self, **counters: int):
+        self.counters.update(counters)
+
+    def as_dict(self) -> Dict:
+        perf: Dict = {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "stages_ms": dict(self.stages_ms),
+            **self.counters,
+        }
+        if self._tracing:
+            perf["peak_mem_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            perf["peak_mem_source"] = "tracemalloc"
+            tracemalloc.stop()
+            self._tracing = False
+        elif not _track_peak_rss:
+            perf["peak_mem_kb"] = None
+            perf["peak_mem_source"] = "disabled"
+        else:
+            peak = peak_rss_kb() if self._rss_reset else None
+            perf["peak_mem_kb"] = peak
+            perf["peak_mem_source"] = "rss_hwm" if peak is not None else "unavailable"
+        return perf
+
+
+# ========== 2) 프로세스 전체 지표 ==========
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, b in enumerate(self.buckets):
+            if value <= b:
+                self.counts[i] += 1
+
+
+class Metrics:
+    """스레드 안전한 최소 Prometheus 레지스트리 (counter / gauge / histogram)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._gauges: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], _Histogram] = {}
+        self._help = {
+            "grading_stage_seconds": ("histogram", "채점 단계별 소요 시간(초)"),
+            "grading_queue_depth": ("gauge", "서비스 모드 단계 사이 대기 chunk 수"),
+            "grading_cache_hits_total": ("counter", "분석 캐시 적중 수"),
+            "grading_cache_misses_total": ("counter", "분석 캐시 미적중 수"),
+            "grading_cache_hit_ratio": ("gauge", "분석 캐시 적중률"),
+            "grading_errors_total": ("counter", "단계별 오류 수"),
+            "grading_submissions_total": ("counter", "채점 결과별 submission 수"),
+        }
+
+    # ---------- 기록 ----------
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = _Histogram(STAGE_BUCKETS)
+            h.observe(value)
+
+    def observe_perf(self, perf: Optional[Dict]):
+        """meta.perf 하나를 단계별 히스토그램에 반영 (캐시 적중분은 분석 시간이 없으므로 제외)."""
+        if not perf or perf.get("cache_hit"):
+            return
+        for stage, ms in (perf.get("stages_ms") or {}).items():
+            self.observe("grading_stage_seconds", ms / 1000, stage=stage)
+        if "total_ms" in perf:
+            self.observe("grading_stage_seconds", perf["total_ms"] / 1000, stage="total")
+
+    def record_chunk(self, results: List[Dict], counts: Dict[str, int]):
+        """apply_chunk_results 입력/반환으로 chunk 1개 분량 지표 반영."""
+        for res in results:
+            if res.get("error"):
+                self.inc("grading_errors_total", stage="analyze")
+            else:
+                self.observe_perf(res.get("perf"))
+        for status, n in counts.items():
+            self.inc("grading_submissions_total", n, status=status)
+
+    def observe_cache(self, hits: int, misses: int):
+        """누적 적중/미적중 수(GraphAnalysisCache.hits/misses)로 카운터와 적중률 갱신."""
+        with self._lock:
+            self._counters[("grading_cache_hits_total", ())] = hits
+            self._counters[("grading_cache_misses_total", ())] = misses
+            total = hits + misses
+            self._gauges[("grading_cache_hit_ratio", ())] = (hits / total) if total else 0.0
+
+    # ---------- 출력 ----------
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            series: Dict[str, List[str]] = {}
+            for (name, labels), v in self._counters.items():
+                series.setdefault(name, []).append(f"{name}{_labels(labels)} {_num(v)}")
+            for (name, labels), v in self._gauges.items():
+                series.setdefault(name, []).append(f"{name}{_labels(labels)} {_num(v)}")
+            for (name, labels), h in self._histograms.items():
+                rows = series.setdefault(name, [])
+                for b, c in zip(h.buckets, h.counts):
+                    rows.append(f"{name}_bucket{_labels(labels + (('le', _num(b)),))} {c}")
+                rows.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {h.total}")
+                rows.append(f"{name}_sum{_labels(labels)} {_num(h.sum)}")
+                rows.append(f"{name}_count{_labels(labels)} {h.total}")
+
+        out: List[str] = []
+        for name in sorted(series):
+            kind, text = self._help.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: Optional[str] = None):
+        """METRICS_FILE(또는 path)에 원자적으로 기록 (tmp 파일 → rename)."""
+        path = path or os.getenv("METRICS_FILE")
+        if not path:
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: Optional[int] = None):
+        """METRICS_PORT(또는 port)로 /metrics HTTP 엔드포인트를 데몬 스레드에서 띄움."""
+        port = port or int(os.getenv("METRICS_PORT", "0") or 0)
+        if not port:
+            return None
+        # 분석 라이브러리(graph_analysis)가 StageTimer만 쓸 때는 http.server를 불러오지 않음
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📈 metrics: http://0.0.0.0:{port}/metrics")
+        return server
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"'.replace("\n", " ") for k, v in labels)
+    return "{" + body + "}"
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# 프로세스 공용 레지스트리
+METRICS = Metrics()
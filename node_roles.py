@@ -0,0 +1,183 @@
+# -----------------------------
+# node_roles.py
+# 목적: 노드 역할(user / gateway·LB / queue / cache / LLM / vector / DB / worker / service) 분류를
+#       그래프당 한 번만 해서 모든 단계(entry/exit 선택, 병목 가산점, 용량·지연·가용성 기본값, 대안 제시, 재작성)가 같이 씀
+# 1) 어휘: 역할별 영어 + 한국어 키워드 (ROLE_VOCABULARY)
+#    + 시나리오 어휘: checklist_template_json.node_roles = {"queue": ["outbox", "dlq"], ...}
+# 2) 매처: 키워드를 정규식으로 컴파일 (겹치는 키워드도 다 잡도록 lookahead)
+#    → 노드마다 "id 라벨" 텍스트를 훑어서 역할 비트마스크를 만듦
+#    - 3글자 이하 영문 키워드(db, lb, mq, bus, api ...)는 단어 단위로만 매칭
+#      (camelCase 경계도 단어 경계: "OrderDB", "RabbitMQ"는 맞고 "Bulb", "Business", "Feedback"은 안 맞음)
+#    - 나머지(긴 영문, 한국어)는 부분 문자열 매칭
+# 3) NodeRoles: CSRGraph 노드 순서와 같은 비트마스크 배열 (단계마다 라벨을 다시 훑지 않음)
+# 참고:
+# - "event"/"이벤트"/"메시지"는 무엇을 나르는지일 뿐이라 역할 키워드가 아님
+#   ("EventHandler"는 service, "Event Bus"는 bus로 queue, "이벤트 큐"는 큐로 queue)
+# - 한 노드가 여러 역할을 가질 수 있음 (예: "Redis Stream" → cache + queue), 우선순위는 읽는 쪽이 정함
+# -----------------------------
+
+import json
+import re
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+
+ROLE_NAMES = ("user", "balancer", "queue", "cache", "llm", "vector", "db", "worker", "service")
+ROLE_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(ROLE_NAMES)}
+
+USER = ROLE_BITS["user"]
+BALANCER = ROLE_BITS["balancer"]
+QUEUE = ROLE_BITS["queue"]
+CACHE = ROLE_BITS["cache"]
+LLM = ROLE_BITS["llm"]
+VECTOR = ROLE_BITS["vector"]
+DB = ROLE_BITS["db"]
+WORKER = ROLE_BITS["worker"]
+SERVICE = ROLE_BITS["service"]
+
+ROLE_VOCABULARY: Dict[str, Sequence[str]] = {
+    "user": ("user", "client", "browser", "사용자", "유저", "클라이언트", "고객", "브라우저"),
+    "balancer": (
+        "gateway", "lb", "alb", "elb", "nlb", "load balancer", "ingress", "proxy", "nginx",
+        "게이트웨이", "로드밸런서", "로드 밸런서", "프록시",
+    ),
+    "queue": (
+        "queue", "kafka", "mq", "broker", "stream", "pubsub", "bus", "eventbridge", "eventhub",
+        "큐", "브로커", "스트림",
+    ),
+    "cache": ("redis", "cache", "memcache", "cdn", "캐시"),
+    "llm": ("llm", "model", "gpt", "inference", "모델", "추론"),
+    "vector": ("vector", "embedding", "벡터", "임베딩"),
+    "db": (
+        "db", "database", "mysql", "postgres", "mongo", "elastic", "store", "storage",
+        "데이터베이스", "디비", "저장소", "스토리지",
+    ),
+    "worker": ("worker", "processor", "consumer", "워커", "처리기", "컨슈머"),
+    "service": ("service", "api", "handler", "서비스", "핸들러"),
+}
+
+
+# 이 길이 이하 영문 키워드는 단어 단위로만 매칭 (부분 문자열로 맞으면 오분류가 많음)
+WORD_KEYWORD_MAX_LEN = 3
+
+# camelCase / 약어 경계에 공백 삽입: "OrderDB" → "Order DB", "LLMOps" → "LLM Ops"
+_CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def _is_word_keyword(k: str) -> bool:
+    return k.isascii() and len(k) <= WORD_KEYWORD_MAX_LEN
+
+
+def _alternation(keys) -> str:
+    # 긴 키워드 먼저 → 같은 위치에서 시작하는 키워드는 가장 긴 것부터 시도
+    return "|".join(map(re.escape, sorted(keys, key=len, reverse=True)))
+
+
+class RoleMatcher:
+    """키워드 → 역할 비트를 정규식으로 매칭 (어휘마다 1번 컴파일)."""
+
+    __slots__ = ("bits", "pattern", "word_pattern")
+
+    def __init__(self, extra: Optional[Mapping[str, Iterable[str]]] = None):
+        self.bits: Dict[str, int] = {}
+        for vocab in (ROLE_VOCABULARY, extra or {}):
+            for role, keywords in vocab.items():
+                bit = ROLE_BITS.get(role)
+                if bit is None:
+                    continue    # 모르는 역할 이름은 무시
+                for k in keywords:
+                    k = str(k).strip().lower()
+                    if k:
+                        self.bits[k] = self.bits.get(k, 0) | bit
+        # lookahead → 겹치는 위치도 모두 검사 (매칭이 글자를 소비하지 않음)
+        words = [k for k in self.bits if _is_word_keyword(k)]
+        substrings = [k for k in self.bits if not _is_word_keyword(k)]
+        self.pattern = re.compile("(?=(" + _alternation(substrings) + "))") if substrings else None
+        self.word_pattern = (
+            re.compile("(?<![a-z])(?=(" + _alternation(words) + ")(?![a-z]))") if words else None
+        )
+
+    def classify(self, text: str) -> int:
+        mask = 0
+        bits = self.bits
+        if self.pattern is not None:
+            for m in self.pattern.finditer(text.lower()):
+                mask |= bits[m.group(1)]
+        if self.word_pattern is not None:
+            for m in self.word_pattern.finditer(_CAMEL_RE.sub(" ", text).lower()):
+                mask |= bits[m.group(1)]
+        return mask
+
+
+DEFAULT_MATCHER = RoleMatcher()
+_matchers: Dict[str, RoleMatcher] = {}
+
+
+def scenario_vocabulary(checklist_template_json) -> Optional[Dict[str, List[str]]]:
+    """checklist_template_json.node_roles → {역할: [키워드]} (없으면 None)."""
+    if isinstance(checklist_template_json, (bytes, bytearray)):
+        checklist_template_json = checklist_template_json.decode("utf-8")
+    if isinstance(checklist_template_json, str):
+        checklist_template_json = json.loads(checklist_template_json) if checklist_template_json else None
+    vocab = (checklist_template_json or {}).get("node_roles") or {}
+    vocab = {
+        role: [keywords] if isinstance(keywords, str) else list(keywords)
+        for role, keywords in vocab.items() if role in ROLE_BITS and keywords
+    }
+    return vocab or None
+
+
+def matcher_for(vocab: Optional[Mapping[str, Iterable[str]]] = None) -> RoleMatcher:
+    """기본 어휘 + 시나리오 어휘 매처 (같은 어휘면 프로세스 안에서 재사용)."""
+    if not vocab:
+        return DEFAULT_MATCHER
+    key = json.dumps({r: sorted(k) for r, k in vocab.items()}, ensure_ascii=False, sort_keys=True)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = _matchers[key] = RoleMatcher(vocab)
+    return matcher
+
+
+class NodeRoles:
+    """노드별 역할 비트마스크 (masks[i] = index[node] == i인 노드의 역할)."""
+
+    __slots__ = ("index", "masks")
+
+    def __init__(self, index: Dict[str, int], masks: array):
+        self.index = index
+        self.masks = masks
+
+    @classmethod
+    def from_graph(cls, g, labels: Dict[str, str], matcher: RoleMatcher = DEFAULT_MATCHER) -> "NodeRoles":
+        """CSRGraph 노드 순서 그대로 분류 (index는 그래프 것을 공유, 복사 없음)."""
+        classify = matcher.classify
+        return cls(g.index, array("H", (classify(f"{n} {labels.get(n) or ''}") for n in g.ids)))
+
+    @classmethod
+    def from_nodes(
+        cls,
+        nodes: Iterable[str],
+        labels: Dict[str, str],
+        matcher: RoleMatcher = DEFAULT_MATCHER
+    ) -> "NodeRoles":
+        index: Dict[str, int] = {}
+        for n in nodes:
+            index.setdefault(n, len(index))
+        classify = matcher.classify
+        return cls(index, array("H", (classify(f"{n} {labels.get(n) or ''}") for n in index)))
+
+    def of(self, node: str) -> int:
+        i = self.index.get(node)
+        return self.masks[i] if i is not None else 0
+
+    def has(self, node: str, roles: int) -> bool:
+        """roles 중 하나라도 있으면 True (예: roles.has(n, DB | VECTOR))."""
+        return bool(self.of(node) & roles)
+
+
+def first_role_value(mask: int, table: Sequence, default):
+    """(역할 비트, 값) 표에서 위에서부터 먼저 맞는 값 (단계별 우선순위는 표 순서)."""
+    for bits, value in table:
+        if mask & bits:
+            return value
+    return default
@@ -0,0 +1,79 @@
+# -----------------------------
+# scenario_cache.py
+# 목적: 채점에 필요한 시나리오 입력을 프로세스 안에서 (id, version) 단위로 한 번만 읽고 해석해서 재사용
+# - Stage 1 룰(ScenarioRules: 가중치 + 컴파일된 키워드 패턴)
+# - traffic_json (부하 전파 / 지연 추정 입력), constraints_json
+# - 역할 어휘(checklist_template_json.node_roles)와 그 매처(node_roles.matcher_for)
+# 동작:
+# 1) chunk마다 등장하는 시나리오의 (id, version)만 조회 (JSON 컬럼은 읽지 않음)
+# 2) 처음 보는 id거나 version이 바뀐 시나리오만 전체 row를 다시 읽어서 해석
+#    → 시나리오 몇 개 / 제출 수천 건이면 상시 서비스에서 JSON 파싱·정규식 컴파일은 시나리오당 1번
+# 참고:
+# - 시나리오 내용을 고치면 system_scenarios.version도 올릴 것 (version이 같으면 캐시를 그대로 씀)
+# - 프로세스 전역 인스턴스 SCENARIOS를 batch_grader / grading_service가 같이 씀
+# -----------------------------
+
+import json
+import threading
+from typing import Dict, Iterable, Optional
+
+from grading_db import fetch_scenario_versions, fetch_scenarios
+from node_roles import matcher_for, scenario_vocabulary
+from stage1_scorer import ScenarioRules
+
+
+def _json(value) -> Optional[Dict]:
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    if isinstance(value, str):
+        value = json.loads(value) if value else None
+    return value or None
+
+
+class ScenarioEntry:
+    """system_scenarios row 1개를 해석한 결과 (version이 바뀌기 전까지 재사용)."""
+
+    __slots__ = ("scenario_id", "version", "rules", "traffic", "constraints", "vocab")
+
+    def __init__(self, row: Dict):
+        self.scenario_id = row["id"]
+        self.version = row["version"]
+        self.rules = ScenarioRules(row["id"], row["checklist_template_json"])
+        self.traffic = _json(row.get("traffic_json"))
+        self.constraints = _json(row.get("constraints_json"))
+        self.vocab = scenario_vocabulary(row.get("checklist_template_json"))
+        matcher_for(self.vocab)     # 역할 매처도 여기서 미리 컴파일
+
+
+class ScenarioRuleCache:
+    """(id, version) 키 시나리오 캐시. get_many는 version 조회 1번 + 바뀐 시나리오만 전체 조회."""
+
+    def __init__(self):
+        self._entries: Dict[str, ScenarioEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get_many(self, conn, scenario_ids: Iterable[str]) -> Dict[str, ScenarioEntry]:
+        """{scenario_id: ScenarioEntry} (DB에 없는 id는 빠짐)."""
+        versions = fetch_scenario_versions(conn, sorted(set(scenario_ids)))
+        with self._lock:
+            stale = [
+                sid for sid, version in versions.items()
+                if sid not in self._entries or self._entries[sid].version != version
+            ]
+        rows = fetch_scenarios(conn, stale) if stale else []
+
+        with self._lock:
+            for row in rows:
+                self._entries[row["id"]] = ScenarioEntry(row)
+            self.loads += len(rows)
+            self.hits += len(versions) - len(stale)
+            return {sid: self._entries[sid] for sid in versions if sid in self._entries}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+SCENARIOS = ScenarioRuleCache()
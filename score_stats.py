@@ -0,0 +1,308 @@
+# -----------------------------
+# score_stats.py
+# 목적: 시나리오별 채점 통계(system_scenario_stats, db_05_scenario_stats.sql) 증분 유지 + 재구축
+# 1) 제출 1건의 기여분 = [(kind, item, cnt, value_sum, value_sq_sum)]
+#    점수 / 점수 히스토그램 구간 / 그래프 감점 / risk flag / SPOF 노드 / 병목 노드
+# 2) 증분 갱신: 결과 반영과 같은 트랜잭션에서 (새 기여분 - 직전 결과 기여분)을
+#    INSERT ... ON DUPLICATE KEY UPDATE cnt = cnt + VALUES(cnt) 로 더함
+#    → 더하기만 하므로 여러 채점기가 동시에 반영해도 순서와 무관하게 맞음
+#    직전 기여분은 system_results에서 필요한 값만 JSON_EXTRACT로 읽음 (score_breakdown_json 전체는 안 읽음)
+# 3) 재구축: graph_analysis가 있는 결과 전체를 서버 측 커서로 훑어 처음부터 다시 집계
+# 참고:
+# - 통계에 들어가는 기준은 status가 아니라 "결과 row에 graph_analysis가 있는가" (재구축과 증분이 같은 기준)
+# - db_05를 아직 안 돌렸으면 경고 후 통계 갱신만 건너뜀 (채점은 그대로)
+# 사용 예:
+#   python score_stats.py --rebuild
+#   python score_stats.py --show SYS-RAG-ONPREM-001
+# -----------------------------
+
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCORE_BUCKET_WIDTH = 10
+ITEM_MAX_LEN = 128                 # system_scenario_stats.item 길이
+STATS_FETCH_SIZE = 1000            # 재구축 시 fetchmany 1회 row 수
+STATS_TOP_NODES = 10               # read_scenario_stats가 돌려주는 SPOF/병목 노드 수
+
+_ER_NO_SUCH_TABLE = 1146
+_stats_enabled: Optional[bool] = None      # None = 아직 테이블 확인 전
+
+Row = Tuple[str, str, int, float, float]      # (kind, item, cnt, value_sum, value_sq_sum)
+
+STATS_UPSERT_SQL = (
+    "INSERT INTO system_scenario_stats (scenario_id, kind, item, cnt, value_sum, value_sq_sum) "
+    "VALUES (%s, %s, %s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE cnt=cnt+VALUES(cnt), value_sum=value_sum+VALUES(value_sum), "
+    "value_sq_sum=value_sq_sum+VALUES(value_sq_sum)"
+)
+
+# 기여분이 빠져서 0이 된 row 정리: 이번 delta에서 줄어든 키만 PK로 지움 (테이블 전체를 훑거나 잠그지 않음)
+STATS_DELETE_EMPTY_SQL = (
+    "DELETE FROM system_scenario_stats WHERE scenario_id=%s AND kind=%s AND item=%s AND cnt <= 0"
+)
+
+# 직전 결과의 기여분을 만들 값만 projection (scenario_id는 submission에서)
+_GA = "$.items.graph_analysis"
+CONTRIBUTION_COLUMNS = (
+    "s.id, s.scenario_id, r.score_total, r.risk_flags_json, "
+    "JSON_EXTRACT(r.score_breakdown_json, '$.meta.graph_penalty.total_penalty') AS penalty, "
+    f"JSON_EXTRACT(r.score_breakdown_json, '{_GA}.spof_candidates') AS spofs, "
+    f"JSON_EXTRACT(r.score_breakdown_json, '{_GA}.bottleneck_candidates[*].node') AS bottlenecks, "
+    f"JSON_CONTAINS_PATH(r.score_breakdown_json, 'one', '{_GA}') AS counted"
+)
+
+
+def contribution(
+    score_total: float,
+    penalty: Optional[float],
+    flags: Iterable[str],
+    spofs: Iterable[str],
+    bottlenecks: Iterable[str]
+) -> List[Row]:
+    """제출 1건이 통계에 더하는 row 목록."""
+    score = float(score_total)
+    bucket = min(int(score) // SCORE_BUCKET_WIDTH, 100 // SCORE_BUCKET_WIDTH - 1) * SCORE_BUCKET_WIDTH
+    rows: List[Row] = [
+        ("score", "", 1, score, score * score),
+        ("score_bucket", str(max(0, bucket)), 1, 0.0, 0.0),
+        ("penalty", "", 1, float(penalty or 0), 0.0),
+    ]
+    for kind, items in (("flag", flags), ("spof", spofs), ("bottleneck", bottlenecks)):
+        for item in sorted({str(i)[:ITEM_MAX_LEN] for i in items or []}):
+            rows.append((kind, item, 1, 0.0, 0.0))
+    return rows
+
+
+def result_contribution(params: Tuple, graph_analysis: Dict, penalty_info: Dict) -> List[Row]:
+    """build_result_update() 파라미터 튜플(score_total, breakdown, flags, ...)로 새 결과의 기여분 계산."""
+    flags = params[2]
+    return contribution(
+        params[0],
+        penalty_info.get("total_penalty"),
+        json.loads(flags) if isinstance(flags, str) else flags,
+        graph_analysis.get("spof_candidates") or [],
+        [b["node"] for b in graph_analysis.get("bottleneck_candidates") or []],
+    )
+
+
+def _json(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _row_contribution(row: Dict) -> List[Row]:
+    """CONTRIBUTION_COLUMNS row → 기여분 (graph_analysis가 없는 결과면 빈 목록)."""
+    if not row.get("counted") or row.get("score_total") is None:
+        return []
+    return contribution(
+        row["score_total"],
+        _json(row["penalty"]),
+        _json(row["risk_flags_json"]) or [],
+        _json(row["spofs"]) or [],
+        _json(row["bottlenecks"]) or [],
+    )
+
+
+def _disable(e: Exception) -> bool:
+    global _stats_enabled
+    if getattr(e, "errno", None) == _ER_NO_SUCH_TABLE:
+        print("⚠️  system_scenario_stats 테이블이 없습니다. db_05_scenario_stats.sql 실행 전까지 통계 갱신을 건너뜁니다.")
+        _stats_enabled = False
+        return True
+    return False
+
+
+def fetch_contributions(conn, submission_ids: List[int]) -> Optional[Dict[int, Tuple[str, List[Row]]]]:
+    """
+    반영 직전 결과의 기여분 {submission_id: (scenario_id, rows)} (FOR UPDATE로 잠금).
+    통계 테이블이 없으면 None → 호출자는 통계 갱신을 건너뜀.
+    """
+    global _stats_enabled
+    if _stats_enabled is False or not submission_ids:
+        return None
+    cur = conn.cursor(dictionary=True)
+    try:
+        if _stats_enabled is None:
+            # 프로세스당 한 번 테이블 존재 확인 (MySQL은 실패한 문장만 취소하므로 트랜잭션은 그대로)
+            cur.execute("SELECT 1 FROM system_scenario_stats LIMIT 1")
+            cur.fetchall()
+            _stats_enabled = True
+        cur.execute(
+            f"SELECT {CONTRIBUTION_COLUMNS} FROM system_submissions s "
+            "LEFT JOIN system_results r ON r.submission_id = s.id "
+            f"WHERE s.id IN ({','.join(['%s'] * len(submission_ids))}) FOR UPDATE",
+            tuple(submission_ids)
+        )
+        return {row["id"]: (row["scenario_id"], _row_contribution(row)) for row in cur.fetchall()}
+    except Exception as e:
+        if _disable(e):
+            return None
+        raise
+    finally:
+        cur.close()
+
+
+def stats_delta(
+    old: Dict[int, Tuple[str, List[Row]]],
+    new: Dict[int, List[Row]]
+) -> List[Tuple]:
+    """(새 기여분 - 직전 기여분)을 키별로 합친 upsert 파라미터 목록 (변화 없는 키는 제외)."""
+    acc: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    for sid, rows in new.items():
+        scenario_id, before = old.get(sid, (None, []))
+        if scenario_id is None:
+            continue
+        for sign, contrib in ((-1, before), (1, rows)):
+            for kind, item, cnt, s, sq in contrib:
+                a = acc[(scenario_id, kind, item)]
+                a[0] += sign * cnt
+                a[1] += sign * s
+                a[2] += sign * sq
+    return [(*key, int(c), s, sq) for key, (c, s, sq) in sorted(acc.items()) if c or s or sq]
+
+
+def apply_stats_delta(conn, delta: List[Tuple]):
+    """증분 반영 (커밋은 호출자가 결과 반영과 함께). 빠진 기여분으로 0이 된 row는 지움 (줄어든 키만)."""
+    if not delta:
+        return
+    cur = conn.cursor()
+    try:
+        cur.executemany(STATS_UPSERT_SQL, delta)
+        shrunk = [d[:3] for d in delta if d[3] < 0]
+        if shrunk:
+            cur.executemany(STATS_DELETE_EMPTY_SQL, shrunk)
+    finally:
+        cur.close()
+
+
+def rebuild_stats(conn) -> Dict[str, int]:
+    """
+    system_results 전체로 통계를 다시 만듦 (한 트랜잭션).
+    먼저 DELETE로 통계 row를 잠가서, 그 사이 반영되는 채점은 재구축 커밋 뒤에 증분으로 더해짐.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM system_scenario_stats")
+    finally:
+        cur.close()
+
+    acc: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    results = 0
+    cur = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cur.execute(
+            f"SELECT {CONTRIBUTION_COLUMNS} FROM system_results r "
+            "JOIN system_submissions s ON s.id = r.submission_id "
+            f"WHERE JSON_CONTAINS_PATH(r.score_breakdown_json, 'one', '{_GA}')"
+        )
+        while True:
+            rows = cur.fetchmany(STATS_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                results += 1
+                for kind, item, cnt, s, sq in _row_contribution(row):
+                    a = acc[(row["scenario_id"], kind, item)]
+                    a[0] += cnt
+                    a[1] += s
+                    a[2] += sq
+    finally:
+        cur.close()
+
+    params = [(*key, int(c), s, sq) for key, (c, s, sq) in sorted(acc.items())]
+    cur = conn.cursor()
+    try:
+        if params:
+            cur.executemany(STATS_UPSERT_SQL, params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return {"results": results, "rows": len(params), "scenarios": len({k[0] for k in acc})}
+
+
+def read_scenario_stats(conn, scenario_id: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    대시보드용 요약 {scenario_id: {"graded", "score_mean", "score_stddev", "penalty_mean", "histogram",
+                                   "flag_rates", "top_spof", "top_bottleneck"}}
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute(
+            "SELECT scenario_id, kind, item, cnt, value_sum, value_sq_sum FROM system_scenario_stats"
+            + (" WHERE scenario_id = %s" if scenario_id else ""),
+            (scenario_id,) if scenario_id else ()
+        )
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+
+    by_scenario: Dict[str, Dict[str, List[Dict]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        by_scenario[row["scenario_id"]][row["kind"]].append(row)
+
+    summary: Dict[str, Dict] = {}
+    for sid, kinds in sorted(by_scenario.items()):
+        score = (kinds.get("score") or [None])[0]
+        n = int(score["cnt"]) if score else 0
+        if not n:
+            continue
+        mean = score["value_sum"] / n
+        penalty = (kinds.get("penalty") or [None])[0]
+
+        def top(kind: str) -> List[Dict]:
+            ranked = sorted(kinds.get(kind, []), key=lambda r: (-r["cnt"], r["item"]))[:STATS_TOP_NODES]
+            return [{"node": r["item"], "count": int(r["cnt"]), "rate": round(r["cnt"] / n, 3)} for r in ranked]
+
+        summary[sid] = {
+            "graded": n,
+            "score_mean": round(mean, 2),
+            "score_stddev": round(math.sqrt(max(0.0, score["value_sq_sum"] / n - mean * mean)), 2),
+            "penalty_mean": round(penalty["value_sum"] / n, 2) if penalty else 0.0,
+            "histogram": {
+                int(r["item"]): int(r["cnt"])
+                for r in sorted(kinds.get("score_bucket", []), key=lambda r: int(r["item"]))
+            },
+            "flag_rates": {
+                r["item"]: round(r["cnt"] / n, 3)
+                for r in sorted(kinds.get("flag", []), key=lambda r: -r["cnt"])
+            },
+            "top_spof": top("spof"),
+            "top_bottleneck": top("bottleneck"),
+        }
+    return summary
+
+
+def main() -> int:
+    # review_SPOF_bottleneck이 이 모듈을 import하므로 DB 연결 함수는 실행 시점에 가져옴
+    from review_SPOF_bottleneck import get_db_connection
+
+    parser = argparse.ArgumentParser(description="시나리오별 채점 통계 재구축/조회")
+    parser.add_argument("--rebuild", action="store_true", help="system_results 전체로 통계를 다시 만듦")
+    parser.add_argument("--show", nargs="?", const="", default=None, metavar="SCENARIO_ID",
+                        help="통계 요약 출력 (시나리오 id 생략 시 전체)")
+    args = parser.parse_args()
+    if not args.rebuild and args.show is None:
+        parser.error("--rebuild 또는 --show 중 하나를 지정하세요")
+
+    conn = get_db_connection()
+    try:
+        if args.rebuild:
+            r = rebuild_stats(conn)
+            print(f"✅ 통계 재구축: 결과 {r['results']}건 → 시나리오 {r['scenarios']}개, {r['rows']} row")
+        if args.show is not None:
+            print(json.dumps(read_scenario_stats(conn, args.show or None), ensure_ascii=False, indent=2))
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+# -----------------------------
+# stage1_scorer.py
+# 목적: Stage 1(룰 기반 키워드 채점)을 Python으로 수행
+# - db_03_demo_submission_result.sql의 SET @... / REGEXP 로직과 같은 점수·breakdown·flags를 만듦
+# - 시나리오별 가중치는 checklist_template_json.$.scoring.weights에서 읽고 (없으면 기본값)
+#   키워드 패턴은 모듈 로드 때 1번만 컴파일
+# - 그래프 단계와 합쳐서 최종 score_total / breakdown / risk_flags를 한 번에 기록
+#   (batch_grader.py --stage1, grading_service.py --stage1)
+# 참고:
+# - weights에 있지만 아래 5개 항목이 아닌 키(citations, idempotency 등)는 SQL과 마찬가지로 채점하지 않음
+# - scoring.keyword_hints는 읽지 않음 (db_03도 고정 패턴만 씀 → 같은 점수 유지)
+# -----------------------------
+
+import json
+import re
+from typing import Dict, List, Optional
+
+
+# 가중치 기본값 (db_03과 동일)
+DEFAULT_WEIGHTS = {
+    "acl": 25,
+    "audit_log": 20,
+    "observability": 25,
+    "failure_mode": 20,
+    "tradeoffs": 15,
+}
+
+# 기본 점수 (raw_total = BASE_SCORE + 항목 점수 합)
+BASE_SCORE = 10
+
+# 항목별 키워드 (MySQL REGEXP와 같은 패턴, 소문자 텍스트 대상)
+DEFAULT_PATTERNS = {
+    "acl": r"acl|auth|role|permission|권한",
+    "audit_log": r"audit|log|감사",
+    "failure_mode": r"down|fail|fallback|degrad|장애|롤백|재시도",
+}
+
+# observability: 그룹별로 1개씩 세서 2개 이상이면 만점, 1개면 partial
+OBSERVABILITY_GROUPS = [
+    r"p95|latency",
+    r"error",
+    r"trace",
+    r"metric|prometheus|grafana",
+    r"alert",
+]
+
+_PATTERNS = {key: re.compile(p) for key, p in DEFAULT_PATTERNS.items()}
+_OBSERVABILITY_GROUPS = [re.compile(p) for p in OBSERVABILITY_GROUPS]
+
+# tradeoff 개수별 총점 상한
+TRADEOFF_CAPS = {3: 100, 2: 85, 1: 70, 0: 60}
+
+
+def _json(value, default):
+    if value is None:
+        return default
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return default
+    return value
+
+
+class ScenarioRules:
+    """시나리오 1개의 가중치 + 컴파일된 패턴 (시나리오당 1번 생성해서 재사용)."""
+
+    def __init__(self, scenario_id: str, checklist_template_json):
+        self.scenario_id = scenario_id
+
+        scoring = _json(checklist_template_json, {}).get("scoring") or {}
+        weights = scoring.get("weights") or {}
+
+        self.weights: Dict[str, int] = {}
+        for key, default in DEFAULT_WEIGHTS.items():
+            try:
+                self.weights[key] = max(0, int(weights.get(key, default)))
+            except (TypeError, ValueError):
+                self.weights[key] = default
+
+        self.patterns = _PATTERNS
+        self.observability_groups = _OBSERVABILITY_GROUPS
+
+
+def _partial(weight: int, percent: int) -> int:
+    """FLOOR(weight * percent/100) (float 오차 없이)."""
+    return weight * percent // 100
+
+
+def score_submission(sub: Dict, rules: ScenarioRules) -> Dict:
+    """
+    submission 1건 Stage 1 채점.
+    반환: system_results row 형태 {"score_total", "score_breakdown_json", "risk_flags_json"}
+          (build_result_update()에 그대로 넘길 수 있음)
+    """
+    w = rules.weights
+
+    mermaid = (sub.get("mermaid_text") or "").lower()
+    comp = (sub.get("components_text") or "").lower()
+    payload = _json(sub.get("submission_payload_json"), {}) or {}
+    tradeoffs = _json(sub.get("tradeoffs_json"), [])
+
+    tradeoff_cnt = len(tradeoffs) if isinstance(tradeoffs, (list, dict)) else 0
+
+    # tradeoffs: 3개 이상 만점 / 2개 55% / 1개 20% / 0개 0
+    if tradeoff_cnt >= 3:
+        score_tradeoffs, tradeoffs_status = w["tradeoffs"], "OK"
+    elif tradeoff_cnt == 2:
+        score_tradeoffs, tradeoffs_status = _partial(w["tradeoffs"], 55), "PARTIAL"
+    elif tradeoff_cnt == 1:
+        score_tradeoffs, tradeoffs_status = _partial(w["tradeoffs"], 20), "NG"
+    else:
+        score_tradeoffs, tradeoffs_status = 0, "NG"
+
+    def keyword_score(key: str, *texts: str) -> int:
+        if w[key] == 0:
+            return 0
+        pattern = rules.patterns[key]
+        return w[key] if any(pattern.search(t) for t in texts) else 0
+
+    score_acl = keyword_score("acl", mermaid, comp)
+    score_audit = keyword_score("audit_log", mermaid, comp)
+
+    obs_text = str(payload.get("observability") or "").lower()
+    obs_hits = sum(1 for p in rules.observability_groups if p.search(obs_text))
+    if w["observability"] == 0:
+        score_obs = 0
+    elif obs_hits >= 2:
+        score_obs = w["observability"]
+    elif obs_hits == 1:
+        score_obs = _partial(w["observability"], 40)
+    else:
+        score_obs = 0
+
+    fm_text = str(payload.get("failure_mode") or "").lower()
+    score_fm = keyword_score("failure_mode", fm_text)
+
+    raw_total = BASE_SCORE + score_acl + score_audit + score_obs + score_fm + score_tradeoffs
+    cap = TRADEOFF_CAPS[min(tradeoff_cnt, 3)]
+    score_total = min(cap, min(100, raw_total))
+
+    flags: List[str] = []
+    if tradeoff_cnt < 3:
+        flags.append("INSUFFICIENT_TRADEOFFS")
+    if w["observability"] > 0 and score_obs == 0:
+        flags.append("NO_OBSERVABILITY")
+    if w["failure_mode"] > 0 and score_fm == 0:
+        flags.append("NO_FAILURE_MODE")
+    if raw_total > cap:
+        flags.append("CAP_APPLIED_BY_TRADEOFFS")
+
+    if score_obs == w["observability"] and w["observability"] > 0:
+        obs_status = "OK"
+    elif score_obs > 0:
+        obs_status = "PARTIAL"
+    else:
+        obs_status = "NG"
+
+    breakdown = {
+        "meta": {
+            "scenario_id": sub.get("scenario_id"),
+            "raw_total": raw_total,
+            "cap_by_tradeoffs": cap,
+            "stage1": "python",
+        },
+        "items": {
+            "tradeoffs": {"score": score_tradeoffs, "max": w["tradeoffs"], "count": tradeoff_cnt, "status": tradeoffs_status},
+            "acl": {"score": score_acl, "max": w["acl"], "status": "OK" if score_acl > 0 else "NG"},
+            "audit_log": {"score": score_audit, "max": w["audit_log"], "status": "OK" if score_audit > 0 else "NG"},
+            "observability": {"score": score_obs, "max": w["observability"], "hits": obs_hits, "status": obs_status},
+            "failure_mode": {"score": score_fm, "max": w["failure_mode"], "status": "OK" if score_fm > 0 else "NG"},
+        },
+    }
+
+    return {
+        "score_total": score_total,
+        "score_breakdown_json": breakdown,
+        "risk_flags_json": flags,
+    }
+
+
+def score_many(subs: List[Dict], rules: Dict[str, ScenarioRules]) -> Dict[int, Optional[Dict]]:
+    """
+    여러 submission 한 번에 채점. 반환: {submission_id: row or None(시나리오 룰 없음)}
+    """
+    out: Dict[int, Optional[Dict]] = {}
+    for sub in subs:
+        r = rules.get(sub["scenario_id"])
+        out[sub["id"]] = score_submission(sub, r) if r else None
+    return out
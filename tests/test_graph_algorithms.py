@@ -0,0 +1,249 @@
+# -----------------------------
+# tests/test_graph_algorithms.py
+# 목적: graph_csr 기반 분석 단계를 단순한 기준 구현(노드/엣지 하나씩 지우고 다시 BFS 등)과 맞춰봄
+# - SPOF / 단일 링크 / betweenness / disjoint 경로 / biconnected block: seed 고정 무작위 digraph
+# 사용 예:
+#   python -m pytest -q tests
+# -----------------------------
+
+import itertools
+import os
+import random
+import sys
+from collections import defaultdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_analysis import compute_critical_edges_csr, compute_spof_csr  # noqa: E402
+from graph_csr import BetweennessSampler, CSRGraph  # noqa: E402
+
+SEEDS = range(40)
+
+
+def random_digraph(seed: int):
+    """노드 4~9개, 엣지 확률 0.15~0.45짜리 digraph → (edges, entry, exits)."""
+    rnd = random.Random(seed)
+    n = rnd.randint(4, 9)
+    p = rnd.uniform(0.15, 0.45)
+    edges = [(f"n{a}", f"n{b}") for a in range(n) for b in range(n) if a != b and rnd.random() < p]
+    exits = [f"n{v}" for v in range(n - 2, n) if rnd.random() < 0.8] or [f"n{n - 1}"]
+    return edges, "n0", exits
+
+
+def reachable(edges, start, nodes, skip_node=None, skip_edge=None):
+    """nodes 안에서만 BFS (skip_node / skip_edge는 없는 것으로 봄)."""
+    adj = defaultdict(list)
+    for e in edges:
+        if e != skip_edge:
+            adj[e[0]].append(e[1])
+    seen = {start}
+    queue = [start]
+    for v in queue:
+        for w in adj[v]:
+            if w in nodes and w != skip_node and w not in seen:
+                seen.add(w)
+                queue.append(w)
+    return seen
+
+
+def graph_case(seed: int):
+    edges, entry, exits = random_digraph(seed)
+    g = CSRGraph.from_edges(edges)
+    if entry not in g:
+        pytest.skip("entry 노드에 엣지 없음")
+    core_mask = g.core_mask(entry, exits)
+    core = set(g.nodes_of(core_mask))
+    # entry에서 exit으로 못 가면 core_mask는 전체 그래프 → 원래부터 못 가는 exit은 SPOF 판단에서 빠짐
+    seen = reachable(edges, entry, core)
+    targets = [ex for ex in exits if ex in seen and ex != entry]
+    return g, edges, entry, exits, core_mask, core, targets
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spof_matches_node_removal(seed):
+    g, edges, entry, exits, core_mask, core, targets = graph_case(seed)
+    redundant = {f"n{seed % 5}"}
+
+    expected = set()
+    for x in core - {entry} - set(exits) - redundant:
+        seen = reachable(edges, entry, core, skip_node=x)
+        if any(t not in seen for t in targets):
+            expected.add(x)
+
+    assert set(compute_spof_csr(g, entry, exits, core_mask, redundant)) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_critical_edges_match_edge_removal(seed):
+    g, edges, entry, exits, core_mask, core, targets = graph_case(seed)
+
+    expected = set()
+    for e in edges:
+        if e[0] in core and e[1] in core:
+            seen = reachable(edges, entry, core, skip_edge=e)
+            if any(t not in seen for t in targets):
+                expected.add(e)
+
+    got = compute_critical_edges_csr(g, entry, exits, core_mask)
+    assert {tuple(e) for e in got} == expected
+    assert len(got) == len(expected)
+
+
+def reference_betweenness(edges, nodes):
+    """무방향 정규화 betweenness: 모든 (s, t) 쌍의 최단 경로 수를 직접 세서 나눔."""
+    adj = defaultdict(set)
+    for a, b in edges:
+        if a in nodes and b in nodes and a != b:
+            adj[a].add(b)
+            adj[b].add(a)
+
+    dist, sigma = {}, {}
+    for s in nodes:
+        d, c = {s: 0}, {s: 1}
+        queue = [s]
+        for v in queue:
+            for w in adj[v]:
+                if w not in d:
+                    d[w] = d[v] + 1
+                    c[w] = 0
+                    queue.append(w)
+                if d[w] == d[v] + 1:
+                    c[w] += c[v]
+        dist[s], sigma[s] = d, c
+
+    n = len(nodes)
+    bc = {v: 0.0 for v in nodes}
+    for s, t in itertools.combinations(nodes, 2):
+        if t not in dist[s]:
+            continue
+        for v in nodes:
+            if v in (s, t) or v not in dist[s] or t not in dist[v]:
+                continue
+            if dist[s][v] + dist[v][t] == dist[s][t]:
+                bc[v] += sigma[s][v] * sigma[v][t] / sigma[s][t]
+    scale = 2.0 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    return {v: x * scale for v, x in bc.items()}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_exact_betweenness_matches_reference(seed):
+    edges, _, _ = random_digraph(seed)
+    g = CSRGraph.from_edges(edges)
+    mask = bytearray([1]) * len(g)
+
+    got = {g.ids[v]: x for v, x in g.betweenness(mask).items()}
+    expected = reference_betweenness(edges, g.nodes)
+    assert got == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sampled_betweenness_with_every_pivot_is_exact(seed):
+    edges, _, _ = random_digraph(seed)
+    g = CSRGraph.from_edges(edges)
+    if len(g) < 3:
+        pytest.skip("노드 3개 미만")
+    mask = bytearray([1]) * len(g)
+
+    errors = {}
+    sampled = g.betweenness(mask, k=len(g), seed=seed, errors=errors)
+    assert sampled == pytest.approx(g.betweenness(mask))
+    assert max(errors.values()) == pytest.approx(0.0, abs=1e-9)     # 비복원 전수 추출 → 오차 0
+
+
+def min_vertex_cut(edges, root, targets, nodes, uncuttable):
+    """root에서 targets를 모두 끊는 가장 작은 노드 집합 크기 (부분집합 전수 탐색)."""
+    cuttable = sorted(nodes - {root} - uncuttable)
+    for size in range(len(cuttable) + 1):
+        for cut in itertools.combinations(cuttable, size):
+            alive = nodes - set(cut)
+            if not reachable(edges, root, alive) & set(targets):
+                return size
+    return None
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_disjoint_paths_match_min_vertex_cut(seed):
+    g, edges, entry, exits, core_mask, core, targets = graph_case(seed)
+    if not targets:
+        pytest.skip("core 안에 exit 없음")
+    uncuttable = {f"n{seed % 4}"} & core - {entry}
+    mask = g.mask_of(uncuttable) if uncuttable else None
+
+    paths, cut = g.disjoint_paths(g.index[entry], [g.index[t] for t in targets], core_mask, mask)
+
+    expected = min_vertex_cut(edges, entry, targets, core, uncuttable)
+    if expected is None:                 # entry → uncuttable exit 직결 등 끊을 수 없음
+        assert cut is None
+        return
+    assert paths == expected
+    cut_nodes = {g.ids[v] for v in cut}
+    assert len(cut_nodes) == expected
+    assert not cut_nodes & (uncuttable | {entry})
+    assert not reachable(edges, entry, core - cut_nodes) & set(targets)
+
+
+@pytest.mark.parametrize("k", [0, 1])
+def test_sampled_betweenness_below_two_pivots_has_no_nan(k):
+    edges, _, _ = random_digraph(1)
+    g = CSRGraph.from_edges(edges)
+    mask = bytearray([1]) * len(g)
+
+    errors = {}
+    values = g.betweenness(mask, k=k, seed=1, errors=errors)
+    assert all(x == x for x in values.values())
+    assert set(errors) == set(values) and all(e == float("inf") for e in errors.values())
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sampler_extend_matches_one_shot_sample(seed):
+    edges, _, _ = random_digraph(seed)
+    g = CSRGraph.from_edges(edges)
+    if len(g) < 4:
+        pytest.skip("노드 4개 미만")
+    mask = bytearray([1]) * len(g)
+
+    sampler = BetweennessSampler(g, mask, seed)
+    sampler.extend(2)
+    sampler.extend(len(g) - 1)
+    errors, one_shot_errors = {}, {}
+    assert sampler.values(errors) == pytest.approx(g.betweenness(mask, k=len(g) - 1, seed=seed, errors=one_shot_errors))
+    assert errors == pytest.approx(one_shot_errors)
+
+
+def undirected_components(edges, nodes):
+    """nodes 안에서 무방향 연결 요소 수."""
+    both = edges + [(b, a) for a, b in edges]
+    seen, count = set(), 0
+    for v in nodes:
+        if v not in seen:
+            seen |= reachable(both, v, nodes)
+            count += 1
+    return count
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_biconnected_blocks_match_node_removal(seed):
+    g, edges, entry, exits, core_mask, core, targets = graph_case(seed)
+    core_edges = [(a, b) for a, b in edges if a in core and b in core]
+
+    blocks, is_cut = g.biconnected_blocks(core_mask, g.index[entry])
+
+    base = undirected_components(core_edges, core)
+    expected = {x for x in core if undirected_components(core_edges, core - {x}) > base}
+    assert set(g.nodes_of(is_cut)) == expected
+
+    named = [{g.ids[v] for v in b} for b in blocks]
+    pairs = {frozenset(e) for e in core_edges}
+    for e in pairs:                          # 무방향 엣지마다 정확히 한 block
+        assert sum(e <= b for b in named) == 1
+    for b in named:
+        assert len(b) >= 2
+        if len(b) > 2:                       # block 안에서는 노드 하나를 지워도 안 갈라짐
+            inner = [(x, y) for x, y in core_edges if x in b and y in b]
+            assert all(undirected_components(inner, b - {x}) == 1 for x in b)
+    for b1, b2 in itertools.combinations(named, 2):
+        assert len(b1 & b2) <= 1
+    touching = [b for b in blocks if g.index[entry] in b]
+    assert all(b[0] == g.index[entry] for b in touching)   # entry가 루트 → entry는 항상 block의 루트 쪽 노드
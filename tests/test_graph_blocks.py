@@ -0,0 +1,156 @@
+# -----------------------------
+# tests/test_graph_blocks.py
+# 목적: 수정 제출의 block 단위 재계산(graph_blocks.py)이 전체 분석과 같은 결과를 내는지
+# - block_betweenness: seed 고정 무작위 digraph에서 CSRGraph.betweenness와 비교
+# - analyze_revision: block 여러 개가 이어진 그래프를 조금 고친 수정본으로 scoped 결과와 전체 분석 비교
+# 사용 예:
+#   python -m pytest -q tests
+# -----------------------------
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_analysis import analyze_mermaid, block_tag  # noqa: E402
+from graph_blocks import block_betweenness, decompose  # noqa: E402
+from graph_csr import CSRGraph  # noqa: E402
+from incremental_review import analyze_revision  # noqa: E402
+
+from test_graph_algorithms import SEEDS, random_digraph  # noqa: E402
+
+
+def necklace(rnd: random.Random, k: int):
+    """n0 → (다이아몬드 | bridge | 삼각형) k개 → end, 가끔 곁가지 leaf."""
+    edges = []
+    prev = "n0"
+    for i in range(k):
+        a, b, c = f"a{i}", f"b{i}", f"c{i}"
+        shape = rnd.choice(["diamond", "bridge", "triangle"])
+        if shape == "diamond":
+            edges += [(prev, a), (prev, b), (a, c), (b, c)]
+        elif shape == "bridge":
+            edges += [(prev, c)]
+        else:
+            edges += [(prev, a), (a, c), (prev, c)]
+        if rnd.random() < 0.3:
+            edges.append((c, f"leaf{i}"))
+        prev = c
+    return edges + [(prev, "end")]
+
+
+def mutate(rnd: random.Random, edges):
+    """엣지 1~2개 추가/삭제 (새 노드를 달거나 기존 노드끼리 잇기)."""
+    edges = list(edges)
+    nodes = sorted({x for e in edges for x in e} - {"n0", "end"})
+    for _ in range(rnd.randint(1, 2)):
+        op = rnd.random()
+        if op < 0.4:
+            edges.append((rnd.choice(nodes), f"new{rnd.randint(0, 99)}"))
+        elif op < 0.7:
+            edges.pop(rnd.randrange(len(edges) - 1))      # 마지막(→ end)은 남김
+        else:
+            edges.append((rnd.choice(nodes), rnd.choice(nodes)))
+    return [e for e in edges if e[0] != e[1]]
+
+
+def mermaid(edges) -> str:
+    return "%% entry: n0\n%% exit: end\nflowchart LR\n" + "".join(f"  {a} --> {b}\n" for a, b in edges)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_block_betweenness_matches_brandes(seed):
+    edges, entry, _ = random_digraph(seed)
+    g = CSRGraph.from_edges(edges)
+    mask = bytearray([1]) * len(g)
+
+    bc, _, _ = block_betweenness(g, mask, decompose(g, mask, entry if entry in g else None), "t")
+    assert bc == pytest.approx(g.betweenness(mask), abs=1e-12)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_block_betweenness_reuses_previous_table(seed):
+    rnd = random.Random(seed)
+    before = necklace(rnd, rnd.randint(3, 10))
+    after = mutate(rnd, before)
+    g1, g2 = CSRGraph.from_edges(before), CSRGraph.from_edges(after)
+    m1, m2 = bytearray([1]) * len(g1), bytearray([1]) * len(g2)
+
+    _, table, _ = block_betweenness(g1, m1, decompose(g1, m1, "n0"), "t")
+    bc, _, stats = block_betweenness(g2, m2, decompose(g2, m2, "n0"), "t", table)
+    assert bc == pytest.approx(g2.betweenness(m2), abs=1e-12)
+    assert stats["work"] <= stats["full_work"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_scoped_revision_matches_full_analysis(seed):
+    rnd = random.Random(seed)
+    before = necklace(rnd, rnd.randint(4, 10))
+    after = mutate(rnd, before)
+    first = analyze_mermaid(mermaid(before))
+    previous = {
+        "submission_id": 1,
+        "graph_analysis": first["graph_analysis"],
+        "stages_ms": first["perf"]["stages_ms"],
+        "edges": first["edges"],
+    }
+
+    got = analyze_revision(mermaid(after), previous)
+    full = analyze_mermaid(mermaid(after))
+
+    revision = got["graph_analysis"]["revision"]
+    if revision["mode"] == "reuse":
+        pytest.skip("core 밖만 바뀜")
+    assert revision["mode"] == "scoped", revision
+    assert revision["scoped_stages"] == ["spof", "critical_edge", "bottleneck"]
+    for key in ("spof_candidates", "critical_edges", "bottleneck_candidates", "betweenness", "core_signature"):
+        assert got["graph_analysis"][key] == full["graph_analysis"][key], key
+    assert got["penalty_info"] == full["penalty_info"]
+
+    scope = got["perf"]["scope"]
+    assert all(scope[s]["work"] <= scope[s]["full_work"] for s in revision["scoped_stages"])
+
+
+def test_edit_in_one_block_recomputes_only_that_block():
+    before = necklace(random.Random(2), 8)
+    first = analyze_mermaid(mermaid(before))
+    previous = {"submission_id": 1, "graph_analysis": first["graph_analysis"], "edges": first["edges"]}
+
+    got = analyze_revision(mermaid(before + [("n0", "x"), ("x", "c0")]), previous)
+    assert got["graph_analysis"]["revision"]["mode"] == "scoped"
+    scope = got["perf"]["scope"]
+    for stage in ("spof", "critical_edge"):
+        assert scope[stage]["recomputed"] == 1
+        assert scope[stage]["reused"] == scope[stage]["blocks"] - 1
+    # 첫 block에 노드가 늘어서 나머지 block은 매달린 노드 수만 바뀜 → 다시 계산하지 않고 갱신
+    assert scope["bottleneck"]["recomputed"] == 1
+    assert scope["bottleneck"]["updated"] + scope["bottleneck"]["reused"] == scope["bottleneck"]["blocks"] - 1
+    assert scope["bottleneck"]["saved_work"] > 0
+
+
+def test_large_diff_falls_back_to_full_analysis():
+    rnd = random.Random(0)
+    before = necklace(rnd, 6)
+    first = analyze_mermaid(mermaid(before))
+    previous = {"submission_id": 1, "graph_analysis": first["graph_analysis"], "edges": first["edges"]}
+
+    rewired = [(a, b) for a, b in before if not b.startswith("c")] + [("n0", "end")]
+    got = analyze_revision(mermaid(rewired), previous)
+    assert got["graph_analysis"]["revision"]["mode"] == "recompute"
+    assert got["graph_analysis"]["revision"]["reason"] == "diff_too_large"
+    assert "scope" not in got["perf"]
+
+
+def test_block_table_from_other_engine_is_not_reused():
+    rnd = random.Random(1)
+    before = necklace(rnd, 6)
+    first = analyze_mermaid(mermaid(before))
+    assert first["graph_analysis"]["blocks"]["engine"] == block_tag()
+    first["graph_analysis"]["blocks"]["engine"] = "old"
+    previous = {"submission_id": 1, "graph_analysis": first["graph_analysis"], "edges": first["edges"]}
+
+    got = analyze_revision(mermaid(before + [("a0", "extra")] + [("c1", "n0")]), previous)
+    assert got["graph_analysis"]["revision"]["reason"] == "no_block_table"
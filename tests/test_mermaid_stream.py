@@ -0,0 +1,41 @@
+# -----------------------------
+# tests/test_mermaid_stream.py
+# 목적: Mermaid 토크나이저가 유령 노드를 만들던 문법을 노드로 잡지 않는지 확인
+# - o--o / x--x 머리, 따옴표 안 구분자, 엣지 id(e1@), 노드 메타데이터(A@{ ... })
+# 사용 예:
+#   python -m pytest -q tests
+# -----------------------------
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mermaid_stream import iter_mermaid  # noqa: E402
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("A o--o B", [("A", "B"), ("B", "A")]),
+    ("A x--x B", [("A", "B"), ("B", "A")]),
+    ("Ao --> B", [("Ao", "B")]),
+    ('A -->|"a|b"| B', [("A", "B")]),
+    ('A["x ] y"] --> B', [("A", "B")]),
+    ("A e1@--> B", [("A", "B")]),
+    ("A@{ shape: rect } --> B", [("A", "B")]),
+    ('A@{ shape: rect, label: "x, } y" } --> B@{ label: C }', [("A", "B")]),
+])
+def test_tokenizer_does_not_invent_nodes(line, expected):
+    assert [(a, b) for kind, a, b in iter_mermaid(line) if kind == "edge"] == expected
+
+
+def test_tokenizer_keeps_quoted_label():
+    labels = {a: b for kind, a, b in iter_mermaid('A["x ] y"] --> B') if kind == "label"}
+    assert labels == {"A": "x ] y"}
+
+
+def test_tokenizer_reads_metadata_label():
+    labels = {a: b for kind, a, b in iter_mermaid('A@{ shape: rect, label: "x, } y" } --> B@{ label: C }')
+              if kind == "label"}
+    assert labels == {"A": "x, } y", "B": "C"}
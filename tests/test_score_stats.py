@@ -0,0 +1,65 @@
+# -----------------------------
+# tests/test_score_stats.py
+# 목적: stats_delta 증분을 누적하면 새 기여분을 처음부터 집계한 것과 같아지는지 (되돌리면 원래대로)
+# 사용 예:
+#   python -m pytest -q tests
+# -----------------------------
+
+import os
+import random
+import sys
+from collections import defaultdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from score_stats import contribution, stats_delta  # noqa: E402
+
+
+def totals(rows_by_scenario):
+    """{scenario_id: rows} 여러 건 → {(scenario_id, kind, item): [cnt, sum, sq]} (0인 키 제외)."""
+    acc = defaultdict(lambda: [0, 0.0, 0.0])
+    for scenario_id, rows in rows_by_scenario:
+        for kind, item, cnt, s, sq in rows:
+            a = acc[(scenario_id, kind, item)]
+            a[0] += cnt
+            a[1] += s
+            a[2] += sq
+    return {k: v for k, v in acc.items() if any(v)}
+
+
+def apply_delta(table, delta):
+    out = {k: list(v) for k, v in table.items()}
+    for scenario_id, kind, item, cnt, s, sq in delta:
+        a = out.setdefault((scenario_id, kind, item), [0, 0.0, 0.0])
+        a[0] += cnt
+        a[1] += s
+        a[2] += sq
+    return {k: v for k, v in out.items() if v[0] > 0}      # STATS_DELETE_EMPTY_SQL과 같은 정리
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_stats_delta_round_trip(seed):
+    rnd = random.Random(seed)
+
+    def random_result():
+        return contribution(
+            rnd.randint(0, 100),
+            rnd.choice([None, 0, 6, 12, 24]),
+            rnd.sample(["SPOF_DETECTED", "BOTTLENECK", "CAP_APPLIED_BY_TRADEOFFS"], rnd.randint(0, 2)),
+            rnd.sample(["GW", "API", "DB"], rnd.randint(0, 2)),
+            rnd.sample(["DB", "Cache", "Queue"], rnd.randint(0, 3)),
+        )
+
+    scenarios = {sid: rnd.choice(["S1", "S2"]) for sid in range(1, 7)}
+    before = {sid: (scenarios[sid], random_result() if rnd.random() < 0.7 else []) for sid in scenarios}
+    after = {sid: random_result() for sid in scenarios}
+
+    table = totals(before.values())
+    updated = apply_delta(table, stats_delta(before, after))
+    assert updated == pytest.approx(totals((scenarios[sid], rows) for sid, rows in after.items()))
+
+    undo = stats_delta({sid: (scenarios[sid], rows) for sid, rows in after.items()},
+                       {sid: rows for sid, (_, rows) in before.items()})
+    assert apply_delta(updated, undo) == pytest.approx(table)